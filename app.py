@@ -1,36 +1,130 @@
-from flask import Flask
-from flask_cors import CORS
+from src.utils.boot_profile import boot_profile
 
-from dotenv import load_dotenv
-from flasgger import Swagger
-import os
+with boot_profile.phase("import flask, flasgger, apscheduler"):
+    from flask import Flask
+    from flask_cors import CORS
 
+    from dotenv import load_dotenv
+    from flasgger import Swagger
+    import os
+    import gc
+    import time
+    import threading
+    from datetime import datetime
+    from apscheduler.schedulers.background import BackgroundScheduler
 
-from src.routes.car_trips_routes import car_trips_route
-from src.routes.bus_routes import bus_route
-from src.routes.flood_events_routes import flood_events_route
-from src.routes.traffic_routes import traffic_route
-from src.utils.onemap_auth import get_valid_token, refresh_onemap_token
-from apscheduler.schedulers.background import BackgroundScheduler
+with boot_profile.phase("import routes and controllers"):
+    from src.routes.car_trips_routes import car_trips_route
+    from src.routes.bus_routes import bus_route
+    from src.routes.flood_events_routes import flood_events_route
+    from src.routes.traffic_routes import traffic_route
+    from src.routes.tiles_routes import tiles_route
+    from src.routes.simulation_routes import simulation_route
+    from src.routes.admin_routes import admin_route
+    from src.controllers.tiles_controller import warm_tile_cache, get_tile_edges
+    from src.controllers.traffic_controller import refresh_traffic_summary, SUMMARY_REFRESH_MINUTES
+    from src.controllers.flood_events_controller import get_graph_arrays, get_flood_edge_index, get_centrality_store, get_edges_3414, get_precomputed
+    from src.controllers.car_trips_controller import get_routing_engine, get_isochrone_engine
+    from src.utils.memory import memory_usage, format_memory
+    from src.utils.instrumentation import init_instrumentation
+    from src.utils.onemap_auth import start_token_warmup, refresh_onemap_token, is_refresh_leader
+    from src.controllers.admin_controller import mark_background_jobs_started
 
 
-def create_app():
+def start_background_jobs():
+    start_token_warmup()
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(refresh_onemap_token, 'interval', hours=1)
+    scheduler.add_job(refresh_traffic_summary, 'interval', minutes=SUMMARY_REFRESH_MINUTES, next_run_time=datetime.now())
+    scheduler.start()
+    # Every worker schedules the check but only the leader runs it, rotating only when the token is due;
+    # a worker picks up leadership if the leader exits.
+    print(f"OneMap auto-token refresh scheduler started ({'leader' if is_refresh_leader() else 'follower'})")
+    if os.getenv("TILE_PREGENERATE_MAX_ZOOM"):
+        threading.Thread(target=warm_tile_cache, args=(int(os.getenv("TILE_PREGENERATE_MAX_ZOOM")),), daemon=True).start()
+    mark_background_jobs_started()
+    return scheduler
+
+
+def warm_network_data():
+    """Without preload, build what /readyz waits for in the background instead of on the first request."""
+    try:
+        get_graph_arrays()
+        get_routing_engine()
+        print("Network data ready")
+    except Exception as e:
+        print(f"Warning: network data warmup failed, it will load on demand: {e}")
+
+
+def preload_network_data():
+    """Build the shared graph structures once in the gunicorn master.
+
+    Workers forked afterwards share these pages copy-on-write. Most of the
+    data is NumPy-backed (GraphArrays, the routing landmarks, the mapped
+    centrality store) so each structure is a handful of Python objects.
+    gc.freeze() moves everything allocated so far out of the collector's
+    generations, so GC passes in the workers do not write to (and copy)
+    those pages.
+    """
+    started = time.perf_counter()
+    with boot_profile.phase("graph arrays"):
+        get_graph_arrays()
+    with boot_profile.phase("flood edge index"):
+        get_flood_edge_index()
+    with boot_profile.phase("edges in EPSG:3414"):
+        get_edges_3414()
+    with boot_profile.phase("centrality store"):
+        try:
+            get_centrality_store()
+        except FileNotFoundError as e:
+            print(f"Warning: {e}, centrality will load on demand")
+    with boot_profile.phase("precomputed flood analytics"):
+        get_precomputed()
+    with boot_profile.phase("routing engine"):
+        get_routing_engine()
+    with boot_profile.phase("isochrone engine"):
+        get_isochrone_engine()
+    with boot_profile.phase("tile edges"):
+        get_tile_edges()
+    gc.collect()
+    gc.freeze()
+    print(f"Preloaded network data in {time.perf_counter() - started:.1f}s, "
+          f"{gc.get_freeze_count()} objects frozen, {format_memory(memory_usage())}")
+
+
+def create_app(preload=False):
+    """preload=True builds shared data up front and leaves background jobs to
+    start_background_jobs() in each forked worker (see gunicorn.conf.py).
+
+    Boot makes no network calls: the OneMap token is warmed by a background
+    thread in start_background_jobs() and fetched on first use otherwise.
+    /readyz reports 503 until this process runs its background jobs and has
+    the graph and routing engine (built in the background without preload),
+    plus the token state."""
     app = Flask(__name__,template_folder="src/templates")
     load_dotenv()
-    print("Checking OneMap token status...")
-    token = get_valid_token()  
-    os.environ["ONEMAP_API_KEY"] = token  
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
-    swagger = Swagger(app)
-    app.register_blueprint(car_trips_route)
-    app.register_blueprint(bus_route)
-    app.register_blueprint(flood_events_route)
-    app.register_blueprint(traffic_route)
+    with boot_profile.phase("swagger"):
+        swagger = Swagger(app)
+    init_instrumentation(app)
+    with boot_profile.phase("register blueprints"):
+        app.register_blueprint(car_trips_route)
+        app.register_blueprint(bus_route)
+        app.register_blueprint(flood_events_route)
+        app.register_blueprint(traffic_route)
+        app.register_blueprint(tiles_route)
+        app.register_blueprint(simulation_route)
+        app.register_blueprint(admin_route)
     CORS(app, origins=["https://data-alchemists-fyp-2025.onrender.com"])
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(refresh_onemap_token, 'interval', days=2)
-    scheduler.start()
-    print("OneMap auto-token refresh scheduler started")
+    if preload:
+        # Scheduler threads would not survive the fork, so workers start their own.
+        with boot_profile.phase("preload network data"):
+            preload_network_data()
+    else:
+        with boot_profile.phase("background jobs"):
+            start_background_jobs()
+            threading.Thread(target=warm_network_data, daemon=True).start()
+    boot_profile.finish()
     return app
 
 if __name__ == '__main__':
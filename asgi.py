@@ -0,0 +1,76 @@
+"""ASGI entry point, the default for gunicorn.conf.py (uvicorn workers):
+
+    gunicorn -c gunicorn.conf.py asgi:app
+
+The Flask app is served through asgiref's WSGI adapter, with two changes
+from asgiref.wsgi.WsgiToAsgi:
+
+- Each request runs on a pool of ASGI_THREADS threads rather than
+  asgiref's single thread-sensitive thread, so sync views run side by
+  side as they would under gthread.
+- Async views are handed back to the worker's event loop by Flask (asgiref
+  async_to_sync called from that pool), so every in-flight upstream call of
+  every request in the worker is multiplexed on one loop and one
+  long-lived httpx.AsyncClient, opened at lifespan startup.
+
+A request thread waiting on its async view is idle, so ASGI_THREADS bounds
+concurrent requests per worker, not upstream calls; those are bounded by
+UPSTREAM_MAX_CONNECTIONS. The loop's default executor, behind every
+asyncio.to_thread in the views, gets ASGI_THREADS threads too: asyncio's
+default of min(32, cpus + 4) would queue every request's blocking calls
+behind a handful of threads.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from app import create_app
+from src.utils.async_http import open_shared_client, close_shared_client
+
+THREADS = int(os.getenv("ASGI_THREADS", 100))
+
+_executor = None
+_blocking_executor = None
+# asgiref decorates run_wsgi_app with a thread-sensitive sync_to_async; .func is the plain method.
+# That is asgiref internals, so asgiref is pinned in src/requirements.txt.
+_run_wsgi_app = getattr(WsgiToAsgiInstance.__dict__.get("run_wsgi_app"), "func", None)
+if _run_wsgi_app is None:
+    raise ImportError("asgi.py needs asgiref's WsgiToAsgiInstance.run_wsgi_app wrapped by sync_to_async "
+                      "(asgiref 3.12.x); install the asgiref version pinned in src/requirements.txt")
+
+
+class _PooledInstance(WsgiToAsgiInstance):
+    async def run_wsgi_app(self, body):
+        await sync_to_async(_run_wsgi_app, thread_sensitive=False, executor=_executor)(self, body)
+
+
+class FlaskASGI(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        await _PooledInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        global _executor, _blocking_executor
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Created here, in the worker, so no executor threads are inherited across the fork.
+                _executor = ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix="asgi")
+                _blocking_executor = ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix="asgi-blocking")
+                asyncio.get_running_loop().set_default_executor(_blocking_executor)
+                await open_shared_client()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await close_shared_client()
+                _executor.shutdown(wait=False)
+                _blocking_executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = FlaskASGI(create_app(preload=os.getenv("PRELOAD_NETWORK_DATA") == "1"))
@@ -0,0 +1,274 @@
+"""In-process stand-ins for Supabase, OneMap, LTA DataMall and Google geocoding.
+
+install() patches the client entry points the controllers use
+(supabase.create_client, requests.get/post for the OneMap and LTA hosts,
+googlemaps.Client.geocode, and the httpx transport of the async views) so
+the app runs unchanged against in-memory
+tables and canned upstream payloads. Every call sleeps for a configurable
+latency, so benchmark numbers include a realistic share of I/O wait.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+ONEMAP_SAMPLES = [ROOT_DIR / "test.json", ROOT_DIR / "test1.json"]
+
+# Mean latency in milliseconds. OneMap routing is the mean debugOutput.totalTime
+# of the bundled test.json / test1.json responses; the rest are typical values.
+DEFAULT_LATENCY_MS = {
+    "supabase": 40,
+    "onemap_route": 450,
+    "onemap_token": 300,
+    "lta": 120,
+    "google": 150,
+}
+LATENCY_JITTER = 0.25
+
+# Credentials the app reads at import; none of them reach a real service.
+FAKE_ENV = {
+    "SUPABASE_URL": "http://supabase.invalid",
+    "SUPABASE_KEY": "benchmark",
+    "ONEMAP_EMAIL": "benchmark@example.com",
+    "ONEMAP_PASSWORD": "benchmark",
+    "LTA_API_KEY": "benchmark",
+    "GOOGLE_MAPS_API_KEY": "AIzaBenchmarkBenchmarkBenchmarkBenchmark",
+}
+
+_onemap_sample = None
+
+
+class Latency:
+    """Per-upstream sleep of mean_ms * (1 +- jitter), scaled by scale."""
+
+    def __init__(self, mean_ms=None, jitter=LATENCY_JITTER, scale=1.0, seed=0):
+        self.mean_ms = dict(DEFAULT_LATENCY_MS, **(mean_ms or {}))
+        self.jitter = jitter
+        self.scale = scale
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {name: 0 for name in self.mean_ms}
+
+    def seconds(self, upstream):
+        """Count a call and draw its latency."""
+        with self._lock:
+            self.calls[upstream] = self.calls.get(upstream, 0) + 1
+            factor = 1 + self._rng.uniform(-self.jitter, self.jitter)
+        return max(self.mean_ms.get(upstream, 0) * factor * self.scale / 1000, 0)
+
+    def wait(self, upstream):
+        seconds = self.seconds(upstream)
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+def onemap_sample():
+    global _onemap_sample
+    if _onemap_sample is None:
+        with open(ONEMAP_SAMPLES[0]) as f:
+            _onemap_sample = json.load(f)
+    return _onemap_sample
+
+
+def _stable_random(text):
+    return random.Random(int(hashlib.sha256(str(text).encode()).hexdigest()[:12], 16))
+
+
+def onemap_route_payload(params):
+    """Public transport plans come from test.json; drive routes are synthesized."""
+    if params.get("routeType") == "pt":
+        return onemap_sample()
+    rng = _stable_random(f"{params.get('start')}|{params.get('end')}")
+    seconds = rng.randint(300, 3600)
+    return {
+        "status": 0,
+        "status_message": "Found route between points",
+        "route_geometry": "",
+        "route_instructions": [],
+        "route_summary": {
+            "start_point": "START", "end_point": "END",
+            "total_time": seconds, "total_distance": int(seconds * 11),
+        },
+    }
+
+
+def onemap_token_payload():
+    return {"access_token": "benchmark-token", "expiry_timestamp": str(int(time.time()) + 3 * 24 * 3600)}
+
+
+def lta_bus_arrival_payload(stop_code):
+    rng = _stable_random(stop_code)
+    services = sorted({str(rng.randint(2, 300)) for _ in range(rng.randint(1, 6))}, key=int)
+    return {"BusStopCode": str(stop_code), "Services": [{"ServiceNo": s, "Operator": "SBST"} for s in services]}
+
+
+def geocode_payload(address):
+    rng = _stable_random(address)
+    lat, lng = rng.uniform(1.28, 1.44), rng.uniform(103.70, 103.98)
+    return [{"formatted_address": f"{address}, Singapore", "geometry": {"location": {"lat": lat, "lng": lng}}}]
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} from fake upstream", response=self)
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+        self.error = None
+
+
+class FakeQuery:
+    """The subset of the PostgREST query builder the controllers use."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.columns = None
+        self.filters = []
+        self.order_by = None
+        self.window = None
+        self.updates = None
+
+    def select(self, columns="*"):
+        self.columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def update(self, values):
+        self.updates = values
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def in_(self, column, values):
+        values = {str(v) for v in values}
+        self.filters.append(lambda row: str(row.get(column)) in values)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] >= value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] <= value)
+        return self
+
+    def or_(self, expression):
+        # Only the and(a.eq.x,b.eq.y),... form used by the segment batch endpoint.
+        groups = [re.findall(r"(\w+)\.eq\.([^,)]+)", group) for group in re.findall(r"and\(([^)]*)\)", expression)]
+        columns = tuple(c for c, _ in groups[0]) if groups else ()
+        wanted = {tuple(v for _, v in group) for group in groups}
+        self.filters.append(lambda row: tuple(str(row.get(c)) for c in columns) in wanted)
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by = (column, desc)
+        return self
+
+    def limit(self, count):
+        self.window = (0, count - 1)
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end)
+        return self
+
+    def execute(self):
+        self.client.latency.wait("supabase")
+        rows = [row for row in self.client.tables.get(self.table, []) if all(f(row) for f in self.filters)]
+        if self.updates is not None:
+            for row in rows:
+                row.update(self.updates)
+            return FakeResult(rows)
+        if self.order_by:
+            column, desc = self.order_by
+            rows = sorted(rows, key=lambda row: row.get(column), reverse=desc)
+        if self.window:
+            rows = rows[self.window[0]:self.window[1] + 1]
+        if self.columns:
+            rows = [{c: row.get(c) for c in self.columns} for row in rows]
+        else:
+            rows = [dict(row) for row in rows]
+        return FakeResult(rows)
+
+
+class FakeSupabase:
+    def __init__(self, tables, latency):
+        self.tables = tables
+        self.latency = latency
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def install(tables, latency=None):
+    """Patch the upstream clients. Call before importing anything under src."""
+    import googlemaps
+    import httpx
+    import requests
+    import supabase
+    from src.utils import async_http
+
+    latency = latency or Latency()
+    client = FakeSupabase(tables, latency)
+    supabase.create_client = lambda *args, **kwargs: client
+
+    real_get, real_post = requests.get, requests.post
+
+    def fake_get(url, params=None, **kwargs):
+        parsed = urlparse(url)
+        if parsed.hostname == "www.onemap.gov.sg" and "routingsvc" in parsed.path:
+            latency.wait("onemap_route")
+            return FakeResponse(onemap_route_payload(params or {}))
+        if parsed.hostname == "datamall2.mytransport.sg":
+            latency.wait("lta")
+            stop = (params or {}).get("BusStopCode") or dict(re.findall(r"(\w+)=(\w+)", parsed.query)).get("BusStopCode")
+            return FakeResponse(lta_bus_arrival_payload(stop))
+        return real_get(url, params=params, **kwargs)
+
+    def fake_post(url, *args, **kwargs):
+        if urlparse(url).hostname == "www.onemap.gov.sg":
+            latency.wait("onemap_token")
+            return FakeResponse(onemap_token_payload())
+        return real_post(url, *args, **kwargs)
+
+    def fake_geocode(self, address, *args, **kwargs):
+        latency.wait("google")
+        return geocode_payload(address)
+
+    async def fake_async_upstream(request):
+        path, params = request.url.path, dict(request.url.params)
+        if "routingsvc" in path:
+            upstream, payload = "onemap_route", onemap_route_payload(params)
+        elif path.endswith("/BusArrival"):
+            upstream, payload = "lta", lta_bus_arrival_payload(params.get("BusStopCode"))
+        elif path.endswith("/geocode/json"):
+            upstream, payload = "google", {"status": "OK", "results": geocode_payload(params.get("address", ""))}
+        else:
+            return httpx.Response(404, json={"error": f"no fake for {request.url}"})
+        await asyncio.sleep(latency.seconds(upstream))
+        return httpx.Response(200, json=payload)
+
+    requests.get, requests.post = fake_get, fake_post
+    googlemaps.Client.geocode = fake_geocode
+    async_http.transport = httpx.MockTransport(fake_async_upstream)
+    return client
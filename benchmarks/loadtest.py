@@ -0,0 +1,266 @@
+"""Load test gunicorn against fake upstreams and sweep worker / thread counts.
+
+    python -m benchmarks.loadtest --workers 1,2 --threads 1,4,8 --users 8,32 --duration 30
+
+For every workers x threads combination a gunicorn instance is started
+(gunicorn.conf.py, benchmarks.synthetic_asgi:app by default, --app asgi:app
+where the real graph is present; a wsgi app is served with gthread workers) with Supabase, OneMap, LTA and Google
+pointed at benchmarks.upstream_server. For every --users level, that many
+closed-loop clients call the --endpoints in turn for --duration seconds.
+Throughput, p50 / p95 / p99 latency and error rate are reported per
+endpoint, and --out writes them as JSON. Only 2xx answers count as
+served: anything else is an error, with a count per status code (or
+transport_error) in non_2xx.
+
+The clients are Python threads in this process, so for very high --users
+counts run several copies or check that this process is not the bottleneck.
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import requests
+
+from benchmarks import fakes
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_APP = "benchmarks.synthetic_asgi:app"
+DEFAULT_PORT = 5077
+DEFAULT_UPSTREAM_PORT = 8900
+READY_PATH = "/readyz"
+BOOT_TIMEOUT_SEC = 600
+REQUEST_TIMEOUT_SEC = 120
+
+ADDRESSES = [
+    "Raffles Place", "Yishun MRT", "Jurong East Interchange", "Tampines Hub", "Woodlands Checkpoint",
+    "Changi Airport", "Bishan Park", "Clementi Mall", "Punggol Waterway", "Orchard Road",
+    "Toa Payoh Central", "Bedok Reservoir", "Ang Mo Kio Hub", "Sengkang General Hospital",
+]
+
+
+def _flood_ids():
+    return pd.read_csv(ROOT_DIR / "flood_events_rows.csv", usecols=["flood_id"])["flood_id"].astype(int).tolist()
+
+
+def _car_route_path(rng, flood_ids):
+    start, end = rng.sample(ADDRESSES, 2)
+    return f"/onemap_car_route?start_address={quote(start)}&end_address={quote(end)}"
+
+
+def _bus_route_path(rng, flood_ids):
+    start, end = rng.sample(ADDRESSES, 2)
+    return f"/get_route?start_address={quote(start)}&end_address={quote(end)}"
+
+
+def _buses_affected_path(rng, flood_ids):
+    return f"/get_buses_affected_by_floods?flood_id={rng.choice(flood_ids)}"
+
+
+def _critical_segments_path(rng, flood_ids):
+    return f"/critical-segments?flood_id={rng.choice(flood_ids)}"
+
+
+ENDPOINTS = {
+    "onemap_car_route": _car_route_path,
+    "get_route": _bus_route_path,
+    "buses_affected": _buses_affected_path,
+    "critical_segments": _critical_segments_path,
+}
+DEFAULT_ENDPOINTS = "onemap_car_route,buses_affected"
+
+
+def start_upstream(port, latency_args):
+    command = [sys.executable, "-m", "benchmarks.upstream_server", "--port", str(port)]
+    for item in latency_args:
+        command += ["--latency", item]
+    process = subprocess.Popen(command, cwd=ROOT_DIR)
+    wait_until_ready(f"http://127.0.0.1:{port}/__stats", process, 60)
+    return process
+
+
+def start_gunicorn(app, workers, threads, port, upstream_url, extra_env):
+    env = dict(os.environ, **fakes.FAKE_ENV, **extra_env)
+    env.update({
+        "SUPABASE_URL": upstream_url,
+        "ONEMAP_API_BASE": upstream_url,
+        "LTA_API_BASE": upstream_url,
+        "GOOGLE_MAPS_BASE_URL": upstream_url,
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "WEB_CONCURRENCY": str(workers),
+        "GUNICORN_THREADS": str(threads),
+        "ASGI_THREADS": str(threads),
+    })
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", app],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    wait_until_ready(f"http://127.0.0.1:{port}{READY_PATH}", process, BOOT_TIMEOUT_SEC)
+    return process
+
+
+def stop(process):
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def wait_until_ready(url, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args[2:]} exited with {process.returncode} before becoming ready")
+        try:
+            if requests.get(url, timeout=5).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    stop(process)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def run_load(base_url, endpoints, users, duration, warmup, seed=0):
+    """Closed-loop load: users threads, each calling the endpoints in turn. Returns stats per endpoint."""
+    flood_ids = _flood_ids()
+    samples = {name: [] for name in endpoints}
+    errors = {name: 0 for name in endpoints}
+    statuses = {name: {} for name in endpoints}
+    completed = {name: 0 for name in endpoints}
+    lock = threading.Lock()
+    started = time.monotonic()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    def user(index):
+        rng = random.Random(seed * 10007 + index)
+        session = requests.Session()
+        i = index
+        while time.monotonic() < stop_at:
+            name = endpoints[i % len(endpoints)]
+            i += 1
+            path = ENDPOINTS[name](rng, flood_ids)
+            sent = time.monotonic()
+            try:
+                status = session.get(base_url + path, timeout=REQUEST_TIMEOUT_SEC).status_code
+            except requests.RequestException:
+                status = None
+            done = time.monotonic()
+            if sent >= measure_from:
+                # Latency counts every request sent in the window; throughput only 2xx answers finished in it.
+                ok = status is not None and 200 <= status < 300
+                with lock:
+                    samples[name].append((done - sent) * 1000)
+                    errors[name] += 0 if ok else 1
+                    if not ok:
+                        key = str(status) if status is not None else "transport_error"
+                        statuses[name][key] = statuses[name].get(key, 0) + 1
+                    completed[name] += 1 if ok and done <= stop_at else 0
+
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = {}
+    for name in endpoints:
+        latencies = np.array(samples[name])
+        count = len(latencies)
+        report[name] = {
+            "requests": count,
+            "throughput_rps": round(completed[name] / duration, 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 1) if count else None,
+            "p95_ms": round(float(np.percentile(latencies, 95)), 1) if count else None,
+            "p99_ms": round(float(np.percentile(latencies, 99)), 1) if count else None,
+            "error_rate": round(errors[name] / count, 4) if count else None,
+            "non_2xx": statuses[name],
+        }
+    return report
+
+
+def _ints(text):
+    return [int(x) for x in text.split(",") if x]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep gunicorn workers/threads under load with fake upstreams.")
+    parser.add_argument("--app", default=DEFAULT_APP, help="App for gunicorn (asgi or wsgi)")
+    parser.add_argument("--workers", default="1,2", help="Comma-separated worker counts")
+    parser.add_argument("--threads", default="1,4,8", help="Comma-separated threads per worker")
+    parser.add_argument("--users", default="8,32", help="Comma-separated concurrent client counts")
+    parser.add_argument("--endpoints", default=DEFAULT_ENDPOINTS, help=f"Any of: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds per users level")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before each level")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--upstream-url", default=None,
+                        help="Use an already running benchmarks.upstream_server instead of starting one")
+    parser.add_argument("--upstream-port", type=int, default=DEFAULT_UPSTREAM_PORT)
+    parser.add_argument("--latency", action="append", default=[], metavar="UPSTREAM=MEDIAN_MS[:SIGMA]",
+                        help="Passed to the upstream server")
+    parser.add_argument("--grid-step", default=None, help="BENCH_GRID_STEP for the synthetic app")
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    endpoints = args.endpoints.split(",")
+    unknown = [name for name in endpoints if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+    extra_env = {"BENCH_GRID_STEP": args.grid_step} if args.grid_step else {}
+
+    upstream = None
+    upstream_url = args.upstream_url
+    if upstream_url is None:
+        upstream = start_upstream(args.upstream_port, args.latency)
+        upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+
+    runs = []
+    try:
+        for workers in _ints(args.workers):
+            for threads in _ints(args.threads):
+                print(f"\n== {workers} worker(s) x {threads} thread(s)")
+                server = start_gunicorn(args.app, workers, threads, args.port, upstream_url, extra_env)
+                try:
+                    for users in _ints(args.users):
+                        report = run_load(f"http://127.0.0.1:{args.port}", endpoints, users,
+                                          args.duration, args.warmup)
+                        runs.append({"workers": workers, "threads": threads, "users": users, "endpoints": report})
+                        for name, r in report.items():
+                            print(f"users {users:>4}  {name:20} {r['throughput_rps']:>8.2f} rps  "
+                                  f"p50 {r['p50_ms']} ms  p95 {r['p95_ms']} ms  p99 {r['p99_ms']} ms  "
+                                  f"errors {r['error_rate']}"
+                                  + (f" {r['non_2xx']}" if r['non_2xx'] else ""))
+                finally:
+                    stop(server)
+    finally:
+        if upstream is not None:
+            stop(upstream)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "app": args.app,
+                "cpu_count": os.cpu_count(),
+                "duration_sec": args.duration,
+                "runs": runs,
+            }, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Endpoint micro-benchmarks through Flask's test client.
+
+    python -m benchmarks.run --out benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json --out /tmp/now.json
+
+Run from the repository root. The graph is a synthetic grid over
+Singapore (--grid-step), Supabase is an in-memory table set and OneMap,
+LTA and Google geocoding are canned responses that sleep for a per-upstream
+latency (--latency onemap_route=450 --latency supabase=40, --latency-scale 0
+for CPU time only). Each case runs once cold, then --repeat times warm;
+per-phase times come from the Server-Timing header.
+
+With --compare, cases whose warm p50 grew by more than --threshold
+(default 20%) are reported and the exit status is 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import fakes, synthetic
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_GRID_STEP = 0.004
+DEFAULT_REPEAT = 10
+DEFAULT_THRESHOLD = 0.2
+
+
+def tile_for(lon, lat, zoom):
+    n = 2 ** zoom
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return zoom, x, y
+
+
+def build_cases(tables, flood_ids):
+    """(name, method, path, json body) for every registered endpoint."""
+    flood = flood_ids[0]
+    segments = tables["bus_trip_segment"]
+    pairs = [{"start_stop": s["origin_stop_id"], "end_stop": s["destination_stop_id"]} for s in segments[:50]]
+    stops = tables["bus_stops"]
+    origins = [{"stop_code": s["stop_code"]} for s in stops[:20]]
+    destinations = [{"stop_code": s["stop_code"]} for s in stops[100:600]]
+    z, x, y = tile_for(103.85, 1.30, 15)
+    simulation = {"point": {"lat": 1.3521, "lon": 103.8198}, "radius_m": 100}
+
+    return [
+        ("bus_stops", "GET", "/bus_stops", None),
+        ("bus_stop_by_code", "GET", f"/bus_stops/{stops[0]['stop_code']}", None),
+        ("bus_trip_by_id", "GET", "/bus_trip/1", None),
+        ("bus_trip_segment_by_id", "GET", "/bus_trip_segment/1", None),
+        ("bus_end_area_codes", "GET", "/bus_trips/end_area_codes", None),
+        ("bus_delay_summary", "GET", "/bus_trips/delay_summary?start_area_code=AM", None),
+        ("segment_delay", "GET", "/bus_trip_segments/delay?start_stop=01013&end_stop=07531", None),
+        ("segment_delay_batch", "POST", "/bus_trip_segments/delay:batch", {"pairs": pairs}),
+        ("get_route", "GET", "/get_route?start_address=Raffles%20Place&end_address=Yishun%20MRT", None),
+        ("car_trips_by_id", "GET", "/car_trips/?car_trip_ids=1,2,3,4,5", None),
+        ("onemap_car_route", "GET", "/onemap_car_route?start_address=Raffles%20Place&end_address=Yishun%20MRT", None),
+        ("car_area_matrix", "GET", "/car_trips/area_matrix", None),
+        ("flood_travel_time", "GET",
+         "/car_route/flood_travel_time?start_lat=1.3000&start_lon=103.8500&end_lat=1.4300&end_lon=103.8350", None),
+        ("isochrone", "GET", f"/isochrone?lat=1.3521&lon=103.8198&minutes=10&flood_id={flood}", None),
+        ("travel_time_matrix", "POST", "/car_route/travel_time_matrix",
+         {"origins": origins, "destinations": destinations, "flood_ids": flood_ids[:5]}),
+        ("flood_events", "GET", "/flood_events", None),
+        ("flood_events_by_id", "GET", f"/flood_events/id/?flood_event_ids={','.join(map(str, flood_ids[:10]))}", None),
+        ("flood_events_by_location", "GET", "/flood_events/location", None),
+        ("flood_events_by_date_range", "GET",
+         "/get_flood_events_by_date_range?start_date=2014-01-01&end_date=2020-12-31", None),
+        ("unique_flood_events_by_location", "GET", "/unique-flood-events/location", None),
+        ("buses_affected_by_floods", "GET", f"/get_buses_affected_by_floods?flood_id={flood}", None),
+        ("critical_segments", "GET", f"/critical-segments?flood_id={flood}", None),
+        ("critical_segments_flooded", "GET",
+         f"/critical-segments/flooded?flood_ids={','.join(map(str, flood_ids[:3]))}", None),
+        ("flood_impact", "GET", f"/flood_events/impact?flood_id={flood}&buffer_m=200", None),
+        ("simulation_create", "POST", "/simulations", simulation),
+        ("tile", "GET", f"/tiles/{z}/{x}/{y}.mvt", None),
+        ("road_max_traffic_flow", "GET", "/road_max_traffic_flow", None),
+        ("road_max_traffic_flow_by_id", "GET", "/road_max_traffic_flow/id/?road_ids=1,2,3", None),
+        ("traffic_summary", "GET", "/traffic/summary?mode=car&scenario=baseline", None),
+    ]
+
+
+def parse_server_timing(header):
+    phases = {}
+    for entry in (header or "").split(","):
+        name, _, rest = entry.strip().partition(";")
+        for part in rest.split(";"):
+            if part.startswith("dur="):
+                phases[name] = float(part[4:])
+    return phases
+
+
+def run_case(client, method, path, body, repeat, verbose=False):
+    def call():
+        # Controllers print per-request progress; keep it out of the report unless asked.
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            elapsed = (time.perf_counter() - started) * 1000
+        return response, elapsed
+
+    response, first_ms = call()
+    samples, phases = [], {}
+    for _ in range(repeat):
+        response, elapsed = call()
+        samples.append(elapsed)
+        for name, ms in parse_server_timing(response.headers.get("Server-Timing")).items():
+            phases.setdefault(name, []).append(ms)
+
+    return {
+        "status": response.status_code,
+        "bytes": len(response.get_data()),
+        "first_ms": round(first_ms, 2),
+        "mean_ms": round(statistics.fmean(samples), 2),
+        "p50_ms": round(float(np.percentile(samples, 50)), 2),
+        "p95_ms": round(float(np.percentile(samples, 95)), 2),
+        "min_ms": round(min(samples), 2),
+        "max_ms": round(max(samples), 2),
+        "phases_ms": {name: round(statistics.fmean(values), 2) for name, values in phases.items() if name != "total"},
+    }
+
+
+def boot(grid_step, latency, workdir):
+    """Install the fakes and build the app: (app, tables, flood ids, boot seconds, network size)."""
+    os.environ.update(fakes.FAKE_ENV)
+    os.chdir(ROOT_DIR)
+
+    tables = synthetic.load_tables()
+    fakes.install(tables, latency)
+    G = synthetic.install_network(grid_step, workdir)
+
+    from app import create_app
+    from src.controllers.flood_events_controller import get_flood_points_3414
+    started = time.perf_counter()
+    app = create_app(preload=True)
+    boot_seconds = time.perf_counter() - started
+
+    flood_ids = [int(f) for f in get_flood_points_3414().index]
+    return app, tables, flood_ids, boot_seconds, {"nodes": G.number_of_nodes(), "edges": G.number_of_edges()}
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print(f"\n{'case':34} {'base p50':>10} {'now p50':>10} {'change':>8}")
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:34} {'-':>10} {now['p50_ms']:>10.1f}")
+            continue
+        change = (now["p50_ms"] - before["p50_ms"]) / before["p50_ms"] if before["p50_ms"] else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:34} {before['p50_ms']:>10.1f} {now['p50_ms']:>10.1f} {change:>+8.0%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every endpoint against local fakes.")
+    parser.add_argument("--grid-step", type=float, default=DEFAULT_GRID_STEP,
+                        help="Synthetic grid spacing in degrees (smaller is a bigger graph)")
+    parser.add_argument("--latency", action="append", default=[], metavar="UPSTREAM=MS",
+                        help=f"Override a mean upstream latency; upstreams: {', '.join(fakes.DEFAULT_LATENCY_MS)}")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiply every latency (0 disables)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Warm runs per case")
+    parser.add_argument("--only", default=None, help="Comma-separated case names to run")
+    parser.add_argument("--verbose", action="store_true", help="Show controller output")
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative p50 growth counted as a regression")
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.latency:
+        name, _, ms = item.partition("=")
+        if name not in fakes.DEFAULT_LATENCY_MS:
+            parser.error(f"unknown upstream {name!r}")
+        overrides[name] = float(ms)
+    latency = fakes.Latency(overrides, scale=args.latency_scale)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        app, tables, flood_ids, boot_seconds, network = boot(args.grid_step, latency, workdir)
+        from src.utils.boot_profile import boot_profile
+        boot_phases = boot_profile.report()["phases"]
+        client = app.test_client()
+
+        cases = build_cases(tables, flood_ids)
+        if args.only:
+            wanted = set(args.only.split(","))
+            cases = [case for case in cases if case[0] in wanted]
+
+        results = {}
+        for name, method, path, body in cases:
+            results[name] = run_case(client, method, path, body, args.repeat, args.verbose)
+            r = results[name]
+            print(f"{name:34} {r['status']:>4} first {r['first_ms']:>9.1f} ms  "
+                  f"p50 {r['p50_ms']:>9.1f} ms  p95 {r['p95_ms']:>9.1f} ms")
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "grid_step": args.grid_step,
+            "network": network,
+            "latency_ms": latency.mean_ms,
+            "latency_scale": args.latency_scale,
+            "repeat": args.repeat,
+        },
+        "boot_seconds": round(boot_seconds, 2),
+        "boot_phases": boot_phases,
+        "upstream_calls": latency.calls,
+        "results": results,
+    }
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Synthetic road network and Supabase tables for the benchmarks.
+
+The network is a jittered grid over Singapore, so the real flood events in
+flood_events_rows.csv and the real stops in stops.txt all snap to it. The
+grid step sets the size: 0.004 degrees is about 6,000 nodes and 25,000
+edges, 0.002 about four times that.
+"""
+import os
+import random
+import time
+from pathlib import Path
+import numpy as np
+import networkx as nx
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+SG_BOUNDS = (103.60, 1.23, 104.02, 1.47)
+HIGHWAYS = ["motorway", "primary", "secondary", "tertiary", "residential", "residential", ["tertiary", "residential"]]
+SPEEDS_BY_HIGHWAY = {"motorway": 90.0, "primary": 60.0, "secondary": 50.0, "tertiary": 40.0, "residential": 30.0}
+AREA_CODES = ["AM", "BD", "BK", "BM", "BS", "CL", "DT", "HG", "JE", "JW", "KL", "QT", "TP", "TS", "WD", "YS"]
+
+
+def make_network(step=0.004, seed=0):
+    """Grid MultiDiGraph in EPSG:4326 with osmnx-style node and edge attributes."""
+    rng = random.Random(seed)
+    west, south, east, north = SG_BOUNDS
+    cols = int((east - west) / step) + 1
+    rows = int((north - south) / step) + 1
+    G = nx.MultiDiGraph(crs="EPSG:4326")
+
+    def node_id(i, j):
+        return 100000000 + i * 10000 + j
+
+    for i in range(cols):
+        for j in range(rows):
+            G.add_node(node_id(i, j),
+                       x=west + i * step + rng.uniform(-0.2, 0.2) * step,
+                       y=south + j * step + rng.uniform(-0.2, 0.2) * step)
+
+    for i in range(cols):
+        for j in range(rows):
+            for a, b in ((i + 1, j), (i, j + 1)):
+                if a >= cols or b >= rows:
+                    continue
+                u, v = node_id(i, j), node_id(a, b)
+                dx = (G.nodes[u]["x"] - G.nodes[v]["x"]) * 111320 * np.cos(np.radians(1.35))
+                dy = (G.nodes[u]["y"] - G.nodes[v]["y"]) * 110574
+                highway = rng.choice(HIGHWAYS)
+                first = highway[0] if isinstance(highway, list) else highway
+                attrs = {"length": float(np.hypot(dx, dy)), "highway": highway,
+                         "name": f"Road {rng.randrange(2000)}", "speed_kph": SPEEDS_BY_HIGHWAY[first],
+                         "oneway": False, "reversed": False}
+                G.add_edge(u, v, key=0, **attrs)
+                G.add_edge(v, u, key=0, **attrs)
+    return G
+
+
+def make_tables(stops_df, flood_events_df, n_segments=5000, n_bus_trips=5000, n_car_trips=5000, seed=0):
+    """Rows for every Supabase table the controllers read, keyed by table name."""
+    rng = np.random.default_rng(seed)
+    codes = stops_df["stop_code"].astype(str).str.zfill(5).to_numpy()
+    lats = stops_df["stop_lat"].to_numpy(dtype=float)
+    lons = stops_df["stop_lon"].to_numpy(dtype=float)
+
+    origin = rng.integers(len(codes), size=n_segments)
+    destination = (origin + rng.integers(1, 4, size=n_segments)) % len(codes)
+    dry = rng.uniform(60, 600, size=n_segments).round(1)
+    segments = [{
+        "bus_trip_segment_id": i + 1,
+        "bus_trip_id": i // 5 + 1,
+        "route_id": str(rng.integers(2, 300)),
+        "origin_stop_id": codes[o],
+        "destination_stop_id": codes[d],
+        "non_flooded_bus_duration": float(base),
+        "5kmh_flooded_bus_duration": float(base * 2.5),
+        "10kmh_flooded_bus_duration": float(base * 1.8),
+        "20kmh_flooded_bus_duration": float(base * 1.3),
+    } for i, (o, d, base) in enumerate(zip(origin, destination, dry))]
+    # Make sure the stop pairs in test.json have a segment, so /get_route annotates its legs.
+    for i, (o, d) in enumerate((("01013", "07531"), ("07531", "42041"))):
+        segments.append(dict(segments[i], bus_trip_segment_id=n_segments + i + 1, origin_stop_id=o, destination_stop_id=d))
+
+    bus_dry = rng.uniform(600, 5400, size=n_bus_trips).round(1)
+    bus_trips = [{
+        "bus_trip_id": i + 1,
+        "start_area_code": rng.choice(AREA_CODES),
+        "end_area_code": rng.choice(AREA_CODES),
+        "non_flooded_total_duration": float(base),
+        "5kmh_total_duration": float(base * 1.6),
+        "12kmh_total_duration": float(base * 1.3),
+        "30kmh_total_duration": float(base * 1.1),
+        "48kmh_total_duration": float(base * 1.02),
+    } for i, base in enumerate(bus_dry)]
+
+    start = rng.integers(len(codes), size=n_car_trips)
+    end = rng.integers(len(codes), size=n_car_trips)
+    car_dry = rng.uniform(300, 3600, size=n_car_trips).round(1)
+    car_trips = [{
+        "car_trip_id": i + 1,
+        "start_lat": float(lats[s]), "start_lon": float(lons[s]),
+        "end_lat": float(lats[e]), "end_lon": float(lons[e]),
+        "start_area_code": rng.choice(AREA_CODES),
+        "end_area_code": rng.choice(AREA_CODES),
+        "90kph_total_duration": float(base),
+        **{f"{kph}kph_total_duration": float(base * (90 / kph) ** 0.5) for kph in (81, 72, 45, 20, 10, 5)},
+    } for i, (s, e, base) in enumerate(zip(start, end, car_dry))]
+
+    bus_stops = stops_df.assign(stop_code=codes)[["stop_code", "stop_name", "stop_lat", "stop_lon"]].to_dict("records")
+    flood_events = flood_events_df.where(pd.notna(flood_events_df), None).to_dict("records")
+    road_flow = [{"road_id": i + 1, "road_name": f"Road {i}", "max_traffic_flow": int(rng.integers(200, 4000))}
+                 for i in range(500)]
+
+    return {
+        "bus_stops": bus_stops,
+        "bus_trip_segment": segments,
+        "bus_trip": bus_trips,
+        "car_trips": car_trips,
+        "flood_events": flood_events,
+        "road_max_traffic_flow": road_flow,
+        "onemap_token": [{"id": 1, "access_token": "benchmark-token",
+                          "expiry_timestamp": "2099-01-01T00:00:00+00:00"}],
+    }
+
+
+def load_tables(**sizes):
+    """make_tables() over the repository's stops.txt and flood_events_rows.csv."""
+    stops_df = pd.read_csv(ROOT_DIR / "stops.txt", dtype={"stop_code": str})
+    flood_events_df = pd.read_csv(ROOT_DIR / "flood_events_rows.csv")
+    return make_tables(stops_df, flood_events_df, **sizes)
+
+
+def install_network(step, workdir):
+    """Serve a synthetic network in place of SG_bus_network.graphml.
+
+    Must run before anything under src is imported, and after the Supabase
+    client is reachable (fakes.install() or SUPABASE_URL pointing at the
+    fake upstream server): it imports the flood events controller, then
+    points it at a centrality file for the synthetic edges, since the
+    shipped snapshot belongs to the real graph. Returns the graph.
+    """
+    import osmnx as ox
+
+    started = time.perf_counter()
+    G = make_network(step)
+    print(f"Synthetic network: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges "
+          f"({time.perf_counter() - started:.1f}s)")
+    ox.load_graphml = lambda *args, **kwargs: G
+    os.environ["BUS_ROUTE_INDEX_PATH"] = str(Path(workdir) / "bus_route_index.csv.gz")
+
+    import src.controllers.flood_events_controller as flood_events_controller
+    from src.utils.graph_arrays import GraphArrays
+    from src.utils.centrality_store import write_centrality
+
+    graph_arrays = GraphArrays.from_graph(G)
+    centrality_base = Path(workdir) / "centrality"
+    values = np.random.default_rng(0).random(graph_arrays.n_edges) * 0.01
+    write_centrality(centrality_base, values, graph_arrays.edge_ids)
+    flood_events_controller.CENTRALITY_BASE = centrality_base
+    flood_events_controller.CENTRALITY_PICKLE = Path(workdir) / "missing.pkl"
+    return G
@@ -0,0 +1,15 @@
+"""wsgi:app on the synthetic network, for load tests where SG_bus_network.graphml is not available.
+
+    gunicorn -c gunicorn.conf.py benchmarks.synthetic_wsgi:app
+
+BENCH_GRID_STEP sets the network size (see benchmarks.synthetic). Upstream
+URLs come from the environment as usual, normally the fake upstream server.
+"""
+import os
+import tempfile
+
+from benchmarks import synthetic
+
+synthetic.install_network(float(os.getenv("BENCH_GRID_STEP", 0.004)), tempfile.mkdtemp(prefix="synthetic-network-"))
+
+from wsgi import app  # noqa: E402
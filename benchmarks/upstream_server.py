@@ -0,0 +1,205 @@
+"""Fake upstream HTTP server: OneMap, LTA DataMall, Google geocoding and Supabase REST.
+
+    python -m benchmarks.upstream_server --port 8900
+
+Point the app at it with
+
+    SUPABASE_URL=http://127.0.0.1:8900 ONEMAP_API_BASE=http://127.0.0.1:8900
+    LTA_API_BASE=http://127.0.0.1:8900 GOOGLE_MAPS_BASE_URL=http://127.0.0.1:8900
+
+Responses are the same canned payloads and synthetic tables the in-process
+benchmarks use. Each request sleeps for a log-normal latency per upstream;
+OneMap routing is centred on the server time (debugOutput.totalTime) of the
+sample responses in --onemap-samples, test.json and test1.json by default.
+GET /__stats returns the request count per upstream.
+"""
+import argparse
+import json
+import math
+import random
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+from benchmarks import fakes, synthetic
+
+DEFAULT_PORT = 8900
+DEFAULT_SIGMA = 0.35
+
+
+class LognormalLatency:
+    """Per-upstream sleep drawn from a log-normal with the given median (ms) and sigma."""
+
+    def __init__(self, median_ms, sigma=None, scale=1.0, seed=None):
+        self.median_ms = dict(median_ms)
+        self.sigma = {name: DEFAULT_SIGMA for name in self.median_ms}
+        self.sigma.update(sigma or {})
+        self.scale = scale
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {name: 0 for name in self.median_ms}
+
+    @classmethod
+    def from_samples(cls, onemap_samples, overrides=None, scale=1.0):
+        """Medians from fakes.DEFAULT_LATENCY_MS, with OneMap routing taken from sample responses."""
+        median_ms = dict(fakes.DEFAULT_LATENCY_MS)
+        sigma = {}
+        totals = []
+        for path in onemap_samples:
+            with open(path) as f:
+                totals.append(json.load(f)["debugOutput"]["totalTime"] / 1e6)
+        if totals:
+            median_ms["onemap_route"] = statistics.median(totals)
+            if len(totals) > 2:
+                sigma["onemap_route"] = max(statistics.stdev(math.log(t) for t in totals), DEFAULT_SIGMA)
+        for name, (median, spread) in (overrides or {}).items():
+            median_ms[name] = median
+            if spread is not None:
+                sigma[name] = spread
+        return cls(median_ms, sigma, scale)
+
+    def wait(self, upstream):
+        with self._lock:
+            self.calls[upstream] = self.calls.get(upstream, 0) + 1
+            ms = self.median_ms.get(upstream, 0) * math.exp(self._rng.gauss(0, self.sigma.get(upstream, 0)))
+        if ms * self.scale > 0:
+            time.sleep(ms * self.scale / 1000)
+
+
+def _number_or_text(text):
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def postgrest_query(client, table, params):
+    """Apply PostgREST query parameters to a fakes.FakeQuery."""
+    query = client.table(table).select(params.pop("select", "*"))
+    limit, offset = params.pop("limit", None), params.pop("offset", None)
+    if "order" in params:
+        column, _, direction = params.pop("order").partition(".")
+        query.order(column, desc=direction == "desc")
+    if "or" in params:
+        query.or_(params.pop("or"))
+    for column, expression in params.items():
+        op, _, value = expression.partition(".")
+        if op == "eq":
+            query.eq(column, value)
+        elif op == "in":
+            query.in_(column, [v.strip('"') for v in value.strip("()").split(",")])
+        elif op == "gte":
+            query.gte(column, _number_or_text(value))
+        elif op == "lte":
+            query.lte(column, _number_or_text(value))
+    if limit is not None:
+        start = int(offset or 0)
+        query.range(start, start + int(limit) - 1)
+    return query
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    supabase = None
+    latency = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null") if length else None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query))
+        if url.path == "/api/public/routingsvc/route":
+            self.latency.wait("onemap_route")
+            return self._send(fakes.onemap_route_payload(params))
+        if url.path == "/ltaodataservice/v3/BusArrival":
+            self.latency.wait("lta")
+            return self._send(fakes.lta_bus_arrival_payload(params.get("BusStopCode")))
+        if url.path == "/maps/api/geocode/json":
+            self.latency.wait("google")
+            return self._send({"status": "OK", "results": fakes.geocode_payload(params.get("address", ""))})
+        if url.path.startswith("/rest/v1/"):
+            table = url.path[len("/rest/v1/"):]
+            return self._send(postgrest_query(self.supabase, table, params).execute().data)
+        if url.path == "/__stats":
+            return self._send(self.latency.calls)
+        self._send({"error": f"no fake for {url.path}"}, 404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        self._body()
+        if url.path == "/api/auth/post/getToken":
+            self.latency.wait("onemap_token")
+            return self._send(fakes.onemap_token_payload())
+        self._send({"error": f"no fake for {url.path}"}, 404)
+
+    def do_PATCH(self):
+        url = urlparse(self.path)
+        values = self._body() or {}
+        if url.path.startswith("/rest/v1/"):
+            table = url.path[len("/rest/v1/"):]
+            query = postgrest_query(self.supabase, table, dict(parse_qsl(url.query)))
+            return self._send(query.update(values).execute().data)
+        self._send({"error": f"no fake for {url.path}"}, 404)
+
+
+def serve(port, latency, host="127.0.0.1"):
+    """Start the server on a daemon thread and return it (call .shutdown() to stop)."""
+    handler = type("Handler", (UpstreamHandler,), {
+        "supabase": fakes.FakeSupabase(synthetic.load_tables(), latency),
+        "latency": latency,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_latency_overrides(items):
+    """["onemap_route=450", "lta=120:0.5"] -> {name: (median_ms, sigma or None)}."""
+    overrides = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        median, _, sigma = value.partition(":")
+        overrides[name] = (float(median), float(sigma) if sigma else None)
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OneMap / LTA / Google / Supabase REST server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--onemap-samples", nargs="*", default=[str(p) for p in fakes.ONEMAP_SAMPLES],
+                        help="OneMap responses whose debugOutput.totalTime sets the routing latency")
+    parser.add_argument("--latency", action="append", default=[], metavar="UPSTREAM=MEDIAN_MS[:SIGMA]")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    latency = LognormalLatency.from_samples(args.onemap_samples, parse_latency_overrides(args.latency),
+                                            args.latency_scale)
+    server = serve(args.port, latency, args.host)
+    print(f"Fake upstreams on http://{args.host}:{args.port}, median latency (ms): "
+          + ", ".join(f"{k}={v:.0f}" for k, v in latency.median_ms.items()))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
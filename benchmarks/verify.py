@@ -0,0 +1,197 @@
+"""Check the in-process graph engines against reference computations.
+
+    python -m benchmarks.verify
+    python -m benchmarks.verify --grid-step 0.003 --pairs 500
+
+Run from the repository root. Uses the synthetic grid from
+benchmarks.synthetic with some edges made one-way and some parallel edges
+added, so direction and multi-edges are exercised. Checks:
+
+    routing   RoutingEngine.shortest_path (ALT A*) and travel_time_matrix,
+              dry and flooded, against scipy.sparse.csgraph.dijkstra
+    centrality CentralityEngine.flooded (incremental, reusing unaffected
+              trees) against a full edge_closeness recompute from the same
+              sources, and unweighted edge_closeness against networkx
+              closeness_centrality on the line graph of a small grid
+
+Prints one line per check and exits with status 1 if any fails.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from benchmarks import synthetic
+
+DEFAULT_GRID_STEP = 0.006
+DEFAULT_PAIRS = 300
+DEFAULT_FLOODED_EDGES = 60
+FLOOD_SPEEDS_KPH = (5, 20)
+RTOL = 1e-6
+# Centrality distances are float32, and the incremental path adds and
+# subtracts per-source totals in a different order than a full recompute.
+CENTRALITY_RTOL = 1e-4
+LINE_GRAPH_STEP = 0.05
+CENTRALITY_SAMPLES = 64
+# Every tree spans the whole graph, so only a few flooded edges leave some sources untouched.
+CENTRALITY_FLOODED_EDGES = 3
+# GraphArrays.to_csr nudges zero weights up to this, so allow it per edge.
+ATOL_SEC = 1e-6
+
+
+def make_graph(step, seed=0):
+    """Synthetic grid with ~10% of the streets one-way and a few parallel edges."""
+    G = synthetic.make_network(step, seed)
+    rng = np.random.default_rng(seed)
+    streets = [(u, v) for u, v in G.edges() if u < v]
+    for idx in rng.choice(len(streets), size=len(streets) // 10, replace=False):
+        u, v = streets[idx]
+        G.remove_edge(*((v, u) if rng.random() < 0.5 else (u, v)))
+    for idx in rng.choice(len(streets), size=len(streets) // 50, replace=False):
+        u, v = streets[idx]
+        if G.has_edge(u, v):
+            attrs = dict(G.get_edge_data(u, v, 0), speed_kph=float(rng.choice([20.0, 90.0])))
+            G.add_edge(u, v, key=1, **attrs)
+    return G
+
+
+def flooded_edge_sample(graph_arrays, engine, rng, size):
+    """Flooded edges, half of them on dry shortest paths so reroutes actually happen."""
+    on_paths = []
+    while len(on_paths) < size // 2:
+        source, target = (int(n) for n in rng.integers(graph_arrays.n_nodes, size=2))
+        _, path = engine.shortest_path(source, target)
+        on_paths.extend(path[len(path) // 2:len(path) // 2 + 2])
+    random_edges = rng.choice(graph_arrays.n_edges, size=size - len(on_paths), replace=False)
+    return np.unique(np.concatenate([on_paths, random_edges]).astype(np.int64))
+
+
+def check_routing(graph_arrays, flooded, n_pairs, rng):
+    from src.utils.routing_engine import RoutingEngine
+
+    engine = RoutingEngine(graph_arrays)
+    failures = []
+    scenarios = {"dry": None}
+    scenarios.update({f"{kph}kph": graph_arrays.flood_speed_overrides(flooded, kph) for kph in FLOOD_SPEEDS_KPH})
+
+    sources = rng.integers(graph_arrays.n_nodes, size=n_pairs)
+    targets = rng.integers(graph_arrays.n_nodes, size=n_pairs)
+    for name, overrides in scenarios.items():
+        weights = graph_arrays.travel_time(overrides)
+        reference = dijkstra(graph_arrays.to_csr(weights), indices=np.unique(sources))
+        row = {int(s): i for i, s in enumerate(np.unique(sources))}
+        unreachable = 0
+        for source, target in zip(sources.tolist(), targets.tolist()):
+            expected = reference[row[source], target]
+            seconds, path = engine.shortest_path(source, target, overrides)
+            if not np.isfinite(expected):
+                unreachable += 1
+                if seconds is not None:
+                    failures.append(f"{name} {source}->{target}: engine found {seconds:.3f}s, reference unreachable")
+                continue
+            if seconds is None or not np.isclose(seconds, expected, rtol=RTOL, atol=ATOL_SEC * len(path)):
+                failures.append(f"{name} {source}->{target}: engine {seconds}, reference {expected:.6f}")
+                continue
+            path_sec = float(weights[path].sum()) if path else 0.0
+            walk_ok = all(graph_arrays.edge_dst[a] == graph_arrays.edge_src[b] for a, b in zip(path, path[1:]))
+            ends_ok = not path or (graph_arrays.edge_src[path[0]] == source and graph_arrays.edge_dst[path[-1]] == target)
+            if not (walk_ok and ends_ok and np.isclose(path_sec, seconds, rtol=RTOL, atol=ATOL_SEC * len(path))):
+                failures.append(f"{name} {source}->{target}: returned path is not a {seconds:.3f}s walk")
+        print(f"  shortest_path {name:6} {n_pairs} pairs, {unreachable} unreachable")
+
+    origins = rng.integers(graph_arrays.n_nodes, size=20)
+    dests = rng.integers(graph_arrays.n_nodes, size=40)
+    speeds = FLOOD_SPEEDS_KPH
+    dry, flooded_matrices, recomputed = engine.travel_time_matrix(origins, dests, flooded, speeds)
+    expected = {"dry": dry}
+    expected.update(flooded_matrices)
+    for name, overrides in scenarios.items():
+        weights = graph_arrays.travel_time(overrides)
+        reference = dijkstra(graph_arrays.to_csr(weights), indices=origins)[:, dests]
+        if not np.allclose(expected[name], reference, rtol=RTOL, equal_nan=True):
+            failures.append(f"travel_time_matrix {name}: max abs error "
+                            f"{np.nanmax(np.abs(np.where(np.isfinite(reference), expected[name] - reference, 0))):.6f}")
+    print(f"  travel_time_matrix {len(origins)}x{len(dests)}, {recomputed} origins recomputed")
+    return engine, failures
+
+
+def check_centrality(graph_arrays, rng):
+    import networkx as nx
+    from src.utils.centrality import CentralityEngine, edge_closeness
+    from src.utils.graph_arrays import GraphArrays
+
+    failures = []
+    flooded = np.sort(rng.choice(graph_arrays.n_edges, size=CENTRALITY_FLOODED_EDGES, replace=False))
+    engine = CentralityEngine(graph_arrays, n_samples=CENTRALITY_SAMPLES, workers=1)
+    full_dry = edge_closeness(graph_arrays, engine.dry_weights, engine.sources, workers=1)
+    if not np.allclose(engine.dry_closeness, full_dry, rtol=CENTRALITY_RTOL, atol=0):
+        failures.append(f"dry: max relative error {_max_rel_error(engine.dry_closeness, full_dry):.2e}")
+
+    for kph in FLOOD_SPEEDS_KPH:
+        incremental, stats = engine.flooded(flooded, kph)
+        weights = graph_arrays.travel_time(graph_arrays.flood_speed_overrides(flooded, kph))
+        full = edge_closeness(graph_arrays, weights, engine.sources, workers=1)
+        if not stats["recomputed_sources"] or not stats["reused_sources"]:
+            failures.append(f"{kph}kph: flooded edge set exercises only one path ({stats})")
+        if not np.allclose(incremental, full, rtol=CENTRALITY_RTOL, atol=0):
+            failures.append(f"{kph}kph: max relative error {_max_rel_error(incremental, full):.2e}")
+        print(f"  flooded {kph}kph {stats['recomputed_sources']} sources recomputed, "
+              f"{stats['reused_sources']} reused")
+
+    # The line-graph reduction itself, exact on a graph small enough for networkx.
+    G_small = make_graph(LINE_GRAPH_STEP)
+    small = GraphArrays.from_graph(G_small)
+    sources = np.flatnonzero(np.bincount(small.edge_dst, minlength=small.n_nodes))
+    ours = edge_closeness(small, None, sources, unweighted=True, workers=1)
+    reference = nx.closeness_centrality(nx.line_graph(G_small))
+    reference = np.array([reference[tuple(int(x) for x in edge)] for edge in small.edge_ids])
+    if not np.allclose(ours, reference, rtol=1e-9, atol=0):
+        failures.append(f"line graph: max relative error {_max_rel_error(ours, reference):.2e}")
+    print(f"  line graph closeness on {small.n_edges} edges")
+    return failures
+
+
+def _max_rel_error(values, reference):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return float(np.nanmax(np.abs(values - reference) / np.abs(reference)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the graph engines against reference computations.")
+    parser.add_argument("--grid-step", type=float, default=DEFAULT_GRID_STEP,
+                        help="Synthetic grid spacing in degrees (smaller is a bigger graph)")
+    parser.add_argument("--pairs", type=int, default=DEFAULT_PAIRS, help="Random routing queries per scenario")
+    parser.add_argument("--flooded-edges", type=int, default=DEFAULT_FLOODED_EDGES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from src.utils.graph_arrays import GraphArrays
+
+    rng = np.random.default_rng(args.seed)
+    G = make_graph(args.grid_step, args.seed)
+    graph_arrays = GraphArrays.from_graph(G)
+    print(f"Synthetic network: {graph_arrays.n_nodes} nodes, {graph_arrays.n_edges} edges")
+
+    results = {}
+    started = time.perf_counter()
+    from src.utils.routing_engine import RoutingEngine
+    flooded = flooded_edge_sample(graph_arrays, RoutingEngine(graph_arrays, n_landmarks=0), rng, args.flooded_edges)
+    _, results["routing"] = check_routing(graph_arrays, flooded, args.pairs, rng)
+    print(f"routing: {'ok' if not results['routing'] else 'FAILED'} ({time.perf_counter() - started:.1f}s)")
+
+    started = time.perf_counter()
+    results["centrality"] = check_centrality(graph_arrays, rng)
+    print(f"centrality: {'ok' if not results['centrality'] else 'FAILED'} ({time.perf_counter() - started:.1f}s)")
+
+    failed = False
+    for name, failures in results.items():
+        for failure in failures[:20]:
+            print(f"  {name}: {failure}")
+        failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# gunicorn -c gunicorn.conf.py wsgi:app    (gthread workers)
+# gunicorn -c gunicorn.conf.py asgi:app    (uvicorn workers)
+#
+# The worker class follows the app: an *asgi module gets uvicorn workers,
+# where the async views of all a worker's requests share one event loop and
+# one httpx.AsyncClient and ASGI_THREADS (default 100) bounds its concurrent
+# requests (see asgi.py); anything else gets gthread workers with
+# GUNICORN_THREADS (default 8) threads. GUNICORN_WORKER_CLASS overrides it.
+#
+# Identical concurrent requests (critical segments, buses affected) are
+# coalesced among the requests one worker has in flight, never across
+# workers, so a worker must take more than one request at a time for it to
+# help: keep ASGI_THREADS / GUNICORN_THREADS above 1.
+#
+# Preload mode (default): the master imports the app, builds the graph, stops
+# and flood structures once and freezes them from the GC, then forks. Set
+# PRELOAD_NETWORK_DATA=0 to go back to every worker loading its own copy.
+# Per-worker unique memory is logged at startup and can be checked later with
+# `python -m src.utils.memory <master pid>`.
+import gc
+import os
+import sys
+
+from src.utils.memory import memory_usage, format_memory
+
+os.environ.setdefault("PRELOAD_NETWORK_DATA", "1")
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+_asgi_app = any(arg.split(":")[0].endswith("asgi") for arg in sys.argv[1:] if ":" in arg)
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "uvicorn_worker.UvicornWorker" if _asgi_app else "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+preload_app = os.environ["PRELOAD_NETWORK_DATA"] == "1"
+
+
+def when_ready(server):
+    server.log.info("Master ready: %s", format_memory(memory_usage()))
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        # Anything allocated in the master since preload_network_data().
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app import start_background_jobs
+        start_background_jobs()
+
+
+def post_worker_init(worker):
+    worker.log.info("Worker %s ready: %s", worker.pid, format_memory(memory_usage()))
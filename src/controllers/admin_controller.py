@@ -0,0 +1,63 @@
+from flask import jsonify, request
+import hmac
+import os
+from src.utils.boot_profile import boot_profile
+from src.utils.onemap_auth import token_status
+import src.controllers.flood_events_controller as flood_events_controller
+import src.controllers.car_trips_controller as car_trips_controller
+
+_background_jobs_pid = None
+
+
+def mark_background_jobs_started():
+    """Called by app.start_background_jobs() in the process that will serve requests."""
+    global _background_jobs_pid
+    _background_jobs_pid = os.getpid()
+
+
+def _admin_enabled():
+    """Admin endpoints exist only when ADMIN_TOKEN is set."""
+    return bool(os.getenv("ADMIN_TOKEN"))
+
+
+def _authorized():
+    """True for 'Authorization: Bearer <ADMIN_TOKEN>'; never when ADMIN_TOKEN is unset."""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        return False
+    supplied = request.headers.get("Authorization", "")
+    return hmac.compare_digest(supplied.removeprefix("Bearer ").strip(), expected)
+
+
+def get_boot_profile():
+    if not _admin_enabled():
+        return jsonify({"error": "Not found"}), 404
+    if not _authorized():
+        return jsonify({"error": "Missing or invalid admin token"}), 401
+    return jsonify(boot_profile.report()), 200
+
+
+def _pending():
+    """What this process still needs before it can serve; preload builds the structures before the fork."""
+    pending = []
+    if _background_jobs_pid != os.getpid():
+        pending.append("background_jobs")
+    if flood_events_controller._graph_arrays is None:
+        pending.append("graph_arrays")
+    if car_trips_controller._routing_engine is None:
+        pending.append("routing_engine")
+    return pending
+
+
+def get_readiness():
+    """Ready once background jobs run here and the graph and routing engine are built; the
+    OneMap token is reported but not required, so an upstream outage does not take every
+    worker out of rotation."""
+    pending = _pending()
+    return jsonify({
+        "ready": not pending,
+        "pending": pending,
+        "boot_seconds": boot_profile.report()["total_seconds"],
+        "network_data": "preloaded" if os.getenv("PRELOAD_NETWORK_DATA") == "1" else "on demand",
+        "onemap_token": token_status(),
+    }), 200 if not pending else 503
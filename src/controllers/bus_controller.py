@@ -1,18 +1,37 @@
 from src.database import supabase
 from flask import jsonify, request, Blueprint
 import os
-import requests
-import json
-import googlemaps
+import asyncio
+import httpx
 from datetime import datetime
 from dotenv import load_dotenv
-from src.utils.onemap_auth import get_valid_token
+from src.utils.onemap_auth import get_valid_token, onemap_get
+from src.utils.supabase_frames import fetch_table_frame
+from src.utils.instrumentation import span, request_spans
+from src.utils.async_http import async_client, geocode
+from src.utils.resilience import onemap_routing, CircuitOpenError
+from functools import lru_cache, partial
+import threading
+import time
+import numpy as np
 
 load_dotenv()
 
 one_map_route = Blueprint('one_map_route', __name__)
-ONEMAP_BASE_URL = "https://www.onemap.gov.sg/api/public/routingsvc/route"
-gmaps = googlemaps.Client(os.getenv("GOOGLE_MAPS_API_KEY"))
+ONEMAP_API_BASE = os.getenv("ONEMAP_API_BASE", "https://www.onemap.gov.sg")
+ONEMAP_BASE_URL = f"{ONEMAP_API_BASE}/api/public/routingsvc/route"
+SEGMENT_DELAY_COLUMNS = "origin_stop_id,destination_stop_id,non_flooded_bus_duration,5kmh_flooded_bus_duration,10kmh_flooded_bus_duration,20kmh_flooded_bus_duration"
+SEGMENT_DELAY_SPEEDS = ("5kmh", "10kmh", "20kmh")
+MAX_SEGMENT_DELAY_BATCH = 200
+SEGMENT_PAGE_SIZE = 1000
+
+BUS_TRIP_FLOOD_SPEEDS = ("5kmh", "12kmh", "30kmh", "48kmh")
+BUS_TRIP_PERCENTILES = (50, 75, 90, 95, 99)
+BUS_TRIP_COLUMNS_TTL_SEC = 6 * 3600
+MAX_HISTOGRAM_BINS = 200
+
+_bus_trip_columns_lock = threading.Lock()
+_bus_trip_columns = None
 
 def get_bus_trip_segment_by_stop(start_stop, end_stop):
     try:
@@ -26,91 +45,108 @@ def get_bus_trip_segment_by_stop(start_stop, end_stop):
     return jsonify(response.data[0]), 200   
 
 
-def get_onemap_route():
+def _fetch_segment_delay(start_stop, end_stop, spans):
+    """Segment row for a stop pair, or None if there is none or the query fails."""
+    try:
+        with span("supabase_segment", spans):
+            response = supabase.table('bus_trip_segment').select('*').eq('origin_stop_id', start_stop).eq('destination_stop_id', end_stop).execute()
+    except Exception as e:
+        print(f"Segment lookup failed for {start_stop}->{end_stop}: {e}")
+        return None
+    return response.data[0] if response.data else None
+
+
+async def get_onemap_route():
     start_address = request.args.get('start_address')
     end_address = request.args.get('end_address')
     if not start_address or not end_address:
         return jsonify({"error": "start_address and end_address are required"}), 400
 
-    start_location = gmaps.geocode(start_address)
-    if not start_location:
-        return jsonify({"error": "Start address not found"}), 404
-    start_lat_raw = start_location[0]['geometry']['location']['lat']
-    start_lon_raw = start_location[0]['geometry']['location']['lng']
-
-    end_location = gmaps.geocode(end_address)
-    if not end_location:
-        return jsonify({"error": "End address not found"}), 404
-    end_lat_raw = end_location[0]['geometry']['location']['lat']
-    end_lon_raw = end_location[0]['geometry']['location']['lng']
-
-    start_lat = start_lat_raw
-    start_lon = start_lon_raw
-    end_lat = end_lat_raw
-    end_lon = end_lon_raw
-
-    date = request.args.get('date', datetime.today().strftime('%m-%d-%Y'))
-    time = request.args.get('time', '07:00:00')  # Default 7 AM
-
-    if not (start_lat and start_lon and end_lat and end_lon):
-        return jsonify({
-            "error": "start_lat, start_lon, end_lat, and end_lon are required."
-        }), 400
-
-    token = get_valid_token()
-    if not token:
-        return jsonify({"error": "OneMap API key missing. Could not retrieve OneMap token."}), 500
-
-    params = {
-        "start": f"{start_lat},{start_lon}",
-        "end": f"{end_lat},{end_lon}",
-        "routeType": "pt",          # Public transport mode
-        "date": date,
-        "time": time,
-        "mode": "BUS",          # Transit includes bus/train/mrt
-        #"maxWalkDistance": "1000",  # Max walking distance in meters
-        "numItineraries": "3"       # Number of route options to return
-    }
-
-    headers = {
-        "Authorization": token
-    }
-
-    try:
-        response = requests.get(ONEMAP_BASE_URL, headers=headers, params=params, timeout=15)
-        data = response.json()  
-        for itinerary in data.get("plan", {}).get("itineraries", []):
-            for leg in itinerary.get("legs", []):
-                if leg.get("mode") == "BUS":
-                    start_stop_id = leg.get("from", {}).get("stopCode")
-                    end_stop_id = leg.get("to", {}).get("stopCode")
-                    if start_stop_id and end_stop_id:
-                        delay = get_bus_trip_segment_by_stop(start_stop_id, end_stop_id)
-                        delay_str = delay[0].data.decode("utf-8")
-                        delay_json = json.loads(delay_str)
-                        leg['overall_bus_route_status'] = "clear"
-                        if "error" not in delay_json:
-                            leg["non_flooded_bus_duration"] = delay_json.get("non_flooded_bus_duration"),
-                            leg["5kmh_flooded_bus_duration"]= delay_json.get('5kmh_flooded_bus_duration'),
-                            leg["10kmh_flooded_bus_duration"]= delay_json.get('10kmh_flooded_bus_duration'),
-                            leg["20kmh_flooded_bus_duration"]= delay_json.get('20kmh_flooded_bus_duration'),
-                            leg['overall_bus_route_status'] = "flooded"
-                            print("Added time travel delay info")
-
-        if response.status_code != 200:
+    spans = request_spans()
+    async with async_client() as client:
+        with span("google_geocode", spans):
+            start_location, end_location = await asyncio.gather(
+                geocode(client, start_address), geocode(client, end_address))
+        if not start_location:
+            return jsonify({"error": "Start address not found"}), 404
+        start_lat_raw = start_location[0]['geometry']['location']['lat']
+        start_lon_raw = start_location[0]['geometry']['location']['lng']
+
+        if not end_location:
+            return jsonify({"error": "End address not found"}), 404
+        end_lat_raw = end_location[0]['geometry']['location']['lat']
+        end_lon_raw = end_location[0]['geometry']['location']['lng']
+
+        start_lat = start_lat_raw
+        start_lon = start_lon_raw
+        end_lat = end_lat_raw
+        end_lon = end_lon_raw
+
+        date = request.args.get('date', datetime.today().strftime('%m-%d-%Y'))
+        time = request.args.get('time', '07:00:00')  # Default 7 AM
+
+        if not (start_lat and start_lon and end_lat and end_lon):
             return jsonify({
-                "error": "OneMap API request failed",
-                "status_code": response.status_code,
-                "details": response.text
-            }), response.status_code
-
-        return jsonify(data), 200
-
-    except requests.exceptions.Timeout:
-        return jsonify({"error": "OneMap API request timed out"}), 504
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+                "error": "start_lat, start_lon, end_lat, and end_lon are required."
+            }), 400
+
+        token = await asyncio.to_thread(get_valid_token)
+        if not token:
+            return jsonify({"error": "OneMap API key missing. Could not retrieve OneMap token."}), 500
+
+        params = {
+            "start": f"{start_lat},{start_lon}",
+            "end": f"{end_lat},{end_lon}",
+            "routeType": "pt",          # Public transport mode
+            "date": date,
+            "time": time,
+            "mode": "BUS",          # Transit includes bus/train/mrt
+            #"maxWalkDistance": "1000",  # Max walking distance in meters
+            "numItineraries": "3"       # Number of route options to return
+        }
+
+        try:
+            with span("onemap_route", spans):
+                response = await onemap_get(onemap_routing, client, ONEMAP_BASE_URL, token, params=params)
+            data = response.json()
+            bus_legs = [
+                leg
+                for itinerary in data.get("plan", {}).get("itineraries", [])
+                for leg in itinerary.get("legs", [])
+                if leg.get("mode") == "BUS" and leg.get("from", {}).get("stopCode") and leg.get("to", {}).get("stopCode")
+            ]
+            # Segment lookups use the blocking Supabase client, so they run on threads, all at once.
+            segments = await asyncio.gather(*(
+                asyncio.to_thread(_fetch_segment_delay, leg["from"]["stopCode"], leg["to"]["stopCode"], spans)
+                for leg in bus_legs
+            ))
+            for leg, segment in zip(bus_legs, segments):
+                leg['overall_bus_route_status'] = "clear"
+                if segment is not None:
+                    leg["non_flooded_bus_duration"] = segment.get("non_flooded_bus_duration"),
+                    leg["5kmh_flooded_bus_duration"]= segment.get('5kmh_flooded_bus_duration'),
+                    leg["10kmh_flooded_bus_duration"]= segment.get('10kmh_flooded_bus_duration'),
+                    leg["20kmh_flooded_bus_duration"]= segment.get('20kmh_flooded_bus_duration'),
+                    leg['overall_bus_route_status'] = "flooded"
+                    print("Added time travel delay info")
+
+            if response.status_code != 200:
+                return jsonify({
+                    "error": "OneMap API request failed",
+                    "status_code": response.status_code,
+                    "details": response.text
+                }), response.status_code
+
+            return jsonify(data), 200
+
+        except httpx.TimeoutException:
+            return jsonify({"error": "OneMap API request timed out"}), 504
+
+        except CircuitOpenError:
+            return jsonify({"error": "OneMap API is temporarily unavailable, please retry shortly"}), 503
+
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
 
 
 def get_all_bus_stops():
@@ -167,6 +203,22 @@ def get_bus_trip_segment_by_id(bus_trip_id):
 
     return jsonify(response.data[0]), 200
 
+def format_segment_delay(segment):
+    non_flooded = segment.get("non_flooded_bus_duration")
+    flooded = {speed: segment.get(f"{speed}_flooded_bus_duration") for speed in SEGMENT_DELAY_SPEEDS}
+    return {
+        "start_stop": segment.get("origin_stop_id"),
+        "end_stop": segment.get("destination_stop_id"),
+        "non_flooded_bus_duration": non_flooded,
+        "origin_stop_id": segment.get("origin_stop_id"),
+        "destination_stop_id": segment.get("destination_stop_id"),
+        "flooded_durations": flooded,
+        "delays": {
+            speed: duration - non_flooded if duration is not None and non_flooded is not None else None
+            for speed, duration in flooded.items()
+        }
+    }
+
 def get_bus_trip_segment_delay():
     start_stop = request.args.get('start_stop')
     end_stop = request.args.get('end_stop')
@@ -198,29 +250,86 @@ def get_bus_trip_segment_delay():
         
         segment = data[0]
 
-        return jsonify({
-            "start_stop": segment.get("origin_stop_id"),
-            "end_stop": segment.get("destination_stop_id"),
-            "non_flooded_bus_duration": segment.get("non_flooded_bus_duration"),
-            "origin_stop_id": segment.get("origin_stop_id"),
-            "destination_stop_id": segment.get("destination_stop_id"),
-            "flooded_durations": {
-                "5kmh": segment.get('5kmh_flooded_bus_duration'),
-                "10kmh": segment.get('10kmh_flooded_bus_duration'),
-                "20kmh": segment.get('20kmh_flooded_bus_duration'),
-            },
-            "delays": {
-                "5kmh": segment.get('5kmh_flooded_bus_duration') - segment.get('non_flooded_bus_duration'),
-                "10kmh": segment.get('10kmh_flooded_bus_duration') - segment.get('non_flooded_bus_duration'),
-                "20kmh": segment.get('20kmh_flooded_bus_duration') - segment.get('non_flooded_bus_duration'),
-            }
-        }), 200
+        return jsonify(format_segment_delay(segment)), 200
 
     except Exception as e:
         return jsonify({
             "error": str(e)
         }), 500
 
+
+def get_bus_trip_segment_delay_batch():
+    body = request.get_json(silent=True)
+    pairs = body.get("pairs") if isinstance(body, dict) else body
+
+    if not isinstance(pairs, list) or not pairs:
+        return jsonify({
+            "error": "Request body must be a non-empty list of {start_stop, end_stop} pairs, or an object with a 'pairs' list."
+        }), 400
+
+    if len(pairs) > MAX_SEGMENT_DELAY_BATCH:
+        return jsonify({
+            "error": f"At most {MAX_SEGMENT_DELAY_BATCH} pairs can be resolved per request."
+        }), 400
+
+    normalized = []
+    for item in pairs:
+        start_stop = str(item.get("start_stop", "")).strip() if isinstance(item, dict) else ""
+        end_stop = str(item.get("end_stop", "")).strip() if isinstance(item, dict) else ""
+        if not start_stop.isalnum() or not end_stop.isalnum():
+            return jsonify({
+                "error": "Every pair needs alphanumeric start_stop and end_stop values.",
+                "pair": item
+            }), 400
+        normalized.append((start_stop, end_stop))
+
+    # One query for the whole batch: an OR of (origin, destination) pairs,
+    # paged so large batches are not cut off at the PostgREST row limit.
+    # Ordered on the primary key so pages neither overlap nor skip rows.
+    unique_pairs = list(dict.fromkeys(normalized))
+    pair_filter = ",".join(
+        f"and(origin_stop_id.eq.{start},destination_stop_id.eq.{end})" for start, end in unique_pairs
+    )
+
+    segments_by_pair = {}
+    try:
+        offset = 0
+        while True:
+            response = supabase.table("bus_trip_segment") \
+                .select(SEGMENT_DELAY_COLUMNS) \
+                .or_(pair_filter) \
+                .order("bus_trip_segment_id") \
+                .range(offset, offset + SEGMENT_PAGE_SIZE - 1) \
+                .execute()
+            rows = response.data or []
+            for segment in rows:
+                pair = (str(segment.get("origin_stop_id")), str(segment.get("destination_stop_id")))
+                segments_by_pair.setdefault(pair, segment)
+            if len(rows) < SEGMENT_PAGE_SIZE or len(segments_by_pair) == len(unique_pairs):
+                break
+            offset += SEGMENT_PAGE_SIZE
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    results = []
+    for start_stop, end_stop in normalized:
+        segment = segments_by_pair.get((start_stop, end_stop))
+        if segment is None:
+            results.append({
+                "start_stop": start_stop,
+                "end_stop": end_stop,
+                "found": False,
+                "error": "No matching bus trip segment found for the given stops."
+            })
+        else:
+            results.append({**format_segment_delay(segment), "found": True})
+
+    return jsonify({
+        "count": len(results),
+        "found": sum(1 for r in results if r["found"]),
+        "results": results
+    }), 200
+
     
 def get_unique_end_area_codes():
     AREA_CODES = {
@@ -275,4 +384,98 @@ def get_unique_end_area_codes():
     "Yishun": "YS"
     }
 
-    return jsonify(AREA_CODES), 200
\ No newline at end of file
+    return jsonify(AREA_CODES), 200
+
+
+def load_bus_trip_columns(refresh=False):
+    """Columnar in-memory copy of bus_trip: area codes plus delay per flood speed."""
+    global _bus_trip_columns
+    with _bus_trip_columns_lock:
+        stale = _bus_trip_columns is None or time.time() - _bus_trip_columns["built_at"] > BUS_TRIP_COLUMNS_TTL_SEC
+        if refresh or stale:
+            columns = ["bus_trip_id", "start_area_code", "end_area_code", "non_flooded_total_duration"] + \
+                [f"{speed}_total_duration" for speed in BUS_TRIP_FLOOD_SPEEDS]
+            trips = fetch_table_frame("bus_trip", columns, order_by="bus_trip_id")
+            trips = trips.dropna(subset=["non_flooded_total_duration"])
+            baseline = trips["non_flooded_total_duration"].to_numpy(dtype=float)
+            snapshot = {
+                "built_at": time.time(),
+                "start_area_code": trips["start_area_code"].fillna("").to_numpy(dtype=str),
+                "end_area_code": trips["end_area_code"].fillna("").to_numpy(dtype=str),
+                "delays": {
+                    speed: trips[f"{speed}_total_duration"].to_numpy(dtype=float) - baseline
+                    for speed in BUS_TRIP_FLOOD_SPEEDS
+                },
+            }
+            # The summary cache lives on the snapshot it was computed from, so a
+            # reload can never serve old summaries or cache new data under an old key.
+            snapshot["summaries"] = lru_cache(maxsize=512)(partial(_summarize_bus_trip_delays, snapshot))
+            _bus_trip_columns = snapshot
+        return _bus_trip_columns
+
+
+def summarize_bus_trip_delays(columns, start_area_code, end_area_code, bins):
+    """Delay summary from one load_bus_trip_columns() snapshot, memoised per snapshot."""
+    return columns["summaries"](start_area_code, end_area_code, bins)
+
+
+def _summarize_bus_trip_delays(columns, start_area_code, end_area_code, bins):
+    mask = np.ones(len(columns["start_area_code"]), dtype=bool)
+    if start_area_code:
+        mask &= columns["start_area_code"] == start_area_code
+    if end_area_code:
+        mask &= columns["end_area_code"] == end_area_code
+
+    delays = {speed: values[mask] for speed, values in columns["delays"].items()}
+    delays = {speed: values[~np.isnan(values)] for speed, values in delays.items()}
+    upper = max((values.max() for values in delays.values() if values.size), default=0.0)
+    lower = min((values.min() for values in delays.values() if values.size), default=0.0)
+    edges = np.linspace(min(lower, 0.0), max(upper, 1.0), bins + 1)
+
+    scenarios = {}
+    for speed, values in delays.items():
+        if not values.size:
+            scenarios[speed] = {"count": 0}
+            continue
+        counts, _ = np.histogram(values, bins=edges)
+        percentiles = np.percentile(values, BUS_TRIP_PERCENTILES)
+        scenarios[speed] = {
+            "count": int(values.size),
+            "mean": round(float(values.mean()), 1),
+            "min": round(float(values.min()), 1),
+            "max": round(float(values.max()), 1),
+            "percentiles": {f"p{p}": round(float(v), 1) for p, v in zip(BUS_TRIP_PERCENTILES, percentiles)},
+            "histogram": counts.tolist(),
+        }
+
+    return {
+        "start_area_code": start_area_code,
+        "end_area_code": end_area_code,
+        "trip_count": int(mask.sum()),
+        "unit": "seconds",
+        "baseline": "non_flooded_total_duration",
+        "bin_edges": [round(float(e), 1) for e in edges],
+        "scenarios": scenarios,
+    }
+
+
+def get_bus_trip_delay_summary():
+    start_area_code = request.args.get("start_area_code") or None
+    end_area_code = request.args.get("end_area_code") or None
+    try:
+        bins = int(request.args.get("bins", 20))
+    except ValueError:
+        return jsonify({"error": "bins must be an integer"}), 400
+    if not 1 <= bins <= MAX_HISTOGRAM_BINS:
+        return jsonify({"error": f"bins must be between 1 and {MAX_HISTOGRAM_BINS}"}), 400
+
+    try:
+        columns = load_bus_trip_columns(refresh=request.args.get("refresh") == "true")
+        summary = summarize_bus_trip_delays(columns, start_area_code, end_area_code, bins)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    if summary["trip_count"] == 0:
+        return jsonify({"error": "No bus trips found for the given area codes"}), 404
+
+    return jsonify(summary), 200
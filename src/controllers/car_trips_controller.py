@@ -1,17 +1,55 @@
 from src.database import supabase
 from flask import jsonify, request, Blueprint
-import googlemaps
-import requests
+import asyncio
+import httpx
 from datetime import datetime
 import os
 from dotenv import load_dotenv
-from src.utils.onemap_auth import get_valid_token
+from src.utils.onemap_auth import get_valid_token, onemap_get
+from src.utils.supabase_frames import fetch_table_frame
+from src.utils.instrumentation import span, request_spans
+from src.utils.async_http import async_client, geocode
+from src.utils.resilience import onemap_routing, CircuitOpenError
+from src.utils.routing_engine import RoutingEngine
+from src.utils.isochrone import IsochroneEngine
+from src.controllers.flood_events_controller import (
+    get_graph_arrays, flooded_edges_for, flood_edges_within, get_flood_points_3414, stops_df,
+    IMPACT_DEFAULT_BUFFER_M, MAX_IMPACT_BUFFER_M
+)
+import threading
+import time
+import numpy as np
+import pandas as pd
 
 load_dotenv()
 
 one_map_route = Blueprint('one_map_route', __name__)
-ONEMAP_BASE_URL = "https://www.onemap.gov.sg/api/public/routingsvc/route"
-gmaps = googlemaps.Client(os.getenv("GOOGLE_MAPS_API_KEY"))
+ONEMAP_API_BASE = os.getenv("ONEMAP_API_BASE", "https://www.onemap.gov.sg")
+ONEMAP_BASE_URL = f"{ONEMAP_API_BASE}/api/public/routingsvc/route"
+
+CAR_BASELINE_SPEED = "90kph"
+CAR_FLOOD_SPEEDS = ("5kph", "10kph", "20kph", "45kph", "72kph", "81kph")
+CAR_MATRIX_TTL_SEC = 6 * 3600
+
+_car_matrix_lock = threading.Lock()
+_car_matrix = None
+
+ROUTING_FLOOD_SPEEDS = (5, 10, 20, 45)
+
+_routing_lock = threading.Lock()
+_routing_engine = None
+
+ISOCHRONE_MAX_MINUTES = 60
+ISOCHRONE_DEFAULT_SPEED = 10
+ISOCHRONE_TREE_CACHE = 256
+
+_isochrone_lock = threading.Lock()
+_isochrone_engine = None
+
+MAX_MATRIX_ORIGINS = 200
+MAX_MATRIX_DESTINATIONS = 2000
+
+_stop_coords = None
 
 # def get_all_car_trips_flooded():
 #     response = supabase.table('car_trips_flooded').select('*').execute()
@@ -87,76 +125,69 @@ def get_all_car_trips_by_id():
 
     return jsonify(response.data), 200
 
-def get_onemap_car_route():
+async def get_onemap_car_route():
     start_address = request.args.get('start_address')
     end_address = request.args.get('end_address')
     if not start_address or not end_address:
         return jsonify({"error": "start_address and end_address are required"}), 400
 
-    token = get_valid_token()
+    token = await asyncio.to_thread(get_valid_token)
     if not token:
         return jsonify({"error": "OneMap API key missing. Could not retrieve OneMap token."}), 500
 
     try:
-        from concurrent.futures import ThreadPoolExecutor
-        
-        def geocode_address(address):
-            result = gmaps.geocode(address)
+        spans = request_spans()
+
+        async def geocode_address(client, address):
+            with span("google_geocode", spans):
+                result = await geocode(client, address)
             if not result:
                 return None
             return {
                 'lat': result[0]['geometry']['location']['lat'],
                 'lon': result[0]['geometry']['location']['lng']
             }
-        
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            future_start = executor.submit(geocode_address, start_address)
-            future_end = executor.submit(geocode_address, end_address)
-            
-            start_coords = future_start.result()
-            end_coords = future_end.result()
-        
-        if not start_coords:
-            return jsonify({"error": "Start address not found"}), 404
-        if not end_coords:
-            return jsonify({"error": "End address not found"}), 404
-        
-        start_lat, start_lon = start_coords['lat'], start_coords['lon']
-        end_lat, end_lon = end_coords['lat'], end_coords['lon']
-        
-        print(f"Start: {start_lat}, {start_lon}; End: {end_lat}, {end_lon}")
 
-        tolerance = 0.0018  # 180m radius
-        
-        def fetch_onemap():
-            params = {
-                "start": f"{start_lat},{start_lon}",
-                "end": f"{end_lat},{end_lon}",
-                "routeType": "drive"
-            }
-            headers = {"Authorization": token}
-            response = requests.get(ONEMAP_BASE_URL, headers=headers, params=params, timeout=15)
-            return response
-        
-        def fetch_supabase():
-            return supabase.table("car_trips").select("*") \
-                .gte("start_lat", start_lat - tolerance) \
-                .lte("start_lat", start_lat + tolerance) \
-                .gte("start_lon", start_lon - tolerance) \
-                .lte("start_lon", start_lon + tolerance) \
-                .gte("end_lat", end_lat - tolerance) \
-                .lte("end_lat", end_lat + tolerance) \
-                .gte("end_lon", end_lon - tolerance) \
-                .lte("end_lon", end_lon + tolerance) \
-                .execute()
-        
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            future_onemap = executor.submit(fetch_onemap)
-            future_supabase = executor.submit(fetch_supabase)
-            
-            response = future_onemap.result()
-            supabase_response = future_supabase.result()
-        
+        async with async_client() as client:
+            start_coords, end_coords = await asyncio.gather(
+                geocode_address(client, start_address), geocode_address(client, end_address))
+
+            if not start_coords:
+                return jsonify({"error": "Start address not found"}), 404
+            if not end_coords:
+                return jsonify({"error": "End address not found"}), 404
+
+            start_lat, start_lon = start_coords['lat'], start_coords['lon']
+            end_lat, end_lon = end_coords['lat'], end_coords['lon']
+
+            print(f"Start: {start_lat}, {start_lon}; End: {end_lat}, {end_lon}")
+
+            tolerance = 0.0018  # 180m radius
+
+            async def fetch_onemap():
+                params = {
+                    "start": f"{start_lat},{start_lon}",
+                    "end": f"{end_lat},{end_lon}",
+                    "routeType": "drive"
+                }
+                with span("onemap_route", spans):
+                    return await onemap_get(onemap_routing, client, ONEMAP_BASE_URL, token, params=params)
+
+            def fetch_supabase():
+                with span("supabase_car_trips", spans):
+                    return supabase.table("car_trips").select("*") \
+                        .gte("start_lat", start_lat - tolerance) \
+                        .lte("start_lat", start_lat + tolerance) \
+                        .gte("start_lon", start_lon - tolerance) \
+                        .lte("start_lon", start_lon + tolerance) \
+                        .gte("end_lat", end_lat - tolerance) \
+                        .lte("end_lat", end_lat + tolerance) \
+                        .gte("end_lon", end_lon - tolerance) \
+                        .lte("end_lon", end_lon + tolerance) \
+                        .execute()
+
+            # The Supabase client blocks, so it runs on a thread while OneMap is awaited.
+            response, supabase_response = await asyncio.gather(fetch_onemap(), asyncio.to_thread(fetch_supabase))
         if response.status_code != 200:
             return jsonify({
                 "error": "OneMap API request failed",
@@ -179,10 +210,342 @@ def get_onemap_car_route():
                 "5kph_total_duration": trip.get("5kph_total_duration"),
                 "90kph_total_duration": trip.get("90kph_total_duration"),
             }
+        else:
+            # No simulated trip near these endpoints: estimate on the graph instead (CPU-bound, off the loop).
+            estimate = await asyncio.to_thread(_safe_route_estimate, start_lon, start_lat, end_lon, end_lat)
+            if estimate and estimate["flooded_edges_on_dry_path"] > 0:
+                data['overall_route_status'] = "flooded"
+                data["time_travel_simulation"] = {
+                    f"{speed}_total_duration": scenario["total_duration"]
+                    for speed, scenario in estimate["scenarios"].items()
+                }
+                data["time_travel_simulation"]["dry_total_duration"] = estimate["dry_total_duration"]
+                data["time_travel_simulation_source"] = "routing_engine"
         
         return jsonify(data), 200
 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         return jsonify({"error": "OneMap API request timed out"}), 504
+    except CircuitOpenError:
+        return jsonify({"error": "OneMap API is temporarily unavailable, please retry shortly"}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def build_car_trip_area_matrix(trips):
+    """Aggregate car trips into an area code x area code delay matrix.
+
+    Delay is each flooded-speed duration minus the 90 km/h (dry) duration.
+    All statistics come from one vectorized group-by over the trip frame.
+    """
+    keys = ["start_area_code", "end_area_code"]
+    trips = trips.dropna(subset=keys + [f"{CAR_BASELINE_SPEED}_total_duration"])
+    baseline = trips[f"{CAR_BASELINE_SPEED}_total_duration"].astype(float)
+    delays = pd.DataFrame({
+        speed: trips[f"{speed}_total_duration"].astype(float) - baseline
+        for speed in CAR_FLOOD_SPEEDS
+    })
+    delays[keys] = trips[keys]
+
+    grouped = delays.groupby(keys, sort=True)
+    counts = grouped.size()
+    means = grouped[list(CAR_FLOOD_SPEEDS)].mean()
+    medians = grouped[list(CAR_FLOOD_SPEEDS)].median()
+    p95s = grouped[list(CAR_FLOOD_SPEEDS)].quantile(0.95)
+
+    area_codes = sorted(set(trips["start_area_code"]) | set(trips["end_area_code"]))
+    cells = []
+    for (start_code, end_code), trip_count in counts.items():
+        cells.append({
+            "start_area_code": start_code,
+            "end_area_code": end_code,
+            "trip_count": int(trip_count),
+            "delays": {
+                speed: {
+                    "mean": _round_or_none(means.at[(start_code, end_code), speed]),
+                    "median": _round_or_none(medians.at[(start_code, end_code), speed]),
+                    "p95": _round_or_none(p95s.at[(start_code, end_code), speed]),
+                }
+                for speed in CAR_FLOOD_SPEEDS
+            }
+        })
+
+    # Dense layout for heatmaps: rows are start areas, columns end areas.
+    index = pd.MultiIndex.from_product([area_codes, area_codes], names=keys)
+    dense = {
+        "trip_count": counts.reindex(index, fill_value=0).to_numpy().reshape(len(area_codes), -1).tolist(),
+        "mean_delay": {
+            speed: _nan_to_none(means[speed].reindex(index).to_numpy().reshape(len(area_codes), -1).round(1))
+            for speed in CAR_FLOOD_SPEEDS
+        }
+    }
+
+    return {
+        "baseline_speed": CAR_BASELINE_SPEED,
+        "scenarios": list(CAR_FLOOD_SPEEDS),
+        "unit": "seconds",
+        "trip_count": int(counts.sum()),
+        "area_codes": area_codes,
+        "cells": cells,
+        "dense": dense,
+    }
+
+
+def _round_or_none(value, digits=1):
+    return None if pd.isna(value) else round(float(value), digits)
+
+
+def _nan_to_none(matrix):
+    return [[None if np.isnan(v) else float(v) for v in row] for row in matrix]
+
+
+def get_car_trip_area_matrix_cached(refresh=False):
+    global _car_matrix
+    with _car_matrix_lock:
+        stale = _car_matrix is None or time.time() - _car_matrix["built_at"] > CAR_MATRIX_TTL_SEC
+        if refresh or stale:
+            columns = ["car_trip_id", "start_area_code", "end_area_code", f"{CAR_BASELINE_SPEED}_total_duration"] + \
+                [f"{speed}_total_duration" for speed in CAR_FLOOD_SPEEDS]
+            trips = fetch_table_frame("car_trips", columns, order_by="car_trip_id")
+            _car_matrix = {"built_at": time.time(), "matrix": build_car_trip_area_matrix(trips)}
+        return _car_matrix
+
+
+def get_car_trip_area_matrix():
+    start_area_code = request.args.get("start_area_code")
+    end_area_code = request.args.get("end_area_code")
+    layout = request.args.get("format", "cells")
+    if layout not in ("cells", "dense"):
+        return jsonify({"error": "format must be 'cells' or 'dense'"}), 400
+
+    try:
+        cached = get_car_trip_area_matrix_cached(refresh=request.args.get("refresh") == "true")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    matrix = cached["matrix"]
+    if not matrix["cells"]:
+        return jsonify({"message": "No records found"}), 404
+
+    result = {
+        "baseline_speed": matrix["baseline_speed"],
+        "scenarios": matrix["scenarios"],
+        "unit": matrix["unit"],
+        "trip_count": matrix["trip_count"],
+        "area_codes": matrix["area_codes"],
+        "built_at": datetime.fromtimestamp(cached["built_at"]).isoformat(timespec="seconds"),
+    }
+
+    if layout == "dense":
+        result["dense"] = matrix["dense"]
+        return jsonify(result), 200
+
+    cells = matrix["cells"]
+    if start_area_code:
+        cells = [c for c in cells if c["start_area_code"] == start_area_code]
+    if end_area_code:
+        cells = [c for c in cells if c["end_area_code"] == end_area_code]
+    result["cells"] = cells
+    return jsonify(result), 200
+
+
+
+def get_routing_engine():
+    global _routing_engine
+    if _routing_engine is None:
+        graph_arrays = get_graph_arrays()
+        with _routing_lock:
+            if _routing_engine is None:
+                _routing_engine = RoutingEngine(graph_arrays)
+    return _routing_engine
+
+
+def _safe_route_estimate(start_lon, start_lat, end_lon, end_lat):
+    try:
+        return get_routing_engine().route(start_lon, start_lat, end_lon, end_lat,
+                                          flooded_edges=flooded_edges_for(), speeds_kph=ROUTING_FLOOD_SPEEDS)
+    except Exception as e:
+        print(f"Warning: routing engine estimate failed: {e}")
+        return None
+
+
+def get_flood_travel_time():
+    try:
+        start_lat = float(request.args["start_lat"])
+        start_lon = float(request.args["start_lon"])
+        end_lat = float(request.args["end_lat"])
+        end_lon = float(request.args["end_lon"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "start_lat, start_lon, end_lat and end_lon are required numbers"}), 400
+
+    flood_ids = None
+    flood_ids_param = request.args.get("flood_ids")
+    if flood_ids_param:
+        try:
+            flood_ids = [int(id.strip()) for id in flood_ids_param.split(',')]
+        except ValueError:
+            return jsonify({'error': 'flood_ids must be a comma-separated list of integers'}), 400
+
+    try:
+        engine = get_routing_engine()
+        flooded = flooded_edges_for(flood_ids)
+        result = engine.route(start_lon, start_lat, end_lon, end_lat,
+                              flooded_edges=flooded, speeds_kph=ROUTING_FLOOD_SPEEDS)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+    if result is None:
+        return jsonify({"error": "No drivable route between the given points"}), 404
+
+    result["flooded_edge_count"] = len(flooded)
+    return jsonify(result), 200
+
+
+def _buffered_flood_edges(flood_ids, buffer_m):
+    """Edges within buffer_m of the given floods (all recorded floods when flood_ids is None)."""
+    if flood_ids is None:
+        flood_ids = get_flood_points_3414().index.tolist()
+    return sorted(set().union(*[flood_edges_within(int(f), round(buffer_m, 1)) for f in flood_ids]))
+
+
+def get_isochrone_engine():
+    global _isochrone_engine
+    if _isochrone_engine is None:
+        graph_arrays = get_graph_arrays()
+        with _isochrone_lock:
+            if _isochrone_engine is None:
+                _isochrone_engine = IsochroneEngine(graph_arrays, ISOCHRONE_MAX_MINUTES * 60,
+                                                    cache_size=ISOCHRONE_TREE_CACHE)
+    return _isochrone_engine
+
+
+def get_isochrone():
+    try:
+        lat = float(request.args["lat"])
+        lon = float(request.args["lon"])
+        minutes = float(request.args.get("minutes", 15))
+        speed_kph = int(request.args.get("speed", ISOCHRONE_DEFAULT_SPEED))
+        buffer_m = float(request.args.get("buffer_m", IMPACT_DEFAULT_BUFFER_M))
+    except (KeyError, ValueError):
+        return jsonify({"error": "lat and lon are required numbers; minutes, speed and buffer_m must be numbers"}), 400
+    if not 0 < minutes <= ISOCHRONE_MAX_MINUTES:
+        return jsonify({"error": f"minutes must be between 0 and {ISOCHRONE_MAX_MINUTES}"}), 400
+    if speed_kph not in ROUTING_FLOOD_SPEEDS:
+        return jsonify({"error": f"speed must be one of {', '.join(map(str, ROUTING_FLOOD_SPEEDS))}"}), 400
+    if not 0 < buffer_m <= MAX_IMPACT_BUFFER_M:
+        return jsonify({"error": f"buffer_m must be between 0 and {MAX_IMPACT_BUFFER_M}"}), 400
+
+    flood_ids = None
+    flood_ids_param = request.args.get("flood_id")
+    if flood_ids_param:
+        try:
+            flood_ids = [int(id.strip()) for id in flood_ids_param.split(',')]
+        except ValueError:
+            return jsonify({'error': 'flood_id must be an integer or a comma-separated list of integers'}), 400
+
+    try:
+        flooded = _buffered_flood_edges(flood_ids, buffer_m)
+        if flood_ids_param and not flooded:
+            return jsonify({"error": "Flood event(s) not found or no roads within buffer_m"}), 404
+
+        result = get_isochrone_engine().isochrone(lon, lat, minutes, flooded_edges=flooded, speed_kph=speed_kph)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    result["flood_ids"] = flood_ids
+    result["buffer_m"] = buffer_m
+    result["flooded_edge_count"] = len(flooded)
+    return jsonify(result), 200
+
+
+def _get_stop_coords():
+    global _stop_coords
+    if _stop_coords is None:
+        codes = stops_df["stop_code"].astype(str).str.zfill(5)
+        _stop_coords = dict(zip(codes, zip(stops_df["stop_lon"].astype(float), stops_df["stop_lat"].astype(float))))
+    return _stop_coords
+
+
+def _parse_matrix_points(items, name):
+    """[(lon, lat), ...] from {lat, lon} or {stop_code} objects, or an error message."""
+    if not isinstance(items, list) or not items:
+        return None, f"'{name}' must be a non-empty list of {{lat, lon}} or {{stop_code}} objects"
+    stop_coords = _get_stop_coords()
+    points = []
+    for item in items:
+        if isinstance(item, dict) and item.get("stop_code") is not None:
+            coords = stop_coords.get(str(item["stop_code"]).strip().zfill(5))
+            if coords is None:
+                return None, f"Unknown stop_code {item['stop_code']} in '{name}'"
+            points.append(coords)
+            continue
+        try:
+            points.append((float(item["lon"]), float(item["lat"])))
+        except (TypeError, KeyError, ValueError):
+            return None, f"Every entry in '{name}' needs numeric lat and lon, or a stop_code"
+    return points, None
+
+
+def _matrix_json(matrix):
+    return np.where(np.isfinite(matrix), np.round(matrix, 1), None).tolist()
+
+
+def get_travel_time_matrix():
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "Request body must be an object with 'origins' and 'destinations' lists"}), 400
+
+    origins, error = _parse_matrix_points(body.get("origins"), "origins")
+    if error is None:
+        destinations, error = _parse_matrix_points(body.get("destinations"), "destinations")
+    if error:
+        return jsonify({"error": error}), 400
+    if len(origins) > MAX_MATRIX_ORIGINS or len(destinations) > MAX_MATRIX_DESTINATIONS:
+        return jsonify({
+            "error": f"At most {MAX_MATRIX_ORIGINS} origins and {MAX_MATRIX_DESTINATIONS} destinations per request."
+        }), 400
+
+    flood_ids = body.get("flood_ids")
+    speeds = body.get("speeds", list(ROUTING_FLOOD_SPEEDS))
+    try:
+        buffer_m = float(body.get("buffer_m", IMPACT_DEFAULT_BUFFER_M))
+        if flood_ids is not None:
+            flood_ids = [int(f) for f in flood_ids]
+        speeds = [int(s) for s in speeds]
+    except (TypeError, ValueError):
+        return jsonify({"error": "flood_ids and speeds must be lists of integers; buffer_m must be a number"}), 400
+    if not 0 < buffer_m <= MAX_IMPACT_BUFFER_M:
+        return jsonify({"error": f"buffer_m must be between 0 and {MAX_IMPACT_BUFFER_M}"}), 400
+    if not speeds or any(s not in ROUTING_FLOOD_SPEEDS for s in speeds):
+        return jsonify({"error": f"speeds must be a subset of {', '.join(map(str, ROUTING_FLOOD_SPEEDS))}"}), 400
+
+    try:
+        started = time.perf_counter()
+        engine = get_routing_engine()
+        graph_arrays = get_graph_arrays()
+        points = np.array(origins + destinations)
+        nodes, snap_m = graph_arrays.nearest_nodes(points[:, 0], points[:, 1])
+        origin_nodes, dest_nodes = nodes[:len(origins)], nodes[len(origins):]
+
+        flooded = _buffered_flood_edges(flood_ids, buffer_m)
+        if flood_ids and not flooded:
+            return jsonify({"error": "Flood event(s) not found or no roads within buffer_m"}), 404
+        dry, scenarios, recomputed = engine.travel_time_matrix(origin_nodes, dest_nodes,
+                                                               flooded_edges=flooded, speeds_kph=speeds)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    node_ids = graph_arrays.node_ids[nodes]
+    snapped = [{"node_id": int(n), "snap_distance_m": round(float(d), 1)} for n, d in zip(node_ids, snap_m)]
+    return jsonify({
+        "units": "seconds",
+        "origins": snapped[:len(origins)],
+        "destinations": snapped[len(origins):],
+        "flood_ids": flood_ids,
+        "buffer_m": buffer_m,
+        "flooded_edge_count": len(flooded),
+        "recomputed_origins": recomputed,
+        "dry": _matrix_json(dry),
+        "flooded": {speed: _matrix_json(matrix) for speed, matrix in scenarios.items()},
+        "query_ms": round((time.perf_counter() - started) * 1000, 1),
+    }), 200
@@ -7,7 +7,7 @@ from collections import Counter
 import pandas as pd
 import json
 from datetime import datetime
-import requests
+import asyncio
 import math
 from shapely import wkb
 from dotenv import load_dotenv
@@ -16,24 +16,191 @@ import geopandas as gpd
 from shapely import wkb
 from shapely.geometry import LineString, Point, mapping
 import pickle
+import threading
+import numpy as np
+from functools import lru_cache
+from src.utils.graph_arrays import GraphArrays, DRY_SPEED_KPH
+from src.utils.flood_geometry import flood_points_frame, flood_edge_indices
+from src.utils.centrality import CentralityEngine, DEFAULT_SAMPLES
+from src.utils.centrality_store import CentralityStore, CENTRALITY_BASE, source_files
+from src.utils.bus_route_index import BusRouteIndex
+from src.utils.instrumentation import span, request_spans
+from src.utils.async_http import async_client
+from src.utils.resilience import lta_bus_arrival
+from src.utils.single_flight import SingleFlight
+from src.utils.precomputed import PrecomputedResults, PRECOMPUTED_DIR
+from src.utils.boot_profile import boot_profile
 
 
 load_dotenv()
 ROOT_DIR = Path(__file__).resolve().parents[2]
-LTA_BUS_ARRIVAL_URL = "https://datamall2.mytransport.sg/ltaodataservice/v3/BusArrival"
-ONE_MAP_NEAREST_BUS_STOPS = "https://www.onemap.gov.sg/api/public/nearbysvc/getNearestBusStops"
+LTA_API_BASE = os.getenv("LTA_API_BASE", "https://datamall2.mytransport.sg")
+LTA_BUS_ARRIVAL_URL = f"{LTA_API_BASE}/ltaodataservice/v3/BusArrival"
+ONEMAP_API_BASE = os.getenv("ONEMAP_API_BASE", "https://www.onemap.gov.sg")
+ONE_MAP_NEAREST_BUS_STOPS = f"{ONEMAP_API_BASE}/api/public/nearbysvc/getNearestBusStops"
 LTA_API_KEY = os.getenv("LTA_API_KEY")
+LTA_TIMEOUT_SEC = 5
 flood_events_df = pd.read_csv(ROOT_DIR/"flood_events_rows.csv")
 graph_path = ROOT_DIR / "SG_bus_network.graphml"
-G = ox.load_graphml(graph_path)
+with boot_profile.phase("load SG_bus_network.graphml"):
+    G = ox.load_graphml(graph_path)
 
 stops_path = "stops.txt"
-stops_df = pd.read_csv(stops_path)
-stops_gdf = gpd.GeoDataFrame(
-    stops_df,
-    geometry=gpd.points_from_xy(stops_df["stop_lon"], stops_df["stop_lat"]),
-    crs="EPSG:4326"
-).to_crs("EPSG:3414")
+with boot_profile.phase("build stops_gdf"):
+    stops_df = pd.read_csv(stops_path)
+    stops_gdf = gpd.GeoDataFrame(
+        stops_df,
+        geometry=gpd.points_from_xy(stops_df["stop_lon"], stops_df["stop_lat"]),
+        crs="EPSG:4326"
+    ).to_crs("EPSG:3414")
+
+CENTRALITY_PICKLE = ROOT_DIR / "Gcar_edge_closeness_centrality.pkl"
+FLOOD_SPEEDS_KPH = (5, 10, 20, 45)
+IMPACT_DEFAULT_BUFFER_M = 50
+MAX_IMPACT_BUFFER_M = 500
+IMPACT_CACHE_SIZE = 1024
+CRITICAL_SEGMENTS_DEFAULT_BUFFER_M = 50
+critical_segments_flight = SingleFlight("critical_segments")
+buses_affected_flight = SingleFlight("buses_affected")
+BUS_ROUTE_INDEX_PATH = Path(os.getenv("BUS_ROUTE_INDEX_PATH", ROOT_DIR / "bus_route_index.csv.gz"))
+
+_graph_lock = threading.Lock()
+_graph_arrays = None
+_flood_edges_by_id = None
+_edges_3414 = None
+_flood_points_3414 = None
+_centrality_lock = threading.Lock()
+_centrality_engine = None
+_centrality_store = None
+_bus_route_lock = threading.Lock()
+_bus_route_index = None
+_precomputed_lock = threading.Lock()
+_precomputed = None
+
+
+def get_graph_arrays():
+    """Array-backed copy of G shared by the routing and centrality engines."""
+    global _graph_arrays
+    if _graph_arrays is None:
+        with _graph_lock:
+            if _graph_arrays is None:
+                _graph_arrays = GraphArrays.from_graph(G)
+    return _graph_arrays
+
+
+def get_flood_edge_index():
+    """flood_id -> GraphArrays index of the edge nearest to that flood."""
+    global _flood_edges_by_id
+    if _flood_edges_by_id is None:
+        graph_arrays = get_graph_arrays()
+        with _graph_lock:
+            if _flood_edges_by_id is None:
+                points = flood_points_frame(flood_events_df)
+                edge_idx = flood_edge_indices(G, graph_arrays, points)
+                _flood_edges_by_id = dict(zip(points["flood_id"].tolist(), edge_idx.tolist()))
+    return _flood_edges_by_id
+
+
+def flooded_edges_for(flood_ids=None):
+    flood_edges = get_flood_edge_index()
+    if flood_ids is None:
+        return sorted(set(e for e in flood_edges.values() if e >= 0))
+    return sorted(set(flood_edges[f] for f in flood_ids if flood_edges.get(f, -1) >= 0))
+
+
+def get_edges_3414():
+    """Edges of G in EPSG:3414 (metres) with a built spatial index."""
+    global _edges_3414
+    if _edges_3414 is None:
+        with _graph_lock:
+            if _edges_3414 is None:
+                edges = ox.graph_to_gdfs(G, nodes=False, fill_edge_geometry=True).reset_index()
+                edges = edges.reindex(columns=["u", "v", "key", "name", "highway", "length", "geometry"]).to_crs(epsg=3414)
+                edges.sindex
+                _edges_3414 = edges
+    return _edges_3414
+
+
+def get_flood_points_3414():
+    """Flood points in EPSG:3414, indexed by flood_id."""
+    global _flood_points_3414
+    if _flood_points_3414 is None:
+        points = flood_points_frame(flood_events_df).drop_duplicates("flood_id")
+        _flood_points_3414 = gpd.GeoSeries(
+            gpd.points_from_xy(points["lon"], points["lat"]), index=points["flood_id"], crs="EPSG:4326"
+        ).to_crs(epsg=3414)
+    return _flood_points_3414
+
+
+@lru_cache(maxsize=IMPACT_CACHE_SIZE)
+def flood_edges_within(flood_id, buffer_m):
+    """GraphArrays indices of every edge within buffer_m of a flood (empty if unknown)."""
+    points = get_flood_points_3414()
+    if flood_id not in points.index:
+        return ()
+    edges = get_edges_3414()
+    hit = edges.iloc[edges.sindex.query(points.loc[flood_id].buffer(buffer_m), predicate="intersects")]
+    edge_idx = get_graph_arrays().edge_index(hit[["u", "v", "key"]].to_numpy())
+    return tuple(sorted(int(e) for e in edge_idx if e >= 0))
+
+
+def get_centrality_engine():
+    global _centrality_engine
+    if _centrality_engine is None:
+        graph_arrays = get_graph_arrays()
+        with _centrality_lock:
+            if _centrality_engine is None:
+                samples = int(os.getenv("CENTRALITY_SAMPLES", DEFAULT_SAMPLES))
+                # Each gunicorn worker keeps its own pool, so split the cores between them.
+                default_workers = max(1, (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", 1)))
+                workers = int(os.getenv("CENTRALITY_WORKERS", default_workers))
+                _centrality_engine = CentralityEngine(graph_arrays, n_samples=samples, workers=workers)
+    return _centrality_engine
+
+
+def get_centrality_store():
+    """Memory-mapped dry-network centrality, converted from the pickle on first use."""
+    global _centrality_store
+    if _centrality_store is None:
+        with _centrality_lock:
+            if _centrality_store is None:
+                _centrality_store = CentralityStore.open(CENTRALITY_BASE, pickle_path=CENTRALITY_PICKLE)
+    return _centrality_store
+
+
+def get_centrality_snapshot():
+    """The stored dry-network centrality, aligned to GraphArrays edge order."""
+    return get_centrality_store().aligned_to(get_graph_arrays())
+
+def get_bus_route_index():
+    """Offline bus route shapes, or None when bus_route_index.csv.gz has not been built."""
+    global _bus_route_index
+    if _bus_route_index is None:
+        with _bus_route_lock:
+            if _bus_route_index is None:
+                if not BUS_ROUTE_INDEX_PATH.exists():
+                    print(f"Warning: {BUS_ROUTE_INDEX_PATH.name} not found, affected buses come from LTA")
+                    _bus_route_index = False
+                else:
+                    _bus_route_index = BusRouteIndex.load(BUS_ROUTE_INDEX_PATH)
+                    print(f"Loaded bus route index: {len(_bus_route_index)} hops")
+    return _bus_route_index or None
+
+def precomputed_inputs():
+    """Every file the precomputed flood analytics are derived from."""
+    centrality = source_files(CENTRALITY_BASE, CENTRALITY_PICKLE)
+    return [ROOT_DIR / "flood_events_rows.csv", graph_path, Path(stops_path), *centrality, BUS_ROUTE_INDEX_PATH]
+
+
+def get_precomputed():
+    """Results from src.utils.build_precomputed that match the current inputs (possibly none)."""
+    global _precomputed
+    if _precomputed is None:
+        with _precomputed_lock:
+            if _precomputed is None:
+                _precomputed = PrecomputedResults.load(PRECOMPUTED_DIR, precomputed_inputs())
+    return _precomputed
+
 
 def get_all_flood_events():
     response = supabase.table('flood_events').select('*').execute()
@@ -74,7 +241,8 @@ def get_flood_event_by_id():
 
         lats = [d['lat'] for d in flood_data]
         lons = [d['lon'] for d in flood_data]
-        nearest_edges = ox.distance.nearest_edges(G, X=lons, Y=lats)
+        with span("nearest_edges"):
+            nearest_edges = ox.distance.nearest_edges(G, X=lons, Y=lats)
 
         speed_50_ms = 50 * 1000 / 3600
         speed_20_ms = 20 * 1000 / 3600
@@ -152,7 +320,8 @@ def get_flood_events_by_location():
             lons = [coord[1] for coord in location_coords.values()]
             locs_list = list(location_coords.keys())
             
-            nearest_edges = ox.distance.nearest_edges(G, X=lons, Y=lats)
+            with span("nearest_edges"):
+                nearest_edges = ox.distance.nearest_edges(G, X=lons, Y=lats)
             
             result = []
             for i, loc in enumerate(locs_list):
@@ -215,137 +384,203 @@ def extend_line(line, extension_m):
 
     return LineString([new_start] + coords[1:-1] + [new_end])
     
-def get_buses_affected_by_floods():
-    flood_id = request.args.get("flood_id")
+async def _fetch_bus_services(client, stop_id, headers, spans):
+    try:
+        with span("lta_bus_arrival", spans):
+            lta_resp = await lta_bus_arrival.get(client, LTA_BUS_ARRIVAL_URL, params={"BusStopCode": stop_id}, headers=headers)
+        if lta_resp.status_code == 200:
+            lta_data = lta_resp.json()
+            return [s.get("ServiceNo") for s in lta_data.get("Services", []) if s.get("ServiceNo")]
+    except Exception as e:
+        print(f"Error querying LTA for stop {stop_id}: {e}")
+    return []
 
-    if not flood_id:
-        return jsonify({'error': 'flood_id parameter is required'}), 400
+
+async def _buses_affected_payload(flood_event_ids, source):
+    """(payload, status) for /get_buses_affected_by_floods; shared by coalesced requests, so never mutated."""
+    route_index = get_bus_route_index() if source == "offline" else None
+    if route_index is None:
+        source = "lta"
+
+    valid_floods = flood_events_df[flood_events_df['flood_id'].isin(flood_event_ids)]
     
-    try:
-        flood_event_ids = [int(id.strip()) for id in flood_id.split(',')]
-    except ValueError:
-        return jsonify({'error': 'flood_id must be a comma-separated list of integers'}), 400
+    if valid_floods.empty:
+        return {"results": [], "source": source}, 200
 
-    all_results = []
+    # The geometry work is CPU-bound; keep it off the event loop other requests share.
+    matches = await asyncio.to_thread(_flood_stop_matches, valid_floods, route_index)
+    if matches is None:
+        return {"results": [], "source": source}, 200
+    if route_index is not None:
+        return {"results": matches, "source": source}, 200
 
-    try:
-        valid_floods = flood_events_df[flood_events_df['flood_id'].isin(flood_event_ids)]
-        
-        if valid_floods.empty:
-            return jsonify({"results": []}), 200
-        
-        flood_coords = []
-        flood_ids_valid = []
-        
-        for _, row in valid_floods.iterrows():
+    all_results = []
+    headers_lta = {"AccountKey": LTA_API_KEY, "accept": "application/json"}
+    spans = request_spans()
+    async with async_client(timeout=LTA_TIMEOUT_SEC) as lta_client:
+        for match in matches:
             try:
-                geom = wkb.loads(bytes.fromhex(row['geom']))
-                flood_coords.append((geom.y, geom.x))  # (lat, lon)
-                flood_ids_valid.append(row['flood_id'])
+                affected_services = set()
+                # One request per candidate stop, all in flight together on the shared client.
+                service_lists = await asyncio.gather(*(
+                    _fetch_bus_services(lta_client, stop["stop_code"], headers_lta, spans)
+                    for stop in match["candidate_stops"]
+                ))
+                for services in service_lists:
+                    affected_services.update(services)
+            
+                all_results.append({
+                    "flood_id": match["flood_id"],
+                    "affected_bus_services": sorted(list(affected_services)),
+                    "candidate_stops": match["candidate_stops"]
+                })
+            
             except Exception as e:
-                print(f"Could not parse geom for flood_id {row['flood_id']}: {e}")
-        
-        if not flood_coords:
-            return jsonify({"results": []}), 200
-        
-        lats, lons = zip(*flood_coords)
-        flood_points = gpd.GeoDataFrame(
-            geometry=[Point(lon, lat) for lat, lon in flood_coords],
-            crs="EPSG:4326"
-        )
-        
-        if "crs" in G.graph and G.graph["crs"]:
-            flood_points = flood_points.to_crs(G.graph["crs"])
-        
-        flood_xs = flood_points.geometry.x.tolist()
-        flood_ys = flood_points.geometry.y.tolist()
-        
+                print(f"Error processing flood_id {match['flood_id']}: {e}")
+                continue
+    return {"results": all_results, "source": source}, 200
+
+
+def _flood_stop_matches(valid_floods, route_index):
+    """Candidate stops per flood (and, with a route index, the affected services); None if no flood parses."""
+    flood_coords = []
+    flood_ids_valid = []
+    
+    for _, row in valid_floods.iterrows():
+        try:
+            geom = wkb.loads(bytes.fromhex(row['geom']))
+            flood_coords.append((geom.y, geom.x))  # (lat, lon)
+            flood_ids_valid.append(row['flood_id'])
+        except Exception as e:
+            print(f"Could not parse geom for flood_id {row['flood_id']}: {e}")
+    
+    if not flood_coords:
+        return None
+    
+    lats, lons = zip(*flood_coords)
+    flood_points = gpd.GeoDataFrame(
+        geometry=[Point(lon, lat) for lat, lon in flood_coords],
+        crs="EPSG:4326"
+    )
+    
+    if "crs" in G.graph and G.graph["crs"]:
+        flood_points = flood_points.to_crs(G.graph["crs"])
+    
+    flood_xs = flood_points.geometry.x.tolist()
+    flood_ys = flood_points.geometry.y.tolist()
+    
+    with span("nearest_edges"):
         nearest_edges = ox.distance.nearest_edges(G, X=flood_xs, Y=flood_ys)
-        
-        distance_threshold_m = 20
-        
+    
+    with span("to_crs"):
         stops_gdf_3414 = stops_gdf.to_crs("EPSG:3414")
+    
+    matches = []
+    for i, flood_event_id in enumerate(flood_ids_valid):
+        print(f"\nFlood ID {flood_event_id}: ({lats[i]}, {lons[i]})")
+    
+        try:
+            u, v, key = nearest_edges[i]
+            edge_data = G.get_edge_data(u, v, key)
         
-        headers_lta = {"AccountKey": LTA_API_KEY, "accept": "application/json"}
+            geom_obj = edge_data.get('geometry') if edge_data else None
         
-        for i, flood_event_id in enumerate(flood_ids_valid):
-            print(f"\nFlood ID {flood_event_id}: ({lats[i]}, {lons[i]})")
-            
-            try:
-                u, v, key = nearest_edges[i]
-                edge_data = G.get_edge_data(u, v, key)
-                
-                geom_obj = edge_data.get('geometry') if edge_data else None
-                
-                if geom_obj is None or str(geom_obj).lower() == "none":
-                    u_data = G.nodes[u]
-                    v_data = G.nodes[v]
-                    if "x" in u_data and "y" in u_data and "x" in v_data and "y" in v_data:
-                        flood_line = LineString([(u_data["x"], u_data["y"]), (v_data["x"], v_data["y"])])
-                        print(f"Edge {u}-{v} missing geometry; reconstructed from nodes.")
-                    else:
-                        print(f"Edge {u}-{v} missing coordinates, skipping.")
-                        continue
+            if geom_obj is None or str(geom_obj).lower() == "none":
+                u_data = G.nodes[u]
+                v_data = G.nodes[v]
+                if "x" in u_data and "y" in u_data and "x" in v_data and "y" in v_data:
+                    flood_line = LineString([(u_data["x"], u_data["y"]), (v_data["x"], v_data["y"])])
+                    print(f"Edge {u}-{v} missing geometry; reconstructed from nodes.")
                 else:
-                    flood_line = geom_obj
-                    print(f"Using real geometry for edge {u}-{v}")
-                
-                flood_gdf = gpd.GeoDataFrame(geometry=[flood_line], crs="EPSG:4326").to_crs("EPSG:3414")
-                extended_line = extend_line(flood_gdf.geometry.iloc[0], 100)
-                flood_gdf = gpd.GeoDataFrame(geometry=[extended_line], crs="EPSG:3414")
-                distance_threshold_m = 20
-                flood_buffer = flood_gdf.buffer(distance_threshold_m).unary_union
-                
+                    print(f"Edge {u}-{v} missing coordinates, skipping.")
+                    continue
+            else:
+                flood_line = geom_obj
+                print(f"Using real geometry for edge {u}-{v}")
+        
+            flood_gdf = gpd.GeoDataFrame(geometry=[flood_line], crs="EPSG:4326").to_crs("EPSG:3414")
+            extended_line = extend_line(flood_gdf.geometry.iloc[0], 100)
+            flood_gdf = gpd.GeoDataFrame(geometry=[extended_line], crs="EPSG:3414")
+            distance_threshold_m = 20
+            flood_buffer = flood_gdf.buffer(distance_threshold_m).unary_union
+        
+            with span("stop_match"):
                 candidate_stops = stops_gdf_3414[stops_gdf_3414.geometry.within(flood_buffer)]
-                print(f"Candidate stops near flood {flood_event_id}: {len(candidate_stops)}")
-                
-                stops_list = [
-                    {
-                        "stop_code": row["stop_code"],
-                        "stop_name": row["stop_name"],
-                        "stop_lat": row["stop_lat"],
-                        "stop_lon": row["stop_lon"],
-                        "distance_m": round(flood_gdf.distance(row.geometry).min(), 2)
-                    }
-                    for _, row in candidate_stops.iterrows()
-                ]
-                
+            print(f"Candidate stops near flood {flood_event_id}: {len(candidate_stops)}")
+        
+            stops_list = [
+                {
+                    "stop_code": row["stop_code"],
+                    "stop_name": row["stop_name"],
+                    "stop_lat": row["stop_lat"],
+                    "stop_lon": row["stop_lon"],
+                    "distance_m": round(flood_gdf.distance(row.geometry).min(), 2)
+                }
+                for _, row in candidate_stops.iterrows()
+            ]
+        
+            if route_index is not None:
+                # Services whose path crosses the flood, plus those that serve a nearby stop.
                 affected_services = set()
-                stop_codes = [item["stop_code"] for item in stops_list]
-                
-                from concurrent.futures import ThreadPoolExecutor, as_completed
-                
-                def fetch_bus_services(stop_id):
-                    try:
-                        lta_resp = requests.get(
-                            f"{LTA_BUS_ARRIVAL_URL}?BusStopCode={stop_id}",
-                            headers=headers_lta,
-                            timeout=5 
-                        )
-                        if lta_resp.status_code == 200:
-                            lta_data = lta_resp.json()
-                            return [s.get("ServiceNo") for s in lta_data.get("Services", []) if s.get("ServiceNo")]
-                    except Exception as e:
-                        print(f"Error querying LTA for stop {stop_id}: {e}")
-                    return []
-                
-                with ThreadPoolExecutor(max_workers=10) as executor:
-                    futures = {executor.submit(fetch_bus_services, stop_id): stop_id for stop_id in stop_codes}
-                    for future in as_completed(futures):
-                        services = future.result()
-                        affected_services.update(services)
-                
-                all_results.append({
+                with span("bus_route_index"):
+                    affected_services.update(route_index.services_intersecting(flood_buffer))
+                    affected_services.update(route_index.services_at_stops(item["stop_code"] for item in stops_list))
+                matches.append({
                     "flood_id": flood_event_id,
-                    "affected_bus_services": sorted(list(affected_services)),
+                    "affected_bus_services": sorted(affected_services),
                     "candidate_stops": stops_list
                 })
-                
-            except Exception as e:
-                print(f"Error processing flood_id {flood_event_id}: {e}")
-                continue
+            else:
+                matches.append({"flood_id": flood_event_id, "candidate_stops": stops_list})
         
-        return jsonify({"results": all_results}), 200
+        except Exception as e:
+            print(f"Error processing flood_id {flood_event_id}: {e}")
+            continue
+    return matches
+
+
+def _precomputed_buses_affected(flood_event_ids):
+    """The offline-source response assembled from per-flood precomputed results, or None if any is missing."""
+    store = get_precomputed()
+    if "buses_affected" not in store.tables:
+        return None
+    valid_ids = flood_events_df.loc[flood_events_df["flood_id"].isin(flood_event_ids), "flood_id"]
+    if valid_ids.empty:
+        return None
+    results = []
+    for flood_event_id in valid_ids:
+        hit = store.get("buses_affected", flood_event_id)
+        if hit is None:
+            return None
+        results.extend(hit[0])
+    return {"results": results, "source": "offline"}
+
+
+async def get_buses_affected_by_floods():
+    flood_id = request.args.get("flood_id")
+    source = request.args.get("source", "offline")
+
+    if not flood_id:
+        return jsonify({'error': 'flood_id parameter is required'}), 400
+    if source not in ("offline", "lta"):
+        return jsonify({'error': "source must be 'offline' or 'lta'"}), 400
+    
+    try:
+        flood_event_ids = [int(id.strip()) for id in flood_id.split(',')]
+    except ValueError:
+        return jsonify({'error': 'flood_id must be a comma-separated list of integers'}), 400
+
+    if source == "offline":
+        precomputed = _precomputed_buses_affected(flood_event_ids)
+        if precomputed is not None:
+            return jsonify(precomputed), 200
+
+    # Same floods in any order (or repeated) and same source give the same response.
+    key = (tuple(sorted(set(flood_event_ids))), source)
+    try:
+        payload, status = await buses_affected_flight.do_async(
+            key, lambda: _buses_affected_payload(flood_event_ids, source))
+        return jsonify(payload), status
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -394,7 +629,8 @@ def get_flood_events_by_date_range():
             print(f"Warning: could not parse geom at index {idx}: {e}")
     
     if valid_indices:
-        nearest_edges = ox.distance.nearest_edges(G, X=lons, Y=lats)
+        with span("nearest_edges"):
+            nearest_edges = ox.distance.nearest_edges(G, X=lons, Y=lats)
         
         speed_50_ms = 50 * 1000 / 3600 
         speed_20_ms = 20 * 1000 / 3600  
@@ -429,64 +665,162 @@ def get_flood_events_by_date_range():
         
     return jsonify(result), 200
 
-def get_critical_road_segments_near_flood():
-    try:
-        flood_id = request.args.get("flood_id")
-        buffer_m = float(request.args.get("buffer_m", 50))
+def _critical_segments_payload(flood_id, buffer_m):
+    """(payload, status) for /critical-segments; shared by coalesced requests, so never mutated."""
+    flood = flood_events_df[flood_events_df["flood_id"] == flood_id]
+    if flood.empty:
+        return {"error": f"Flood {flood_id} not found"}, 404
 
-        if not flood_id:
-            return jsonify({"error": "Missing flood_id"}), 400
+    flood_point = wkb.loads(bytes.fromhex(flood.iloc[0]["geom"]))
 
-        flood = flood_events_df[flood_events_df["flood_id"] == int(flood_id)]
-        if flood.empty:
-            return jsonify({"error": f"Flood {flood_id} not found"}), 404
+    centrality_store = get_centrality_store()
+    # Shared, cached frame and spatial index: only the edges near the flood are copied.
+    edges = get_edges_3414()
 
-        flood_point = wkb.loads(bytes.fromhex(flood.iloc[0]["geom"]))
+    flood_gdf = gpd.GeoDataFrame([{"geometry": flood_point}], crs="EPSG:4326").to_crs(epsg=3414)
+    flood_buffer = flood_gdf.buffer(buffer_m).iloc[0]
 
-        with open(f"Gcar_edge_closeness_centrality.pkl", "rb") as f:
-            centrality_data = pickle.load(f)
+    matches = edges.iloc[list(edges.sindex.intersection(flood_buffer.bounds))]
+    nearby_edges = matches[matches.intersects(flood_buffer)].copy()
 
-        edges = ox.graph_to_gdfs(G, nodes=False).reset_index().to_crs(epsg=3414)
-        edges["centrality"] = edges.apply(
-            lambda r: centrality_data.get((r["u"], r["v"], r["key"]), 0), axis=1
-        )
+    if nearby_edges.empty:
+        return {"message": "No critical roads near flood"}, 200
 
-        flood_gdf = gpd.GeoDataFrame([{"geometry": flood_point}], crs="EPSG:4326").to_crs(epsg=3414)
-        flood_buffer = flood_gdf.buffer(buffer_m).iloc[0]
+    with span("centrality_lookup"):
+        nearby_edges["centrality"] = centrality_store.lookup(nearby_edges[["u", "v", "key"]].to_numpy())
 
-        edges_sindex = edges.sindex
-        matches = edges.iloc[list(edges_sindex.intersection(flood_buffer.bounds))]
-        nearby_edges = matches[matches.intersects(flood_buffer)]
+    nearby_edges["norm_centrality"] = nearby_edges["centrality"] / nearby_edges["centrality"].max()
+    critical_subset = nearby_edges.sort_values(by="centrality", ascending=False).head(10)
 
-        if nearby_edges.empty:
-            return jsonify({"message": "No critical roads near flood"}), 200
+    results = [{
+        "road_name": row.get("name", "Unnamed Road"),
+        "road_type": row.get("highway", "Unknown"),
+        "length_m": round(row.get("length", 0), 2),
+        "centrality_score": round(row.get("centrality", 0), 6),
+        "geometry": mapping(row["geometry"])
+    } for _, row in critical_subset.iterrows()]
 
-        nearby_edges["norm_centrality"] = nearby_edges["centrality"] / nearby_edges["centrality"].max()
-        critical_subset = nearby_edges.sort_values(by="centrality", ascending=False).head(10)
+    count_critical_segments = len(critical_subset)
 
-        results = [{
-            "road_name": row.get("name", "Unnamed Road"),
-            "road_type": row.get("highway", "Unknown"),
-            "length_m": round(row.get("length", 0), 2),
-            "centrality_score": round(row.get("centrality", 0), 6),
-            "geometry": mapping(row["geometry"])
-        } for _, row in critical_subset.iterrows()]
+    return {
+        "flood_id": flood_id,
+        "buffer_m": buffer_m,
+        "flood_point": mapping(flood_point),
+        "count_critical_segments": count_critical_segments,
+        "critical_segments": results
+    }, 200
 
-        count_critical_segments = len(critical_subset)
 
-        return jsonify({
-            "flood_id": int(flood_id),
-            "buffer_m": buffer_m,
-            "flood_point": mapping(flood_point),
-            "count_critical_segments": count_critical_segments,
-            "critical_segments": results
-        }), 200
+def get_critical_road_segments_near_flood():
+    try:
+        flood_id = request.args.get("flood_id")
+        buffer_m = float(request.args.get("buffer_m", CRITICAL_SEGMENTS_DEFAULT_BUFFER_M))
+
+        if not flood_id:
+            return jsonify({"error": "Missing flood_id"}), 400
+        flood_id = int(flood_id)
+
+        precomputed = get_precomputed().get("critical_segments", flood_id, buffer_m)
+        if precomputed is not None:
+            payload, status = precomputed
+            return jsonify(payload), status
+
+        # Identical concurrent requests wait on one computation instead of each rebuilding the edge frame.
+        payload, status = critical_segments_flight.do(
+            (flood_id, buffer_m), lambda: _critical_segments_payload(flood_id, buffer_m))
+        return jsonify(payload), status
 
     except FileNotFoundError:
         return jsonify({"error": "Centrality file not found"}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+def first_value(value, default):
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return default if value is None or (isinstance(value, float) and math.isnan(value)) else value
+
+
+@lru_cache(maxsize=IMPACT_CACHE_SIZE)
+def compute_flood_impact(flood_id, buffer_m):
+    """Delay over every edge within buffer_m of a flood, or None if the flood is unknown.
+
+    Edges are directed, so both carriageways of a two-way road are counted.
+    """
+    points = get_flood_points_3414()
+    if flood_id not in points.index:
+        return None
+    point = points.loc[flood_id]
+    edges = get_edges_3414()
+    hit = edges.iloc[edges.sindex.query(point.buffer(buffer_m), predicate="intersects")]
+
+    lengths = hit["length"].to_numpy(dtype=float)
+    dry_min = lengths / (DRY_SPEED_KPH / 3.6) / 60
+    delay_min = {f"{kph}kph": lengths / (kph / 3.6) / 60 - dry_min for kph in FLOOD_SPEEDS_KPH}
+    distance_m = hit.geometry.distance(point).to_numpy()
+
+    order = np.argsort(-lengths, kind="stable")
+    names = hit["name"].to_numpy()[order]
+    highways = hit["highway"].to_numpy()[order]
+    geometries = hit.geometry.to_crs(epsg=4326).to_numpy()[order]
+    segments = [{
+        "u": int(u), "v": int(v), "key": int(k),
+        "road_name": first_value(name, "Unnamed Road"),
+        "road_type": first_value(highway, "Unknown"),
+        "length_m": round(float(length), 2),
+        "distance_m": round(float(distance), 1),
+        f"time_{DRY_SPEED_KPH}kmh_min": round(float(dry), 2),
+        "delay_min": {speed: round(float(delays[i]), 2) for speed, delays in delay_min.items()},
+        "geometry": mapping(geometry),
+    } for i, u, v, k, name, highway, length, distance, dry, geometry in zip(
+        order, hit["u"].to_numpy()[order], hit["v"].to_numpy()[order], hit["key"].to_numpy()[order],
+        names, highways, lengths[order], distance_m[order], dry_min[order], geometries)]
+
+    # The single nearest-edge model every other flood endpoint uses, for comparison.
+    nearest = get_flood_edge_index().get(flood_id, -1)
+    nearest_length = float(get_graph_arrays().edge_length[nearest]) if nearest >= 0 else 0.0
+    nearest_dry = nearest_length / (DRY_SPEED_KPH / 3.6) / 60
+
+    point_wgs84 = points.loc[[flood_id]].to_crs(epsg=4326).iloc[0]
+    return {
+        "flood_id": int(flood_id),
+        "buffer_m": buffer_m,
+        "flood_point": {"lat": point_wgs84.y, "lon": point_wgs84.x},
+        "edges_affected": len(segments),
+        "total_length_m": round(float(lengths.sum()), 2),
+        f"total_time_{DRY_SPEED_KPH}kmh_min": round(float(dry_min.sum()), 2),
+        "total_delay_min": {speed: round(float(delays.sum()), 2) for speed, delays in delay_min.items()},
+        "nearest_edge_delay_min": {
+            f"{kph}kph": round(nearest_length / (kph / 3.6) / 60 - nearest_dry, 2) for kph in FLOOD_SPEEDS_KPH
+        },
+        "segments": segments,
+    }
+
+
+def get_flood_impact():
+    flood_id = request.args.get("flood_id")
+    if not flood_id:
+        return jsonify({"error": "Missing flood_id"}), 400
+    try:
+        flood_id = int(flood_id)
+        buffer_m = float(request.args.get("buffer_m", IMPACT_DEFAULT_BUFFER_M))
+    except ValueError:
+        return jsonify({"error": "flood_id must be an integer and buffer_m a number"}), 400
+    if not 0 < buffer_m <= MAX_IMPACT_BUFFER_M:
+        return jsonify({"error": f"buffer_m must be between 0 and {MAX_IMPACT_BUFFER_M}"}), 400
+
+    try:
+        precomputed = get_precomputed().get("flood_impact", flood_id, round(buffer_m, 1))
+        if precomputed is not None:
+            payload, status = precomputed
+            return jsonify(payload), status
+        impact = compute_flood_impact(flood_id, round(buffer_m, 1))
+        if impact is None:
+            return jsonify({"error": f"Flood {flood_id} not found"}), 404
+        return jsonify(impact), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 def get_unique_flood_events_by_location():
     try:
         if flood_events_df.empty or 'flooded_location' not in flood_events_df.columns:
@@ -519,7 +853,8 @@ def get_unique_flood_events_by_location():
         lats = [d['lat'] for d in flood_data]
         lons = [d['lon'] for d in flood_data]
 
-        nearest_edges = ox.distance.nearest_edges(G, X=lons, Y=lats)
+        with span("nearest_edges"):
+            nearest_edges = ox.distance.nearest_edges(G, X=lons, Y=lats)
 
         speed_50_ms = 50 * 1000 / 3600  # m/s
         speed_20_ms = 20 * 1000 / 3600  # m/s
@@ -548,4 +883,62 @@ def get_unique_flood_events_by_location():
         return jsonify(result), 200
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+def get_flooded_critical_segments():
+    flood_ids_param = request.args.get("flood_ids")
+    if not flood_ids_param:
+        return jsonify({"error": "flood_ids parameter is required"}), 400
+    try:
+        flood_ids = sorted(set(int(id.strip()) for id in flood_ids_param.split(',')))
+        speed_kph = int(request.args.get("speed", 10))
+        top = int(request.args.get("top", 20))
+    except ValueError:
+        return jsonify({"error": "flood_ids must be comma-separated integers; speed and top must be integers"}), 400
+    if speed_kph not in FLOOD_SPEEDS_KPH:
+        return jsonify({"error": f"speed must be one of {', '.join(map(str, FLOOD_SPEEDS_KPH))}"}), 400
+
+    try:
+        flooded = flooded_edges_for(flood_ids)
+        if not flooded:
+            return jsonify({"error": "Flood event(s) not found"}), 404
+
+        engine = get_centrality_engine()
+        closeness, stats = engine.flooded(flooded, speed_kph)
+        delta = closeness - engine.dry_closeness
+        try:
+            snapshot = get_centrality_snapshot()
+        except FileNotFoundError:
+            snapshot = None
+
+        graph_arrays = get_graph_arrays()
+        order = np.argsort(-np.abs(delta))[:max(top, 0)]
+        changed = []
+        for e in order:
+            if delta[e] == 0:
+                break
+            u, v, key = (int(x) for x in graph_arrays.edge_ids[e])
+            edge_data = G.get_edge_data(u, v, key) or {}
+            changed.append({
+                "u": u, "v": v, "key": key,
+                "road_name": first_value(edge_data.get("name"), "Unnamed Road"),
+                "road_type": first_value(edge_data.get("highway"), "Unknown"),
+                "flooded": bool(e in flooded),
+                "dry_centrality": round(float(engine.dry_closeness[e]), 8),
+                "flooded_centrality": round(float(closeness[e]), 8),
+                "delta": round(float(delta[e]), 8),
+                "snapshot_centrality": None if snapshot is None else round(float(snapshot[e]), 8),
+            })
+
+        return jsonify({
+            "flood_ids": flood_ids,
+            "speed_kph": speed_kph,
+            "flooded_edges": len(flooded),
+            **stats,
+            "edges_changed": int(np.count_nonzero(delta)),
+            "mean_abs_delta": round(float(np.abs(delta).mean()), 10),
+            "changed_segments": changed,
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
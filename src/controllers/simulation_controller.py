@@ -0,0 +1,189 @@
+from flask import jsonify, request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+import geopandas as gpd
+import shapely
+from shapely.geometry import Point, shape, mapping
+
+from src.controllers.flood_events_controller import (
+    get_edges_3414, get_centrality_store, get_bus_route_index, stops_gdf, FLOOD_SPEEDS_KPH, first_value
+)
+from src.utils.graph_arrays import DRY_SPEED_KPH
+from src.utils.simulation_store import SimulationStore
+
+DEFAULT_POINT_RADIUS_M = 50
+MAX_RADIUS_M = 1000
+MAX_POLYGON_AREA_KM2 = 25
+STOP_MATCH_M = 20
+CRITICAL_SEGMENTS_TOP = 10
+MAX_SIMULATION_JOBS = 500
+COORD_DECIMALS = 6
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("SIMULATION_WORKERS", 2)),
+                               thread_name_prefix="simulation")
+_store_lock = threading.Lock()
+_store = None
+
+
+def normalize_simulation_input(body):
+    """(normalized dict, error). Equivalent inputs normalize to the same dict."""
+    if not isinstance(body, dict):
+        return None, "Request body must be an object with a 'point' or a 'polygon'"
+
+    try:
+        if body.get("point") is not None and body.get("polygon") is not None:
+            return None, "Give either 'point' or 'polygon', not both"
+        if body.get("point") is not None:
+            point = body["point"]
+            lat, lon = float(point["lat"]), float(point["lon"])
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                return None, "point lat/lon out of range"
+            geometry = Point(round(lon, COORD_DECIMALS), round(lat, COORD_DECIMALS))
+            radius_m = float(body.get("radius_m", DEFAULT_POINT_RADIUS_M))
+        elif body.get("polygon") is not None:
+            geometry = shape(body["polygon"])
+            if geometry.geom_type != "Polygon" or not geometry.is_valid:
+                return None, "polygon must be a valid GeoJSON Polygon"
+            geometry = shapely.normalize(shapely.set_precision(geometry, 10 ** -COORD_DECIMALS))
+            radius_m = float(body.get("radius_m", 0))
+        else:
+            return None, "Request body needs a 'point' {lat, lon} or a GeoJSON 'polygon'"
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return None, f"Invalid flood geometry: {e}"
+
+    if geometry.geom_type == "Polygon":
+        area_km2 = gpd.GeoSeries([geometry], crs="EPSG:4326").to_crs(epsg=3414).area.iloc[0] / 1e6
+        if area_km2 > MAX_POLYGON_AREA_KM2:
+            return None, f"polygon must be smaller than {MAX_POLYGON_AREA_KM2} km2"
+    if not 0 <= radius_m <= MAX_RADIUS_M or (geometry.geom_type == "Point" and radius_m == 0):
+        return None, f"radius_m must be between 0 and {MAX_RADIUS_M} (and above 0 for a point)"
+
+    return {"geometry": geometry.wkt, "radius_m": round(radius_m, 1)}, None
+
+
+def simulation_id(normalized):
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def run_simulation(normalized):
+    """Snapping, affected edges, affected stops and critical segments for a hypothetical flood."""
+    flood_area = gpd.GeoSeries([shapely.from_wkt(normalized["geometry"])], crs="EPSG:4326").to_crs(epsg=3414)
+    flood_shape = flood_area.iloc[0]
+    area = flood_shape.buffer(normalized["radius_m"]) if normalized["radius_m"] else flood_shape
+
+    edges = get_edges_3414()
+    nearest_idx, nearest_dist = edges.sindex.nearest(flood_shape, return_distance=True, return_all=False)
+    nearest = edges.iloc[int(nearest_idx[1][0])]
+    snapped_edge = {
+        "u": int(nearest["u"]), "v": int(nearest["v"]), "key": int(nearest["key"]),
+        "road_name": first_value(nearest["name"], "Unnamed Road"),
+        "distance_m": round(float(nearest_dist[0]), 1),
+    }
+
+    hit = edges.iloc[edges.sindex.query(area, predicate="intersects")]
+    lengths = hit["length"].to_numpy(dtype=float)
+    dry_min = lengths / (DRY_SPEED_KPH / 3.6) / 60
+    total_delay_min = {
+        f"{kph}kph": round(float((lengths / (kph / 3.6) / 60 - dry_min).sum()), 2) for kph in FLOOD_SPEEDS_KPH
+    }
+
+    try:
+        centrality = get_centrality_store().lookup(hit[["u", "v", "key"]].to_numpy())
+    except FileNotFoundError:
+        centrality = np.zeros(len(hit))
+    critical_segments = [{
+        "u": int(row.u), "v": int(row.v), "key": int(row.key),
+        "road_name": first_value(row.name, "Unnamed Road"),
+        "road_type": first_value(row.highway, "Unknown"),
+        "length_m": round(float(row.length), 2),
+        "centrality_score": round(float(score), 6),
+    } for row, score in sorted(zip(hit.itertuples(index=False), centrality),
+                               key=lambda pair: -pair[1])[:CRITICAL_SEGMENTS_TOP]]
+
+    affected_stops = []
+    if not hit.empty:
+        _, stop_idx = stops_gdf.sindex.query(hit.geometry.buffer(STOP_MATCH_M), predicate="intersects")
+        stops = stops_gdf.iloc[np.unique(stop_idx)]
+        distances = stops.geometry.distance(flood_shape).to_numpy()
+        affected_stops = [{
+            "stop_code": str(code).zfill(5),
+            "stop_name": name,
+            "distance_m": round(float(distance), 1),
+        } for code, name, distance in sorted(zip(stops["stop_code"], stops["stop_name"], distances),
+                                             key=lambda stop: stop[2])]
+
+    route_index = get_bus_route_index()
+    affected_services = None
+    if route_index is not None:
+        affected_services = sorted(set(route_index.services_intersecting(area))
+                                   | set(route_index.services_at_stops(s["stop_code"] for s in affected_stops)))
+
+    return {
+        "flood_area": mapping(gpd.GeoSeries([area], crs="EPSG:3414").to_crs(epsg=4326).iloc[0]),
+        "snapped_edge": snapped_edge,
+        "edges_affected": len(hit),
+        "total_length_m": round(float(lengths.sum()), 2),
+        f"total_time_{DRY_SPEED_KPH}kmh_min": round(float(dry_min.sum()), 2),
+        "total_delay_min": total_delay_min,
+        "critical_segments": critical_segments,
+        "stops_affected": len(affected_stops),
+        "affected_stops": affected_stops,
+        "affected_bus_services": affected_services,
+    }
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def get_simulation_store():
+    """Job state shared by every worker process (see src.utils.simulation_store)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SimulationStore(max_jobs=MAX_SIMULATION_JOBS)
+    return _store
+
+
+def _run_job(job_id, normalized):
+    store = get_simulation_store()
+    store.update(job_id, status="running", started_at=_now())
+    try:
+        result, error = run_simulation(normalized), None
+    except Exception as e:
+        print(f"Simulation {job_id} failed: {e}")
+        result, error = None, str(e)
+    store.update(job_id, status="failed" if error else "done", result=result, error=error, finished_at=_now())
+
+
+def create_simulation():
+    normalized, error = normalize_simulation_input(request.get_json(silent=True))
+    if error:
+        return jsonify({"error": error}), 400
+
+    job_id = simulation_id(normalized)
+    try:
+        job, queued = get_simulation_store().submit(job_id, normalized, _now())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if not queued:
+        return jsonify({"id": job_id, "status": job["status"], "cached": True}), 200 if job["status"] == "done" else 202
+
+    _executor.submit(_run_job, job_id, normalized)
+    return jsonify({"id": job_id, "status": "queued", "cached": False}), 202
+
+
+def get_simulation(simulation_id):
+    try:
+        job = get_simulation_store().get(simulation_id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if job is None:
+        return jsonify({"error": f"Simulation {simulation_id} not found"}), 404
+    return jsonify(job), 200
@@ -0,0 +1,184 @@
+from functools import lru_cache
+from flask import Response, jsonify
+import osmnx as ox
+import geopandas as gpd
+import mapbox_vector_tile
+import math
+import threading
+from shapely import wkb
+from shapely.geometry import box
+
+from src.controllers.flood_events_controller import G, flood_events_df, get_centrality_store
+
+
+TILE_EXTENT = 4096
+TILE_BUFFER_PX = 64
+TILE_CACHE_SIZE = 4096
+MAX_TILE_ZOOM = 22
+WEB_MERCATOR_HALF_WORLD = 20037508.342789244
+FLOOD_BUFFER_M = 50
+
+SPEED_50_MS = 50 * 1000 / 3600
+SPEED_20_MS = 20 * 1000 / 3600
+
+# Below these zooms only the larger road classes are drawn, so country-wide
+# tiles stay small.
+MIN_ZOOM_BY_HIGHWAY = {
+    "motorway": 0, "motorway_link": 10,
+    "trunk": 0, "trunk_link": 11,
+    "primary": 8, "primary_link": 12,
+    "secondary": 10, "secondary_link": 13,
+    "tertiary": 11, "tertiary_link": 13,
+}
+DEFAULT_MIN_ZOOM = 13
+
+_edges_lock = threading.Lock()
+_tile_edges = None
+
+
+def _first(value):
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _min_zoom_for(highway):
+    return MIN_ZOOM_BY_HIGHWAY.get(highway, DEFAULT_MIN_ZOOM)
+
+
+def _build_tile_edges():
+    """Edges of G in EPSG:3857 with the attributes carried into every tile."""
+    edges = ox.graph_to_gdfs(G, nodes=False, fill_edge_geometry=True).reset_index()
+
+    try:
+        edges["centrality"] = get_centrality_store().lookup(edges[["u", "v", "key"]].to_numpy())
+    except FileNotFoundError as e:
+        print(f"Warning: {e}, tiles will carry zero centrality")
+        edges["centrality"] = 0.0
+    edges["highway"] = edges["highway"].map(_first).fillna("unclassified").astype(str)
+    edges["name"] = edges["name"].map(_first).fillna("").astype(str) if "name" in edges else ""
+    edges["min_zoom"] = edges["highway"].map(_min_zoom_for)
+
+    edges_3414 = edges.to_crs(epsg=3414)
+    flood_points = []
+    for geom_hex in flood_events_df["geom"].dropna():
+        try:
+            flood_points.append(wkb.loads(bytes.fromhex(geom_hex)))
+        except Exception as e:
+            print(f"Warning: could not parse flood geom for tiles: {e}")
+
+    edges["flood_exposed"] = False
+    if flood_points:
+        flood_buffers = gpd.GeoSeries(flood_points, crs="EPSG:4326").to_crs(epsg=3414).buffer(FLOOD_BUFFER_M)
+        _, edge_idx = edges_3414.sindex.query(flood_buffers, predicate="intersects")
+        edges.loc[edges.index[edge_idx], "flood_exposed"] = True
+
+    delay_per_m = (1 / SPEED_20_MS - 1 / SPEED_50_MS) / 60
+    edges["flood_delay_min"] = (edges["length"] * delay_per_m).where(edges["flood_exposed"], 0).round(2)
+
+    columns = ["u", "v", "key", "highway", "name", "centrality", "flood_exposed",
+               "flood_delay_min", "min_zoom", "geometry"]
+    return edges[columns].to_crs(epsg=3857)
+
+
+def get_tile_edges():
+    global _tile_edges
+    if _tile_edges is None:
+        with _edges_lock:
+            if _tile_edges is None:
+                _tile_edges = _build_tile_edges()
+    return _tile_edges
+
+
+def tile_bounds(z, x, y):
+    """Web Mercator bounds (minx, miny, maxx, maxy) of an XYZ tile."""
+    tile_size = 2 * WEB_MERCATOR_HALF_WORLD / (2 ** z)
+    minx = -WEB_MERCATOR_HALF_WORLD + x * tile_size
+    maxy = WEB_MERCATOR_HALF_WORLD - y * tile_size
+    return minx, maxy - tile_size, minx + tile_size, maxy
+
+
+@lru_cache(maxsize=TILE_CACHE_SIZE)
+def render_road_tile(z, x, y):
+    edges = get_tile_edges()
+    bounds = tile_bounds(z, x, y)
+    pixel_m = (bounds[2] - bounds[0]) / TILE_EXTENT
+    margin = pixel_m * TILE_BUFFER_PX
+    query_box = box(bounds[0] - margin, bounds[1] - margin, bounds[2] + margin, bounds[3] + margin)
+
+    candidates = edges.iloc[edges.sindex.query(query_box, predicate="intersects")]
+    candidates = candidates[candidates["min_zoom"] <= z]
+    if candidates.empty:
+        return b""
+
+    geometries = candidates.geometry.intersection(query_box)
+    if z < 14:
+        geometries = geometries.simplify(pixel_m)
+
+    features = []
+    for row, geometry in zip(candidates.itertuples(index=False), geometries):
+        if geometry.is_empty:
+            continue
+        features.append({
+            "geometry": geometry,
+            "properties": {
+                "u": int(row.u),
+                "v": int(row.v),
+                "key": int(row.key),
+                "highway": row.highway,
+                "name": row.name,
+                "centrality": round(row.centrality, 6),
+                "flood_exposed": bool(row.flood_exposed),
+                "flood_delay_min": float(row.flood_delay_min),
+            },
+        })
+
+    if not features:
+        return b""
+
+    return mapbox_vector_tile.encode(
+        [{"name": "roads", "features": features}],
+        default_options={"quantize_bounds": bounds, "extents": TILE_EXTENT},
+    )
+
+
+def get_road_tile(z, x, y):
+    if z < 0 or z > MAX_TILE_ZOOM:
+        return jsonify({"error": f"z must be between 0 and {MAX_TILE_ZOOM}"}), 400
+    if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({"error": "x and y are outside the tile grid for this zoom"}), 400
+
+    try:
+        tile = render_road_tile(z, x, y)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    if not tile:
+        return Response(status=204)
+
+    response = Response(tile, mimetype="application/vnd.mapbox-vector-tile")
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return response
+
+
+def lonlat_to_tile(lon, lat, z):
+    lat_rad = math.radians(lat)
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def warm_tile_cache(max_zoom=12):
+    """Render every tile covering the network up to max_zoom into the cache."""
+    minx, miny, maxx, maxy = get_tile_edges().to_crs(epsg=4326).total_bounds
+    rendered = 0
+    for z in range(max_zoom + 1):
+        x0, y0 = lonlat_to_tile(minx, maxy, z)
+        x1, y1 = lonlat_to_tile(maxx, miny, z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                render_road_tile(z, x, y)
+                rendered += 1
+    print(f"Pre-generated {rendered} road tiles up to zoom {max_zoom}")
+    return rendered
@@ -1,5 +1,15 @@
 from src.database import supabase
 from flask import jsonify, request
+from datetime import datetime, timezone
+import threading
+import numpy as np
+import osmnx as ox
+import geopandas as gpd
+from shapely import wkb
+from shapely.geometry import LineString
+from src.controllers.flood_events_controller import G, flood_events_df, stops_gdf, extend_line, get_graph_arrays
+from src.controllers.car_trips_controller import get_car_trip_area_matrix_cached
+from src.controllers.bus_controller import load_bus_trip_columns
 
 def get_all_road_max_traffic_flow():
     response = supabase.table('road_max_traffic_flow').select('*').execute()
@@ -26,4 +36,186 @@ def get_road_max_traffic_flow_by_id():
     if not response.data or len(response.data) == 0:
         return jsonify({'error': 'Road(s) not found'}), 404
 
-    return jsonify(response.data), 200
\ No newline at end of file
+    return jsonify(response.data), 200
+
+SUMMARY_MODES = ("car", "bus", "walk")
+# Frontend scenarios mapped onto the simulated speeds of each dataset.
+SUMMARY_SCENARIOS = {
+    "baseline": {"flood_kmh": 20, "car": "20kph", "bus": "12kmh"},
+    "worst_case": {"flood_kmh": 5, "car": "5kph", "bus": "5kmh"},
+}
+DRY_SPEED_KMH = 50
+STOP_DISTANCE_THRESHOLD_M = 20
+FLOOD_EDGE_EXTENSION_M = 100
+SUMMARY_REFRESH_MINUTES = 30
+
+_summary_lock = threading.Lock()
+# Held for a whole rebuild so the scheduler and cold-start requests never build at once.
+_summary_build_lock = threading.Lock()
+_summary_snapshot = None
+
+
+def _flood_edge_frame():
+    """Nearest edge of every flood event with its length, name and geometry."""
+    floods = []
+    for _, row in flood_events_df.iterrows():
+        try:
+            geom = wkb.loads(bytes.fromhex(row["geom"]))
+            floods.append((row["flood_id"], geom.x, geom.y))
+        except Exception as e:
+            print(f"Warning: could not parse geom for flood_id {row['flood_id']}: {e}")
+
+    flood_ids, lons, lats = zip(*floods) if floods else ((), (), ())
+    nearest = ox.distance.nearest_edges(G, X=list(lons), Y=list(lats)) if floods else []
+
+    records = []
+    for flood_id, (u, v, key) in zip(flood_ids, nearest):
+        edge_data = G.get_edge_data(u, v, key)
+        geometry = edge_data.get("geometry")
+        if geometry is None:
+            geometry = LineString([(G.nodes[u]["x"], G.nodes[u]["y"]), (G.nodes[v]["x"], G.nodes[v]["y"])])
+        records.append({
+            "flood_id": int(flood_id),
+            "u": u, "v": v, "key": key,
+            "road_name": edge_data.get("name", "Unknown"),
+            "length_m": edge_data.get("length", 0),
+            "geometry": geometry,
+        })
+    return gpd.GeoDataFrame(records, geometry="geometry", crs="EPSG:4326")
+
+
+def _affected_bus_services(flood_edges):
+    """Route IDs serving a stop within 20 m of an (extended) flooded edge."""
+    if flood_edges.empty:
+        return []
+    lines = flood_edges.to_crs(epsg=3414).geometry.map(lambda line: extend_line(line, FLOOD_EDGE_EXTENSION_M))
+    buffers = gpd.GeoSeries(lines, crs="EPSG:3414").buffer(STOP_DISTANCE_THRESHOLD_M)
+    _, stop_idx = stops_gdf.sindex.query(buffers, predicate="intersects")
+    stop_codes = sorted(set(stops_gdf.iloc[stop_idx]["stop_code"].astype(str).str.zfill(5)))
+    if not stop_codes:
+        return []
+
+    route_ids = set()
+    for i in range(0, len(stop_codes), 100):
+        chunk = stop_codes[i:i + 100]
+        response = supabase.table("bus_trip_segment").select("route_id") \
+            .in_("origin_stop_id", chunk).execute()
+        route_ids.update(row["route_id"] for row in response.data or [] if row.get("route_id"))
+    return sorted(route_ids)
+
+
+def _mean_car_delay_sec(speed):
+    matrix = get_car_trip_area_matrix_cached()["matrix"]
+    weighted = [(c["delays"][speed]["mean"], c["trip_count"]) for c in matrix["cells"]
+                if c["delays"][speed]["mean"] is not None]
+    total = sum(count for _, count in weighted)
+    return round(sum(mean * count for mean, count in weighted) / total, 1) if total else None
+
+
+def _mean_bus_delay_sec(speed):
+    delays = load_bus_trip_columns()["delays"][speed]
+    delays = delays[~np.isnan(delays)]
+    return round(float(delays.mean()), 1) if delays.size else None
+
+
+def build_traffic_summary():
+    flood_edges = _flood_edge_frame()
+    unique_edges = flood_edges.drop_duplicates(subset=["u", "v", "key"])
+    total_edges = G.number_of_edges()
+    bus_services = _affected_bus_services(flood_edges)
+
+    kpis = {}
+    for scenario, speeds in SUMMARY_SCENARIOS.items():
+        delay_per_m = (3.6 / speeds["flood_kmh"] - 3.6 / DRY_SPEED_KMH) / 60
+        edge_delays = unique_edges["length_m"].astype(float) * delay_per_m
+        top = unique_edges.loc[edge_delays.idxmax()] if not unique_edges.empty else None
+        top_segment_id = None if top is None else \
+            int(get_graph_arrays().edge_index([(top["u"], top["v"], top["key"])])[0])
+
+        for mode in SUMMARY_MODES:
+            if mode == "car":
+                mean_delay = _safe(_mean_car_delay_sec, speeds["car"])
+            elif mode == "bus":
+                mean_delay = _safe(_mean_bus_delay_sec, speeds["bus"])
+            else:
+                mean_delay = None
+
+            kpis.setdefault(mode, {})[scenario] = {
+                "flood_count": int(len(flood_edges)),
+                "affected_edges": int(len(unique_edges)),
+                "affected_ratio": round(len(unique_edges) / total_edges, 6) if total_edges else 0,
+                "total_delay_min": round(float(edge_delays.sum()), 2),
+                "top_segment": None if top is None else {
+                    "segment_id": top_segment_id,
+                    "flood_id": int(top["flood_id"]),
+                    "road_name": top["road_name"] if isinstance(top["road_name"], str) else "Unknown",
+                    "delay_min": round(float(edge_delays.max()), 2),
+                },
+                "affected_bus_services": len(bus_services),
+                "impacted_bus_count": len(bus_services),
+                "mean_delay_sec": mean_delay,
+                "flood_speed_kmh": speeds["flood_kmh"],
+                "simulated_speed": speeds.get(mode),
+            }
+    return kpis
+
+
+def _safe(fn, *args):
+    try:
+        return fn(*args)
+    except Exception as e:
+        print(f"Warning: traffic summary KPI {fn.__name__} failed: {e}")
+        return None
+
+
+def refresh_traffic_summary():
+    """Rebuild the KPI snapshot and swap it in under a new version number."""
+    with _summary_build_lock:
+        return _rebuild_traffic_summary()
+
+
+def get_traffic_summary_snapshot():
+    """The current snapshot; the first caller before any refresh has finished builds it, the rest wait."""
+    snapshot = _summary_snapshot
+    if snapshot is None:
+        with _summary_build_lock:
+            snapshot = _summary_snapshot or _rebuild_traffic_summary()
+    return snapshot
+
+
+def _rebuild_traffic_summary():
+    global _summary_snapshot
+    kpis = build_traffic_summary()
+    with _summary_lock:
+        version = (_summary_snapshot["version"] + 1) if _summary_snapshot else 1
+        _summary_snapshot = {
+            "version": version,
+            "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "kpis": kpis,
+        }
+    print(f"Traffic summary snapshot v{version} built")
+    return _summary_snapshot
+
+
+def get_traffic_summary():
+    mode = request.args.get("mode", "car")
+    scenario = request.args.get("scenario", "baseline")
+    if mode not in SUMMARY_MODES:
+        return jsonify({"error": f"mode must be one of {', '.join(SUMMARY_MODES)}"}), 400
+    if scenario not in SUMMARY_SCENARIOS:
+        return jsonify({"error": f"scenario must be one of {', '.join(SUMMARY_SCENARIOS)}"}), 400
+
+    try:
+        snapshot = get_traffic_summary_snapshot()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    response = jsonify({
+        "mode": mode,
+        "scenario": scenario,
+        "version": snapshot["version"],
+        "built_at": snapshot["built_at"],
+        **snapshot["kpis"][mode][scenario],
+    })
+    response.headers["ETag"] = f'"summary-v{snapshot["version"]}"'
+    return response, 200
@@ -146,4 +146,53 @@ bus_trips_delayed_example = {
             ]
         }
     ]
-}
\ No newline at end of file
+}
+bus_trip_segment_delay_batch_example = {
+    "count": 2,
+    "found": 1,
+    "results": [
+        {
+            "start_stop": "01013",
+            "end_stop": "60121",
+            "found": True,
+            "non_flooded_bus_duration": 203,
+            "origin_stop_id": "01013",
+            "destination_stop_id": "60121",
+            "flooded_durations": {"5kmh": 303, "10kmh": 251, "20kmh": 224},
+            "delays": {"5kmh": 100, "10kmh": 48, "20kmh": 21}
+        },
+        {
+            "start_stop": "01012",
+            "end_stop": "99999",
+            "found": False,
+            "error": "No matching bus trip segment found for the given stops."
+        }
+    ]
+}
+
+bus_trip_delay_summary_example = {
+    "start_area_code": "BK",
+    "end_area_code": None,
+    "trip_count": 1204,
+    "unit": "seconds",
+    "baseline": "non_flooded_total_duration",
+    "bin_edges": [0.0, 150.0, 300.0, 450.0],
+    "scenarios": {
+        "5kmh": {
+            "count": 1204,
+            "mean": 268.4,
+            "min": 12.0,
+            "max": 449.0,
+            "percentiles": {"p50": 251.0, "p75": 330.0, "p90": 401.0, "p95": 422.0, "p99": 445.0},
+            "histogram": [240, 610, 354]
+        },
+        "12kmh": {
+            "count": 1204,
+            "mean": 98.2,
+            "min": 4.0,
+            "max": 170.0,
+            "percentiles": {"p50": 92.0, "p75": 121.0, "p90": 150.0, "p95": 160.0, "p99": 168.0},
+            "histogram": [1100, 104, 0]
+        }
+    }
+}
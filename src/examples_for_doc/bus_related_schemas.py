@@ -157,4 +157,59 @@ bus_delayed_schema = {"type": "object",
             }
         }
     }
-}
\ No newline at end of file
+}
+
+bus_trip_segment_delay_batch_request_schema = {
+    "type": "object",
+    "properties": {
+        "pairs": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "start_stop": {"type": "string", "description": "Origin stop code"},
+                    "end_stop": {"type": "string", "description": "Destination stop code"}
+                }
+            }
+        }
+    }
+}
+
+bus_trip_segment_delay_batch_schema = {
+    "type": "object",
+    "properties": {
+        "count": {"type": "integer", "description": "Number of pairs in the request"},
+        "found": {"type": "integer", "description": "Number of pairs with a matching segment"},
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "start_stop": {"type": "string", "description": "Origin stop code"},
+                    "end_stop": {"type": "string", "description": "Destination stop code"},
+                    "found": {"type": "boolean", "description": "False when no segment exists for this pair"},
+                    "error": {"type": "string", "description": "Not-found message, only present when found is false"},
+                    "non_flooded_bus_duration": {"type": "integer", "description": "Non-flooded bus duration"},
+                    "origin_stop_id": {"type": "string", "description": "Origin stop ID"},
+                    "destination_stop_id": {"type": "string", "description": "Destination stop ID"},
+                    "flooded_durations": {
+                        "type": "object",
+                        "properties": {
+                            "5kmh": {"type": "integer", "description": "Flooded bus duration at 5km/h"},
+                            "10kmh": {"type": "integer", "description": "Flooded bus duration at 10km/h"},
+                            "20kmh": {"type": "integer", "description": "Flooded bus duration at 20km/h"}
+                        }
+                    },
+                    "delays": {
+                        "type": "object",
+                        "properties": {
+                            "5kmh": {"type": "integer", "description": "Delay at 5km/h"},
+                            "10kmh": {"type": "integer", "description": "Delay at 10km/h"},
+                            "20kmh": {"type": "integer", "description": "Delay at 20km/h"}
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
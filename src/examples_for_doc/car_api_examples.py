@@ -39,4 +39,91 @@ car_trips_example = [
         "81kph_total_duration": 1328.11506274635,
         "90kph_total_duration": 1328.11506274635,
     }
-]
\ No newline at end of file
+]
+car_trip_area_matrix_example = {
+    "baseline_speed": "90kph",
+    "scenarios": ["5kph", "10kph", "20kph", "45kph", "72kph", "81kph"],
+    "unit": "seconds",
+    "trip_count": 2,
+    "area_codes": ["BK", "NT"],
+    "built_at": "2025-10-01T09:00:00",
+    "cells": [
+        {
+            "start_area_code": "BK",
+            "end_area_code": "NT",
+            "trip_count": 2,
+            "delays": {
+                "5kph": {"mean": 412.3, "median": 412.3, "p95": 430.1},
+                "10kph": {"mean": 190.7, "median": 190.7, "p95": 201.2},
+                "20kph": {"mean": 82.4, "median": 82.4, "p95": 88.0},
+                "45kph": {"mean": 21.6, "median": 21.6, "p95": 23.1},
+                "72kph": {"mean": 4.2, "median": 4.2, "p95": 4.6},
+                "81kph": {"mean": 1.9, "median": 1.9, "p95": 2.1}
+            }
+        }
+    ]
+}
+
+flood_travel_time_example = {
+    "start_node_id": 1743861070,
+    "end_node_id": 240701697,
+    "snap_distance_m": [12.4, 8.1],
+    "dry_total_duration": 1104.6,
+    "dry_distance_m": 14210.3,
+    "flooded_edges_on_dry_path": 1,
+    "flooded_edge_count": 181,
+    "scenarios": {
+        "5kph": {"total_duration": 1163.2, "delay": 58.6, "rerouted": True},
+        "10kph": {"total_duration": 1140.9, "delay": 36.3, "rerouted": False},
+        "20kph": {"total_duration": 1122.7, "delay": 18.1, "rerouted": False},
+        "45kph": {"total_duration": 1106.6, "delay": 2.0, "rerouted": False}
+    },
+    "query_ms": 14.2
+}
+
+isochrone_example = {
+    "source_node_id": 1145435573,
+    "snap_distance_m": 18.4,
+    "minutes": 15,
+    "speed_kph": 10,
+    "flood_ids": [12],
+    "buffer_m": 50,
+    "flooded_edge_count": 6,
+    "dry": {
+        "reachable_nodes": 2841,
+        "area_km2": 38.214,
+        "polygon": {"type": "Polygon", "coordinates": [[[103.7712, 1.3101], [103.8205, 1.3089], [103.8149, 1.3544], [103.7712, 1.3101]]]}
+    },
+    "flooded": {
+        "reachable_nodes": 2617,
+        "area_km2": 34.902,
+        "polygon": {"type": "Polygon", "coordinates": [[[103.7731, 1.3112], [103.8177, 1.3101], [103.8121, 1.3498], [103.7731, 1.3112]]]}
+    },
+    "area_lost_km2": 3.312,
+    "area_lost_pct": 8.7,
+    "lost_polygon": {"type": "MultiPolygon", "coordinates": [[[[103.8149, 1.3544], [103.8121, 1.3498], [103.8177, 1.3101], [103.8149, 1.3544]]]]},
+    "dry_tree_cached": True,
+    "flooded_tree_recomputed": True,
+    "query_ms": 41.7
+}
+
+travel_time_matrix_example = {
+    "units": "seconds",
+    "origins": [{"node_id": 1145435573, "snap_distance_m": 12.3}],
+    "destinations": [
+        {"node_id": 6749812859, "snap_distance_m": 8.1},
+        {"node_id": 25451929, "snap_distance_m": 21.7}
+    ],
+    "flood_ids": [12],
+    "buffer_m": 50,
+    "flooded_edge_count": 6,
+    "recomputed_origins": 1,
+    "dry": [[412.6, 655.0]],
+    "flooded": {
+        "5kph": [[538.9, 655.0]],
+        "10kph": [[497.2, 655.0]],
+        "20kph": [[455.8, 655.0]],
+        "45kph": [[414.1, 655.0]]
+    },
+    "query_ms": 84.2
+}
@@ -82,4 +82,25 @@ car_trips_schema = {
         }
         
     }
-}
\ No newline at end of file
+}
+
+_matrix_point_schema = {
+    "type": "object",
+    "properties": {
+        "lat": {"type": "number", "description": "Latitude (WGS84)"},
+        "lon": {"type": "number", "description": "Longitude (WGS84)"},
+        "stop_code": {"type": "string", "description": "Bus stop code, used instead of lat/lon"}
+    }
+}
+
+travel_time_matrix_request_schema = {
+    "type": "object",
+    "required": ["origins", "destinations"],
+    "properties": {
+        "origins": {"type": "array", "items": _matrix_point_schema, "description": "Up to 200 points"},
+        "destinations": {"type": "array", "items": _matrix_point_schema, "description": "Up to 2000 points"},
+        "flood_ids": {"type": "array", "items": {"type": "integer"}, "description": "Floods to apply (default: all recorded floods)"},
+        "buffer_m": {"type": "number", "description": "Roads within this distance of a flood are slowed (default 50)"},
+        "speeds": {"type": "array", "items": {"type": "integer", "enum": [5, 10, 20, 45]}, "description": "Flooded speeds in km/h (default all)"}
+    }
+}
@@ -57,4 +57,76 @@ flood_event_by_id_example = [
         "length_m": 257.5635671396551,
         "geometry": "LINESTRING (103.8484492 1.3055518, 103.8483005 1.3056599, 103.8481111 1.3057976, ...)"
     }
-]
\ No newline at end of file
+]
+flooded_critical_segments_example = {
+    "flood_ids": [12, 57],
+    "speed_kph": 10,
+    "flooded_edges": 2,
+    "samples": 128,
+    "recomputed_sources": 41,
+    "reused_sources": 87,
+    "edges_changed": 2316,
+    "mean_abs_delta": 1.2e-07,
+    "changed_segments": [
+        {
+            "u": 25451929, "v": 6749812859, "key": 0,
+            "road_name": "Bukit Timah Road",
+            "road_type": "primary",
+            "flooded": True,
+            "dry_centrality": 0.00061421,
+            "flooded_centrality": 0.00057102,
+            "delta": -4.319e-05,
+            "snapshot_centrality": 0.02528874
+        }
+    ]
+}
+
+flood_impact_example = {
+    "flood_id": 12,
+    "buffer_m": 50.0,
+    "flood_point": {"lat": 1.33201, "lon": 103.79534},
+    "edges_affected": 6,
+    "total_length_m": 742.18,
+    "total_time_50kmh_min": 0.89,
+    "total_delay_min": {"5kph": 8.02, "10kph": 3.56, "20kph": 1.34, "45kph": 0.1},
+    "nearest_edge_delay_min": {"5kph": 2.14, "10kph": 0.95, "20kph": 0.36, "45kph": 0.03},
+    "segments": [
+        {
+            "u": 25451929, "v": 6749812859, "key": 0,
+            "road_name": "Bukit Timah Road",
+            "road_type": "primary",
+            "length_m": 198.4,
+            "distance_m": 3.2,
+            "time_50kmh_min": 0.24,
+            "delay_min": {"5kph": 2.14, "10kph": 0.95, "20kph": 0.36, "45kph": 0.03},
+            "geometry": {"type": "LineString", "coordinates": [[103.79461, 1.33188], [103.79638, 1.33215]]}
+        }
+    ]
+}
+
+simulation_example = {
+    "id": "3f9a1c2be47d8a10",
+    "status": "done",
+    "input": {"geometry": "POINT (103.79534 1.33201)", "radius_m": 50.0},
+    "submitted_at": "2025-03-02T08:15:04+00:00",
+    "started_at": "2025-03-02T08:15:04+00:00",
+    "finished_at": "2025-03-02T08:15:05+00:00",
+    "error": None,
+    "result": {
+        "flood_area": {"type": "Polygon", "coordinates": [[[103.79579, 1.33201], [103.79534, 1.33246], [103.79489, 1.33201], [103.79534, 1.33156], [103.79579, 1.33201]]]},
+        "snapped_edge": {"u": 25451929, "v": 6749812859, "key": 0, "road_name": "Bukit Timah Road", "distance_m": 3.2},
+        "edges_affected": 6,
+        "total_length_m": 742.18,
+        "total_time_50kmh_min": 0.89,
+        "total_delay_min": {"5kph": 8.02, "10kph": 3.56, "20kph": 1.34, "45kph": 0.1},
+        "critical_segments": [
+            {"u": 25451929, "v": 6749812859, "key": 0, "road_name": "Bukit Timah Road", "road_type": "primary", "length_m": 198.4, "centrality_score": 0.025289}
+        ],
+        "stops_affected": 2,
+        "affected_stops": [
+            {"stop_code": "41019", "stop_name": "Opp Blk 2", "distance_m": 14.6},
+            {"stop_code": "41011", "stop_name": "Blk 2", "distance_m": 37.9}
+        ],
+        "affected_bus_services": ["48", "66", "67", "170"]
+    }
+}
@@ -105,4 +105,26 @@ flood_event_by_id_schema = {
             }
         }
     }
-}
\ No newline at end of file
+}
+
+simulation_request_schema = {
+    "type": "object",
+    "properties": {
+        "point": {
+            "type": "object",
+            "description": "Hypothetical flood location",
+            "properties": {
+                "lat": {"type": "number"},
+                "lon": {"type": "number"}
+            }
+        },
+        "polygon": {
+            "type": "object",
+            "description": "GeoJSON Polygon (WGS84) of the flooded area, instead of point"
+        },
+        "radius_m": {
+            "type": "number",
+            "description": "Buffer around the point or polygon in metres (default 50 for a point, 0 for a polygon, max 1000)"
+        }
+    }
+}
@@ -64,4 +64,20 @@ road_max_traffic_flow_by_id_example = [
         "volume": 850
     },
     
-]
\ No newline at end of file
+]
+traffic_summary_example = {
+    "mode": "car",
+    "scenario": "baseline",
+    "version": 3,
+    "built_at": "2025-10-01T09:30:00+00:00",
+    "flood_count": 219,
+    "affected_edges": 181,
+    "affected_ratio": 0.003957,
+    "total_delay_min": 57.63,
+    "top_segment": {"segment_id": 18352, "flood_id": 42, "road_name": "Bukit Timah Road", "delay_min": 2.71},
+    "affected_bus_services": 96,
+    "impacted_bus_count": 96,
+    "mean_delay_sec": 84.2,
+    "flood_speed_kmh": 20,
+    "simulated_speed": "20kph"
+}
@@ -143,4 +143,31 @@ road_max_traffic_flow_by_id_schema = {
             "volume": {"type": "integer", "description": "Maximum observed traffic flow volume", "example": 850}
         }
     }
-}
\ No newline at end of file
+}
+traffic_summary_schema = {
+    "type": "object",
+    "properties": {
+        "mode": {"type": "string", "example": "car"},
+        "scenario": {"type": "string", "example": "baseline"},
+        "version": {"type": "integer", "description": "Snapshot version, incremented on every background refresh"},
+        "built_at": {"type": "string", "description": "UTC time the snapshot was computed"},
+        "flood_count": {"type": "integer", "description": "Number of recorded flood events"},
+        "affected_edges": {"type": "integer", "description": "Distinct road edges snapped to a flood"},
+        "affected_ratio": {"type": "number", "description": "Affected edges as a share of all edges in the network"},
+        "total_delay_min": {"type": "number", "description": "Summed extra traversal time over the affected edges at the flood speed"},
+        "top_segment": {
+            "type": "object",
+            "properties": {
+                "segment_id": {"type": "integer", "description": "Index of the flooded road edge in the routing graph"},
+                "flood_id": {"type": "integer"},
+                "road_name": {"type": "string"},
+                "delay_min": {"type": "number"}
+            }
+        },
+        "affected_bus_services": {"type": "integer", "description": "Bus routes serving a stop within 20 m of a flooded edge"},
+        "impacted_bus_count": {"type": "integer", "description": "Same as affected_bus_services, kept for the frontend"},
+        "mean_delay_sec": {"type": "number", "description": "Mean simulated trip delay for the mode (null for walk)"},
+        "flood_speed_kmh": {"type": "integer", "description": "Flooded-road speed used for edge delays"},
+        "simulated_speed": {"type": "string", "description": "car_trips/bus_trip speed column used for mean_delay_sec"}
+    }
+}
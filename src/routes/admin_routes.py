@@ -0,0 +1,61 @@
+from flask import Blueprint
+from flasgger import swag_from
+from src.controllers.admin_controller import get_boot_profile, get_readiness
+
+
+admin_route = Blueprint('admin_route', __name__)
+
+@admin_route.route('/admin/boot_profile', methods=['GET'])
+@swag_from({
+    "tags": ["Admin"],
+    "parameters": [
+        {"name": "Authorization", "in": "header", "type": "string", "required": True,
+         "description": "Bearer <ADMIN_TOKEN>"}
+    ],
+    "responses": {
+        200: {
+            "description": "Wall time and RSS growth of each startup phase of this process",
+            "examples": {"application/json": {
+                "release": "3b1f2c9", "pid": 412, "started_at": "2025-11-03T02:14:07+00:00",
+                "complete": True, "total_seconds": 41.87, "rss_start_mib": 38.2, "rss_end_mib": 1210.4,
+                "phases": [
+                    {"name": "import routes and controllers", "depth": 0, "start_s": 1.92,
+                     "seconds": 31.4, "rss_after_mib": 905.3, "rss_delta_mib": 790.1},
+                    {"name": "load SG_bus_network.graphml", "depth": 1, "start_s": 4.1,
+                     "seconds": 24.7, "rss_after_mib": 810.6, "rss_delta_mib": 702.4}
+                ]
+            }}
+        },
+        401: {"description": "Missing or wrong admin token"},
+        404: {"description": "ADMIN_TOKEN is not configured, so admin endpoints are disabled"}
+    }
+})
+def boot_profile_endpoint():
+    return get_boot_profile()
+
+
+@admin_route.route('/readyz', methods=['GET'])
+@swag_from({
+    "tags": ["Admin"],
+    "responses": {
+        200: {
+            "description": "Background jobs are running and the graph and routing engine are built; "
+                           "the OneMap token state is informational",
+            "examples": {"application/json": {
+                "ready": True, "pending": [], "boot_seconds": 41.87, "network_data": "preloaded",
+                "onemap_token": {"state": "ready", "expires_at": "2025-11-05T02:14:09+00:00", "last_error": None}
+            }}
+        },
+        503: {
+            "description": "Still starting: pending lists what is not ready yet (background_jobs, "
+                           "graph_arrays, routing_engine); without preload the graph is built in the background",
+            "examples": {"application/json": {
+                "ready": False, "pending": ["graph_arrays", "routing_engine"], "boot_seconds": 3.12,
+                "network_data": "on demand",
+                "onemap_token": {"state": "pending", "expires_at": None, "last_error": None}
+            }}
+        }
+    }
+})
+def readiness_endpoint():
+    return get_readiness()
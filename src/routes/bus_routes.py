@@ -1,5 +1,5 @@
 from flask import Blueprint
-from src.controllers.bus_controller import (get_all_bus_stops, get_bus_stop_by_stop_code, get_all_bus_trip, get_bus_trip_by_id,get_all_bus_trip_segment, get_bus_trip_segment_by_id, get_unique_end_area_codes, get_bus_trip_segment_delay, get_onemap_route)
+from src.controllers.bus_controller import (get_all_bus_stops, get_bus_stop_by_stop_code, get_all_bus_trip, get_bus_trip_by_id,get_all_bus_trip_segment, get_bus_trip_segment_by_id, get_unique_end_area_codes, get_bus_trip_segment_delay, get_bus_trip_segment_delay_batch, get_bus_trip_delay_summary, get_onemap_route)
 from flasgger import swag_from
 from ..examples_for_doc.bus_api_examples import *
 from ..examples_for_doc.bus_related_schemas import *
@@ -126,10 +126,52 @@ def bus_trip_segment_by_id(bus_trip_id):
 def bus_trips_end_area_codes():
     return get_unique_end_area_codes()
 
+@bus_route.route('/bus_trips/delay_summary', methods=['GET'])
+@swag_from({
+    "tags": ["Bus"],
+    "parameters": [
+        {"name": "start_area_code", "in": "query", "type": "string", "required": False, "description": "Only trips starting in this area code"},
+        {"name": "end_area_code", "in": "query", "type": "string", "required": False, "description": "Only trips ending in this area code"},
+        {"name": "bins", "in": "query", "type": "integer", "required": False, "description": "Number of histogram bins (default 20)"}
+    ],
+    "responses": {
+        200: {
+            "description": "Histogram and percentiles of added trip time (seconds vs non-flooded) per flood speed",
+            "examples": {"application/json": bus_trip_delay_summary_example}
+        },
+        404: {"description": "No bus trips match the filters"}
+    }
+})
+def bus_trips_delay_summary():
+    return get_bus_trip_delay_summary()
+
 @bus_route.route('/bus_trip_segments/delay', methods=['GET'])
 def bus_trip_segments_with_delay():
     return get_bus_trip_segment_delay()
 
+@bus_route.route('/bus_trip_segments/delay:batch', methods=['POST'])
+@swag_from({
+    "tags": ["Bus"],
+    "parameters": [
+        {
+            "name": "body",
+            "in": "body",
+            "required": True,
+            "schema": bus_trip_segment_delay_batch_request_schema
+        }
+    ],
+    "responses": {
+        200: {
+            "description": "Delay per requested stop pair, in request order. Pairs without a segment have found=false.",
+            "schema": bus_trip_segment_delay_batch_schema,
+            "examples": {"application/json": bus_trip_segment_delay_batch_example}
+        },
+        400: {"description": "Missing, oversized or malformed list of pairs"}
+    }
+})
+def bus_trip_segments_with_delay_batch():
+    return get_bus_trip_segment_delay_batch()
+
 @bus_route.route('/get_route', methods=['GET'])
-def onemap_route():
-    return get_onemap_route()
\ No newline at end of file
+async def onemap_route():
+    return await get_onemap_route()
\ No newline at end of file
@@ -3,7 +3,8 @@ from flasgger import swag_from
 from ..examples_for_doc.car_api_examples import *
 from ..examples_for_doc.car_related_schemas import *
 from src.controllers.car_trips_controller import (
-    get_all_car_trips_by_id, get_onemap_car_route
+    get_all_car_trips_by_id, get_onemap_car_route, get_car_trip_area_matrix, get_flood_travel_time,
+    get_isochrone, get_travel_time_matrix
 )
 
 car_trips_route = Blueprint('car_trips_route', __name__)
@@ -192,5 +193,96 @@ def all_trips_by_id():
   return get_all_car_trips_by_id()
 
 @car_trips_route.route('/onemap_car_route', methods=['GET'])
-def onemap_route():
-   return get_onemap_car_route()
\ No newline at end of file
+async def onemap_route():
+   return await get_onemap_car_route()
+
+@car_trips_route.route('/car_trips/area_matrix', methods=['GET'])
+@swag_from({
+    "tags": ["Car"],
+    "parameters": [
+        {"name": "start_area_code", "in": "query", "type": "string", "required": False, "description": "Only cells starting in this area code"},
+        {"name": "end_area_code", "in": "query", "type": "string", "required": False, "description": "Only cells ending in this area code"},
+        {"name": "format", "in": "query", "type": "string", "required": False, "enum": ["cells", "dense"], "description": "List of OD cells (default) or dense area x area matrices"},
+        {"name": "refresh", "in": "query", "type": "boolean", "required": False, "description": "Rebuild the matrix from car_trips before answering"}
+    ],
+    "responses": {
+        200: {
+            "description": "Trip counts and mean/median/p95 delay (seconds vs 90 km/h) per start/end area code and flood speed",
+            "examples": {"application/json": car_trip_area_matrix_example}
+        },
+        404: {"description": "No car trips found"}
+    }
+})
+def car_trip_area_matrix():
+    return get_car_trip_area_matrix()
+
+
+@car_trips_route.route('/car_route/flood_travel_time', methods=['GET'])
+@swag_from({
+    "tags": ["Car"],
+    "parameters": [
+        {"name": "start_lat", "in": "query", "type": "number", "required": True},
+        {"name": "start_lon", "in": "query", "type": "number", "required": True},
+        {"name": "end_lat", "in": "query", "type": "number", "required": True},
+        {"name": "end_lon", "in": "query", "type": "number", "required": True},
+        {"name": "flood_ids", "in": "query", "type": "string", "required": False, "description": "Comma-separated flood IDs to treat as flooded (default: all recorded floods)"}
+    ],
+    "responses": {
+        200: {
+            "description": "Dry and flooded (5/10/20/45 kph) shortest travel time in seconds, computed on the road graph",
+            "examples": {"application/json": flood_travel_time_example}
+        },
+        400: {"description": "Missing or invalid coordinates"},
+        404: {"description": "No drivable route between the points"}
+    }
+})
+def flood_travel_time():
+    return get_flood_travel_time()
+
+
+@car_trips_route.route('/isochrone', methods=['GET'])
+@swag_from({
+    "tags": ["Car"],
+    "parameters": [
+        {"name": "lat", "in": "query", "type": "number", "required": True},
+        {"name": "lon", "in": "query", "type": "number", "required": True},
+        {"name": "minutes", "in": "query", "type": "number", "required": False, "description": "Travel time budget (default 15, max 60)"},
+        {"name": "flood_id", "in": "query", "type": "string", "required": False, "description": "Flood ID or comma-separated IDs (default: all recorded floods)"},
+        {"name": "speed", "in": "query", "type": "integer", "required": False, "enum": [5, 10, 20, 45], "description": "Speed in km/h on flooded roads (default 10)"},
+        {"name": "buffer_m", "in": "query", "type": "number", "required": False, "description": "Roads within this distance of a flood are slowed (default 50)"}
+    ],
+    "responses": {
+        200: {
+            "description": "Dry and flooded reachable-area polygons (GeoJSON) and the area lost to the flood",
+            "examples": {"application/json": isochrone_example}
+        },
+        400: {"description": "Missing or invalid parameters"},
+        404: {"description": "Flood not found or no roads within buffer_m"}
+    }
+})
+def isochrone():
+    return get_isochrone()
+
+
+@car_trips_route.route('/car_route/travel_time_matrix', methods=['POST'])
+@swag_from({
+    "tags": ["Car"],
+    "parameters": [
+        {
+            "name": "body",
+            "in": "body",
+            "required": True,
+            "schema": travel_time_matrix_request_schema
+        }
+    ],
+    "responses": {
+        200: {
+            "description": "Dense origin x destination travel times in seconds (null if unreachable), dry and per flood speed",
+            "examples": {"application/json": travel_time_matrix_example}
+        },
+        400: {"description": "Missing, oversized or malformed points or parameters"},
+        404: {"description": "Flood not found or no roads within buffer_m"}
+    }
+})
+def travel_time_matrix():
+    return get_travel_time_matrix()
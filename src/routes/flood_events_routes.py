@@ -1,5 +1,5 @@
 from flask import Blueprint
-from src.controllers.flood_events_controller import get_all_flood_events, get_critical_road_segments_near_flood, get_flood_event_by_id, get_flood_events_by_location, get_buses_affected_by_floods, get_flood_events_by_date_range, get_unique_flood_events_by_location
+from src.controllers.flood_events_controller import get_all_flood_events, get_critical_road_segments_near_flood, get_flood_event_by_id, get_flood_events_by_location, get_buses_affected_by_floods, get_flood_events_by_date_range, get_unique_flood_events_by_location, get_flooded_critical_segments, get_flood_impact
 from flasgger import swag_from
 from ..examples_for_doc.flooded_events_api import *
 from ..examples_for_doc.flooded_events_schemas import *
@@ -90,8 +90,8 @@ def flood_event_by_location():
     return get_flood_events_by_location()
 
 @flood_events_route.route('/get_buses_affected_by_floods', methods=['GET'])
-def get_buses_affected_by_floods_route():
-    return get_buses_affected_by_floods()
+async def get_buses_affected_by_floods_route():
+    return await get_buses_affected_by_floods()
 
 @flood_events_route.route("/get_flood_events_by_date_range", methods=['GET'])
 def get_flood_events_by_date():
@@ -101,6 +101,44 @@ def get_flood_events_by_date():
 def get_critical_segments_endpoint():
     return get_critical_road_segments_near_flood()
 
+@flood_events_route.route("/critical-segments/flooded", methods=["GET"])
+@swag_from({
+    "tags": ["Flood Events"],
+    "parameters": [
+        {"name": "flood_ids", "in": "query", "type": "string", "required": True, "description": "Comma-separated flood IDs whose snapped edges are slowed"},
+        {"name": "speed", "in": "query", "type": "integer", "required": False, "enum": [5, 10, 20, 45], "description": "Flooded speed in km/h (default 10)"},
+        {"name": "top", "in": "query", "type": "integer", "required": False, "description": "Number of most-changed edges to return (default 20)"}
+    ],
+    "responses": {
+        200: {
+            "description": "Sampled edge closeness under the flood versus the dry network, largest shifts first",
+            "examples": {"application/json": flooded_critical_segments_example}
+        },
+        404: {"description": "None of the flood IDs exist"}
+    }
+})
+def get_flooded_critical_segments_endpoint():
+    return get_flooded_critical_segments()
+
+@flood_events_route.route("/flood_events/impact", methods=["GET"])
+@swag_from({
+    "tags": ["Flood Events"],
+    "parameters": [
+        {"name": "flood_id", "in": "query", "type": "integer", "required": True, "description": "Flood ID"},
+        {"name": "buffer_m", "in": "query", "type": "number", "required": False, "description": "Radius around the flood in metres (default 50, max 500)"}
+    ],
+    "responses": {
+        200: {
+            "description": "Every edge within the buffer with its delay per flood speed, longest first, plus totals",
+            "examples": {"application/json": flood_impact_example}
+        },
+        400: {"description": "Invalid flood_id or buffer_m"},
+        404: {"description": "Flood not found"}
+    }
+})
+def get_flood_impact_endpoint():
+    return get_flood_impact()
+
 @flood_events_route.route("/unique-flood-events/location", methods=["GET"])
 def unique_flood_events_by_location():
     return get_unique_flood_events_by_location()
\ No newline at end of file
@@ -0,0 +1,48 @@
+from flask import Blueprint
+from flasgger import swag_from
+from ..examples_for_doc.flooded_events_api import *
+from ..examples_for_doc.flooded_events_schemas import *
+from src.controllers.simulation_controller import create_simulation, get_simulation
+
+
+simulation_route = Blueprint('simulation_route', __name__)
+
+@simulation_route.route('/simulations', methods=['POST'])
+@swag_from({
+    "tags": ["Flood Events"],
+    "parameters": [
+        {
+            "name": "body",
+            "in": "body",
+            "required": True,
+            "schema": simulation_request_schema
+        }
+    ],
+    "responses": {
+        202: {
+            "description": "Simulation queued or still running; poll GET /simulations/{id}",
+            "examples": {"application/json": {"id": "3f9a1c2be47d8a10", "status": "queued", "cached": False}}
+        },
+        200: {"description": "An identical simulation already finished; its result is at GET /simulations/{id}"},
+        400: {"description": "Missing or invalid point, polygon or radius"}
+    }
+})
+def create_simulation_endpoint():
+    return create_simulation()
+
+@simulation_route.route('/simulations/<simulation_id>', methods=['GET'])
+@swag_from({
+    "tags": ["Flood Events"],
+    "parameters": [
+        {"name": "simulation_id", "in": "path", "type": "string", "required": True}
+    ],
+    "responses": {
+        200: {
+            "description": "Job status, and the analysis once status is done",
+            "examples": {"application/json": simulation_example}
+        },
+        404: {"description": "Unknown simulation ID"}
+    }
+})
+def get_simulation_endpoint(simulation_id):
+    return get_simulation(simulation_id)
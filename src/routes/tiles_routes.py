@@ -0,0 +1,23 @@
+from flask import Blueprint
+from flasgger import swag_from
+from src.controllers.tiles_controller import get_road_tile
+
+tiles_route = Blueprint('tiles_route', __name__)
+
+@tiles_route.route('/tiles/<int:z>/<int:x>/<int:y>.mvt', methods=['GET'])
+@swag_from({
+    "tags": ["Roads"],
+    "parameters": [
+        {"name": "z", "in": "path", "type": "integer", "required": True, "description": "Zoom level"},
+        {"name": "x", "in": "path", "type": "integer", "required": True, "description": "Tile column"},
+        {"name": "y", "in": "path", "type": "integer", "required": True, "description": "Tile row (XYZ scheme)"}
+    ],
+    "produces": ["application/vnd.mapbox-vector-tile"],
+    "responses": {
+        200: {"description": "Mapbox Vector Tile with a 'roads' layer carrying highway, name, centrality, flood_exposed and flood_delay_min"},
+        204: {"description": "No roads in this tile"},
+        400: {"description": "Tile coordinates out of range"}
+    }
+})
+def road_tile(z, x, y):
+    return get_road_tile(z, x, y)
@@ -3,7 +3,7 @@ from flasgger import swag_from
 from ..examples_for_doc.traffic_route_examples import *
 from ..examples_for_doc.traffic_route_schemas import *
 from src.controllers.traffic_controller import (
-    get_all_road_max_traffic_flow,get_road_max_traffic_flow_by_id)
+    get_all_road_max_traffic_flow,get_road_max_traffic_flow_by_id,get_traffic_summary)
 
 
 traffic_route = Blueprint('traffic_route', __name__)
@@ -51,4 +51,23 @@ def all_road_max_traffic_flow():
 
 def road_max_traffic_flow_by_id():
  
-    return get_road_max_traffic_flow_by_id()
\ No newline at end of file
+    return get_road_max_traffic_flow_by_id()
+
+@traffic_route.route('/traffic/summary', methods=['GET'])
+@swag_from({
+    "tags": ["Roads"],
+    "parameters": [
+        {"name": "mode", "in": "query", "type": "string", "required": False, "enum": ["car", "bus", "walk"], "description": "Travel mode (default car)"},
+        {"name": "scenario", "in": "query", "type": "string", "required": False, "enum": ["baseline", "worst_case"], "description": "Flood scenario (default baseline)"}
+    ],
+    "responses": {
+        200: {
+            "description": "Headline flood KPIs for the mode and scenario from the latest precomputed snapshot",
+            "schema": traffic_summary_schema,
+            "examples": {"application/json": traffic_summary_example}
+        },
+        400: {"description": "Unknown mode or scenario"}
+    }
+})
+def traffic_summary():
+    return get_traffic_summary()
@@ -0,0 +1,112 @@
+"""httpx.AsyncClient setup shared by the async views.
+
+Served through asgi:app (uvicorn workers), every async view of a worker
+runs on that worker's event loop, and all of them share one long-lived
+client opened at startup: its connection pool is reused across requests
+and one worker keeps every request's upstream calls in flight together.
+Under a WSGI server Flask runs each async view in an event loop of its
+own, so there a client is built per request (sharing only the SSL
+context) and closed with it.
+
+Either way use `async with async_client() as client:` and await
+independent calls together. Blocking calls (the Supabase client, token
+refresh, GeoPandas work) must go through asyncio.to_thread so they do not
+stall the shared loop.
+"""
+import asyncio
+import os
+import ssl
+import threading
+
+import certifi
+import httpx
+
+MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 100))
+DEFAULT_TIMEOUT_SEC = 15
+
+# benchmarks.fakes swaps in an httpx.MockTransport here.
+transport = None
+
+_ssl_lock = threading.Lock()
+_ssl_context = None
+_shared_client = None
+_shared_loop = None
+
+
+class GeocodeError(Exception):
+    pass
+
+
+def _get_ssl_context():
+    global _ssl_context
+    if _ssl_context is None:
+        with _ssl_lock:
+            if _ssl_context is None:
+                _ssl_context = ssl.create_default_context(cafile=certifi.where())
+    return _ssl_context
+
+
+def _new_client(timeout=DEFAULT_TIMEOUT_SEC):
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS),
+        verify=_get_ssl_context(),
+        transport=transport,
+    )
+
+
+class _SharedClient:
+    """The worker's client with a per-use default timeout; leaving the block does not close it."""
+
+    def __init__(self, client, timeout):
+        self.client = client
+        self.timeout = timeout
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return await self.client.get(url, **kwargs)
+
+
+def async_client(timeout=DEFAULT_TIMEOUT_SEC):
+    """Use as `async with async_client() as client:` inside an async view."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _shared_client is not None and loop is _shared_loop:
+        return _SharedClient(_shared_client, timeout)
+    return _new_client(timeout)
+
+
+async def open_shared_client():
+    """Called once per worker at ASGI startup, on the loop every request will run on."""
+    global _shared_client, _shared_loop
+    _shared_client = _new_client()
+    _shared_loop = asyncio.get_running_loop()
+
+
+async def close_shared_client():
+    global _shared_client, _shared_loop
+    client, _shared_client, _shared_loop = _shared_client, None, None
+    if client is not None:
+        await client.aclose()
+
+
+async def geocode(client, address):
+    """Google geocoding; returns the same result list as googlemaps.Client.geocode."""
+    base_url = os.getenv("GOOGLE_MAPS_BASE_URL", "https://maps.googleapis.com")
+    response = await client.get(f"{base_url}/maps/api/geocode/json",
+                                params={"address": address, "key": os.getenv("GOOGLE_MAPS_API_KEY")})
+    response.raise_for_status()
+    body = response.json()
+    if body.get("status") == "ZERO_RESULTS":
+        return []
+    if body.get("status") != "OK":
+        raise GeocodeError(f"{body.get('status')}: {body.get('error_message', '')}".rstrip(": "))
+    return body["results"]
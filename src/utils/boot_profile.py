@@ -0,0 +1,97 @@
+"""Wall time and RSS growth of each startup phase.
+
+app.py imports this module first and wraps its imports and create_app()
+steps in boot_profile.phase(); import-time work in the controllers (graph
+load, stops_gdf) is wrapped the same way and shows up nested under the
+import that triggered it. create_app() calls boot_profile.finish(), which
+prints the report and, if BOOT_PROFILE_LOG is set, appends it as one JSON
+line to that file, tagged with the release (RELEASE_VERSION or Render's
+RENDER_GIT_COMMIT) so boot regressions can be compared release by
+release. The report is also served at /admin/boot_profile.
+
+For a per-module breakdown of a slow import phase, run
+`python -X importtime -c "import app"`.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from src.utils.memory import rss_mib
+
+
+class BootProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.rss_start = rss_mib()
+        self.phases = []
+        self.finished = None
+        self._rss_end = None
+        self._depth = 0
+        self._thread = threading.get_ident()
+
+    @contextmanager
+    def phase(self, name):
+        if self.finished is not None or threading.get_ident() != self._thread:
+            # Structures built lazily after boot, or by background threads, are not startup phases.
+            yield
+            return
+        entry = {"name": name, "depth": self._depth,
+                 "start_s": round(time.perf_counter() - self.started, 3)}
+        self.phases.append(entry)
+        rss_before = rss_mib()
+        started = time.perf_counter()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            rss_after = rss_mib()
+            entry["seconds"] = round(time.perf_counter() - started, 3)
+            entry["rss_after_mib"] = rss_after
+            entry["rss_delta_mib"] = round(rss_after - rss_before, 1) if rss_after is not None else None
+
+    def report(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return {
+            "release": os.getenv("RELEASE_VERSION") or os.getenv("RENDER_GIT_COMMIT"),
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "complete": self.finished is not None,
+            "total_seconds": round(end - self.started, 3),
+            "rss_start_mib": self.rss_start,
+            "rss_end_mib": self._rss_end if self.finished is not None else rss_mib(),
+            "phases": list(self.phases),
+        }
+
+    def format(self):
+        report = self.report()
+        lines = [f"Boot profile: {report['total_seconds']:.2f}s, "
+                 f"rss {report['rss_start_mib']} -> {report['rss_end_mib']} MiB"]
+        for p in report["phases"]:
+            label = "  " * p["depth"] + p["name"]
+            delta = p.get("rss_delta_mib")
+            lines.append(f"  {label:<48} {p.get('seconds', 0):>8.3f}s "
+                         f"{'' if delta is None else f'{delta:+.1f} MiB':>12}")
+        return "\n".join(lines)
+
+    def finish(self):
+        if self.finished is not None:
+            return self.report()
+        self.finished = time.perf_counter()
+        self._rss_end = rss_mib()
+        print(self.format())
+        log_path = os.getenv("BOOT_PROFILE_LOG")
+        if log_path:
+            try:
+                with open(log_path, "a") as f:
+                    f.write(json.dumps(self.report()) + "\n")
+            except OSError as e:
+                print(f"Warning: could not append boot profile to {log_path}: {e}")
+        return self.report()
+
+
+boot_profile = BootProfiler()
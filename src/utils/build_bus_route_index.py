@@ -0,0 +1,61 @@
+"""Build the offline bus route index used by /get_buses_affected_by_floods.
+
+    python -m src.utils.build_bus_route_index --routes BusRoutes.json
+
+With --routes, service stop sequences come from an LTA DataMall BusRoutes
+export (JSON or CSV). Without it they come from the route_id and stop
+pairs in the bus_trip_segment table. Each stop-to-stop hop is routed on
+the road graph so the stored shape follows the roads the bus drives.
+"""
+import argparse
+import time
+from pathlib import Path
+
+import osmnx as ox
+import pandas as pd
+
+from src.utils.graph_arrays import GraphArrays
+from src.utils.routing_engine import RoutingEngine
+from src.utils.bus_route_index import (
+    BusRouteIndex, load_lta_bus_routes, hops_from_segments, route_hop_geometries
+)
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+
+def load_hops(routes_path=None):
+    if routes_path:
+        return load_lta_bus_routes(routes_path)
+    from src.utils.supabase_frames import fetch_table_frame
+    segments = fetch_table_frame("bus_trip_segment", ["route_id", "origin_stop_id", "destination_stop_id"],
+                                 order_by="bus_trip_id")
+    return hops_from_segments(segments)
+
+
+def build(graph_path, stops_path, out, routes_path=None):
+    started = time.perf_counter()
+    hops = load_hops(routes_path)
+    print(f"{len(hops)} hops across {hops['service_no'].nunique()} services")
+
+    G = ox.load_graphml(graph_path)
+    engine = RoutingEngine(GraphArrays.from_graph(G))
+    stops_df = pd.read_csv(stops_path)
+
+    routed = route_hop_geometries(hops, G, engine, stops_df)
+    print(f"Routed {len(routed)}/{len(hops)} hops ({len(hops) - len(routed)} had unknown stops)")
+    BusRouteIndex(routed).save(out)
+    print(f"Wrote {out} in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline bus route geometry index.")
+    parser.add_argument("--routes", default=None, help="LTA BusRoutes export; default reads bus_trip_segment")
+    parser.add_argument("--graph", default=str(ROOT_DIR / "SG_bus_network.graphml"))
+    parser.add_argument("--stops", default=str(ROOT_DIR / "stops.txt"))
+    parser.add_argument("--out", default=str(ROOT_DIR / "bus_route_index.csv.gz"))
+    args = parser.parse_args()
+    build(args.graph, args.stops, args.out, args.routes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Rebuild the edge closeness centrality file for the road graph.
+
+    python -m src.utils.build_centrality --graph SG_bus_network.graphml --workers 16
+
+Writes <out>.npy (float64 centrality, one value per edge), <out>_edges.npy
+(int64 u, v, key rows in the same order) and <out>.json (build metadata).
+Edges are ordered by (u, v, key), the same order GraphArrays uses, so the
+array can be indexed directly by GraphArrays edge positions. The default
+--out is CENTRALITY_BASE under CENTRALITY_CACHE_DIR, where the server
+looks first; a built file there is used instead of the pickled snapshot.
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import osmnx as ox
+
+from src.utils.graph_arrays import GraphArrays
+from src.utils.centrality import edge_closeness
+from src.utils.centrality_store import CENTRALITY_BASE, file_sha256, write_centrality
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+WEIGHTS = ("hops", "length", "travel_time")
+
+
+def build(graph_path, out, weight="hops", samples=None, workers=None, seed=0):
+    started = time.perf_counter()
+    print(f"Loading {graph_path}...")
+    G = ox.load_graphml(graph_path)
+    graph_arrays = GraphArrays.from_graph(G)
+    print(f"{graph_arrays.n_nodes} nodes, {graph_arrays.n_edges} edges "
+          f"({time.perf_counter() - started:.1f}s)")
+
+    sources = np.flatnonzero(np.bincount(graph_arrays.edge_dst, minlength=graph_arrays.n_nodes))
+    if samples and samples < len(sources):
+        sources = np.sort(np.random.default_rng(seed).choice(sources, size=samples, replace=False))
+
+    weights = None
+    if weight == "length":
+        weights = graph_arrays.edge_length
+    elif weight == "travel_time":
+        weights = graph_arrays.travel_time()
+
+    workers = workers or os.cpu_count() or 1
+    print(f"Computing {weight} edge closeness from {len(sources)} sources on {workers} workers...")
+
+    def progress(done, total):
+        if done == total or done % max(total // 20, 1) == 0:
+            print(f"  {done}/{total} chunks ({time.perf_counter() - started:.0f}s)")
+
+    centrality = edge_closeness(graph_arrays, weights, sources, unweighted=(weight == "hops"),
+                                workers=workers, progress=progress)
+
+    meta = {
+        "graph": Path(graph_path).name,
+        "graph_sha256": file_sha256(graph_path),
+        "weight": weight,
+        "sources": int(len(sources)),
+        "exact": samples is None or samples >= len(sources),
+        "n_edges": int(graph_arrays.n_edges),
+        "edge_order": "u, v, key ascending",
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "build_seconds": round(time.perf_counter() - started, 1),
+    }
+    write_centrality(out, centrality, graph_arrays.edge_ids, meta)
+    print(f"Wrote {out}.npy and {out}_edges.npy in {meta['build_seconds']}s")
+    return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build edge closeness centrality for the road graph.")
+    parser.add_argument("--graph", default=str(ROOT_DIR / "SG_bus_network.graphml"))
+    parser.add_argument("--out", default=str(CENTRALITY_BASE),
+                        help="Output path without extension (default: where the server reads it)")
+    parser.add_argument("--weight", choices=WEIGHTS, default="hops",
+                        help="hops reproduces the original pickled snapshot")
+    parser.add_argument("--samples", type=int, default=None,
+                        help="Use this many random sources instead of all of them")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    build(args.graph, args.out, args.weight, args.samples, args.workers, args.seed)
+
+
+if __name__ == "__main__":
+    main()
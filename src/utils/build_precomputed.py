@@ -0,0 +1,115 @@
+"""Precompute every flood x analysis result served by the flood endpoints.
+
+    python -m src.utils.build_precomputed --workers 16
+
+For each flood in flood_events_rows.csv this computes, with the same code
+the endpoints run:
+
+    critical_segments  /critical-segments at the default buffer
+    flood_impact       /flood_events/impact at the default buffer
+    buses_affected     /get_buses_affected_by_floods?source=offline, per flood
+                       (skipped when bus_route_index.csv.gz has not been built)
+
+and writes <out>/<analysis>.parquet stamped with the input version (see
+src.utils.precomputed). Shared structures are built once in this process
+and the floods are split across forked worker processes, which inherit
+them copy-on-write. Rerun after any input file changes; the server ignores
+files built from other inputs.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.utils.precomputed import ANALYSES, PRECOMPUTED_DIR, input_version, write_results
+
+CHUNK_SIZE = 8
+
+
+def _controller():
+    import src.controllers.flood_events_controller as fc
+    return fc
+
+
+def compute(analysis, flood_id):
+    """(buffer_m, status, payload) for one flood, or None if the endpoint would not answer from this data."""
+    fc = _controller()
+    if analysis == "critical_segments":
+        buffer_m = float(fc.CRITICAL_SEGMENTS_DEFAULT_BUFFER_M)
+        payload, status = fc._critical_segments_payload(flood_id, buffer_m)
+        return buffer_m, status, payload
+    if analysis == "flood_impact":
+        buffer_m = float(fc.IMPACT_DEFAULT_BUFFER_M)
+        impact = fc.compute_flood_impact(flood_id, buffer_m)
+        return None if impact is None else (buffer_m, 200, impact)
+    if analysis == "buses_affected":
+        payload, status = asyncio.run(fc._buses_affected_payload([flood_id], "offline"))
+        return 0.0, status, payload["results"]
+    raise ValueError(f"unknown analysis {analysis!r}")
+
+
+def _compute_chunk(analysis, flood_ids):
+    rows = []
+    for flood_id in flood_ids:
+        result = compute(analysis, flood_id)
+        if result is not None:
+            rows.append((flood_id, *result))
+    return analysis, rows
+
+
+def build(out, analyses=ANALYSES, workers=None):
+    started = time.perf_counter()
+    fc = _controller()
+    # Built here so the forked workers share them instead of each building its own.
+    fc.get_graph_arrays()
+    fc.get_flood_edge_index()
+    fc.get_edges_3414()
+    fc.get_flood_points_3414()
+    try:
+        fc.get_centrality_store()
+    except FileNotFoundError as e:
+        print(f"Warning: {e}, skipping critical_segments")
+        analyses = [a for a in analyses if a != "critical_segments"]
+    if "buses_affected" in analyses and fc.get_bus_route_index() is None:
+        print("Warning: no bus route index, skipping buses_affected (the LTA source is live data)")
+        analyses = [a for a in analyses if a != "buses_affected"]
+
+    version = input_version(fc.precomputed_inputs())
+    flood_ids = sorted(int(f) for f in fc.flood_events_df["flood_id"].unique())
+    chunks = [flood_ids[i:i + CHUNK_SIZE] for i in range(0, len(flood_ids), CHUNK_SIZE)]
+    workers = workers or os.cpu_count() or 1
+    print(f"{len(flood_ids)} floods x {len(analyses)} analyses on {workers} workers, input version {version}")
+
+    rows = {analysis: [] for analysis in analyses}
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as pool:
+        futures = [pool.submit(_compute_chunk, analysis, chunk) for analysis in analyses for chunk in chunks]
+        for done, future in enumerate(as_completed(futures), 1):
+            analysis, chunk_rows = future.result()
+            rows[analysis].extend(chunk_rows)
+            if done == len(futures) or done % max(len(futures) // 20, 1) == 0:
+                print(f"  {done}/{len(futures)} chunks ({time.perf_counter() - started:.0f}s)")
+
+    for analysis in analyses:
+        path = write_results(out, analysis, sorted(rows[analysis], key=lambda row: row[0]), version)
+        print(f"Wrote {len(rows[analysis])} rows to {path}")
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute flood analytics to Parquet.")
+    parser.add_argument("--out", default=str(PRECOMPUTED_DIR))
+    parser.add_argument("--analyses", default=",".join(ANALYSES), help=f"Any of: {', '.join(ANALYSES)}")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    args = parser.parse_args()
+    analyses = [a for a in args.analyses.split(",") if a]
+    unknown = [a for a in analyses if a not in ANALYSES]
+    if unknown:
+        parser.error(f"unknown analyses: {', '.join(unknown)}")
+    build(args.out, analyses, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import LineString
+from pyproj import Transformer
+
+HOP_COLUMNS = ["service_no", "direction", "from_stop", "to_stop"]
+
+
+def load_lta_bus_routes(path):
+    """Service hops from an LTA DataMall BusRoutes export (JSON list, {"value": [...]} or CSV)."""
+    path = Path(path)
+    if path.suffix == ".csv":
+        routes = pd.read_csv(path, dtype={"ServiceNo": str, "BusStopCode": str})
+    else:
+        with open(path) as f:
+            data = json.load(f)
+        routes = pd.DataFrame(data.get("value", []) if isinstance(data, dict) else data)
+    routes["BusStopCode"] = routes["BusStopCode"].astype(str).str.zfill(5)
+    routes = routes.sort_values(["ServiceNo", "Direction", "StopSequence"])
+
+    hops = routes.assign(
+        to_stop=routes.groupby(["ServiceNo", "Direction"])["BusStopCode"].shift(-1)
+    ).dropna(subset=["to_stop"])
+    return pd.DataFrame({
+        "service_no": hops["ServiceNo"].astype(str),
+        "direction": hops["Direction"].astype(int),
+        "from_stop": hops["BusStopCode"],
+        "to_stop": hops["to_stop"],
+    }).reset_index(drop=True)
+
+
+def hops_from_segments(segments):
+    """Service hops from bus_trip_segment rows (route_id, origin_stop_id, destination_stop_id)."""
+    segments = segments.dropna(subset=["route_id", "origin_stop_id", "destination_stop_id"])
+    hops = pd.DataFrame({
+        "service_no": segments["route_id"].astype(str),
+        "direction": 0,
+        "from_stop": segments["origin_stop_id"].astype(str).str.zfill(5),
+        "to_stop": segments["destination_stop_id"].astype(str).str.zfill(5),
+    })
+    return hops.drop_duplicates().reset_index(drop=True)
+
+
+def route_hop_geometries(hops, G, routing_engine, stops_df):
+    """Road-following EPSG:3414 line for each hop, routed on G between the stops' nearest nodes.
+
+    Returns the hops that could be routed with a 'geometry' column.
+    """
+    graph_arrays = routing_engine.g
+    codes = stops_df["stop_code"].astype(str).str.zfill(5)
+    stop_lonlat = dict(zip(codes, zip(stops_df["stop_lon"].astype(float), stops_df["stop_lat"].astype(float))))
+    stop_codes = sorted(set(hops["from_stop"]) | set(hops["to_stop"]))
+    known = [c for c in stop_codes if c in stop_lonlat]
+    nodes, _ = graph_arrays.nearest_nodes([stop_lonlat[c][0] for c in known], [stop_lonlat[c][1] for c in known])
+    stop_node = dict(zip(known, nodes.tolist()))
+
+    to_3414 = Transformer.from_crs("EPSG:4326", "EPSG:3414", always_xy=True)
+    geometries = []
+    cache = {}
+    for from_stop, to_stop in zip(hops["from_stop"], hops["to_stop"]):
+        source, target = stop_node.get(from_stop), stop_node.get(to_stop)
+        if source is None or target is None:
+            geometries.append(None)
+            continue
+        if (source, target) not in cache:
+            _, path = routing_engine.shortest_path(source, target)
+            coords = []
+            for edge in path:
+                u, v, key = (int(x) for x in graph_arrays.edge_ids[edge])
+                geometry = (G.get_edge_data(u, v, key) or {}).get("geometry")
+                if geometry is None:
+                    geometry = LineString([(G.nodes[u]["x"], G.nodes[u]["y"]), (G.nodes[v]["x"], G.nodes[v]["y"])])
+                coords.extend(geometry.coords if not coords else list(geometry.coords)[1:])
+            if len(coords) < 2:
+                # Same snapped node or no road path: fall back to the straight stop-to-stop line.
+                coords = [stop_lonlat[from_stop], stop_lonlat[to_stop]]
+            xs, ys = to_3414.transform(*zip(*coords))
+            cache[(source, target)] = LineString(zip(xs, ys))
+        geometries.append(cache[(source, target)])
+
+    hops = hops.assign(geometry=geometries)
+    return hops[hops["geometry"].notna()].reset_index(drop=True)
+
+
+class BusRouteIndex:
+    """Bus service path geometries (EPSG:3414) in an STRtree.
+
+    Each entry is one stop-to-stop hop of a service, so a query returns the
+    services whose path, not just whose stops, crosses a flood area.
+    """
+
+    def __init__(self, hops):
+        self.hops = hops.reset_index(drop=True)
+        self.service_no = self.hops["service_no"].to_numpy()
+        self.tree = shapely.STRtree(self.hops["geometry"].to_numpy())
+        self._services_by_stop = (
+            pd.concat([self.hops[["from_stop", "service_no"]].rename(columns={"from_stop": "stop"}),
+                       self.hops[["to_stop", "service_no"]].rename(columns={"to_stop": "stop"})])
+            .drop_duplicates().groupby("stop")["service_no"].apply(list).to_dict()
+        )
+
+    def __len__(self):
+        return len(self.hops)
+
+    def services_intersecting(self, geometry):
+        """Sorted service numbers whose path intersects geometry (EPSG:3414)."""
+        idx = self.tree.query(geometry, predicate="intersects")
+        return sorted(set(self.service_no[np.atleast_1d(idx)].tolist()), key=_service_sort_key)
+
+    def services_at_stops(self, stop_codes):
+        services = set()
+        for code in stop_codes:
+            services.update(self._services_by_stop.get(str(code).zfill(5), ()))
+        return sorted(services, key=_service_sort_key)
+
+    def save(self, path):
+        frame = self.hops[HOP_COLUMNS].assign(wkt=shapely.to_wkt(self.hops["geometry"].to_numpy(), rounding_precision=1))
+        frame.to_csv(path, index=False)
+
+    @classmethod
+    def load(cls, path):
+        frame = pd.read_csv(path, dtype={"service_no": str, "from_stop": str, "to_stop": str})
+        frame["geometry"] = shapely.from_wkt(frame.pop("wkt").to_numpy())
+        return cls(frame)
+
+
+def _service_sort_key(service):
+    digits = "".join(ch for ch in service if ch.isdigit())
+    return (int(digits) if digits else 0, service)
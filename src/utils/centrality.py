@@ -0,0 +1,208 @@
+import os
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+DEFAULT_SAMPLES = 128
+CHUNK_SIZE = 16
+
+_tree_pool_lock = threading.Lock()
+_tree_pool = None
+_tree_pool_pid = None
+
+# Edge closeness is closeness on the line graph of G: the distance from edge
+# e' = (a, b) to edge e = (u, v) is d(b, u) + w(e), i.e. reach the tail of e
+# and traverse it. Every edge entering b has the same distance to e, so one
+# node-level Dijkstra from b covers all of them, weighted by b's in-degree.
+# With unit weights this is exactly networkx closeness_centrality on
+# nx.line_graph(G), which is what Gcar_edge_closeness_centrality.pkl holds.
+
+
+def shortest_path_trees(csr, sources, unweighted=False):
+    """Distances and predecessors from each source node (k x n arrays)."""
+    dist, pred = dijkstra(csr, indices=sources, return_predecessors=True, unweighted=unweighted)
+    return dist.astype(np.float32), pred.astype(np.int32)
+
+
+def get_tree_pool(workers):
+    """Process pool for run_trees, started on first use and kept for the life of this process."""
+    global _tree_pool, _tree_pool_pid
+    if _tree_pool is None or _tree_pool_pid != os.getpid():
+        with _tree_pool_lock:
+            # A pool inherited across a fork belongs to the parent and cannot be used.
+            if _tree_pool is None or _tree_pool_pid != os.getpid():
+                # spawn, not fork: the server process has scheduler and request threads.
+                _tree_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                _tree_pool_pid = os.getpid()
+    return _tree_pool
+
+
+def run_trees(csr, sources, unweighted=False, workers=None):
+    """shortest_path_trees in chunks of CHUNK_SIZE sources; in-process for a single chunk."""
+    sources = np.asarray(sources, dtype=np.int64)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(sources) <= CHUNK_SIZE:
+        return shortest_path_trees(csr, sources, unweighted)
+
+    chunks = [sources[i:i + CHUNK_SIZE] for i in range(0, len(sources), CHUNK_SIZE)]
+    pool = get_tree_pool(workers)
+    results = list(pool.map(shortest_path_trees, [csr] * len(chunks), chunks, [unweighted] * len(chunks)))
+    return np.vstack([r[0] for r in results]), np.vstack([r[1] for r in results])
+
+
+def source_contributions(dist, sources, multiplicity, edge_src, edge_dst, edge_weight):
+    """Per-edge (distance sum, reached count) contributed by each source row.
+
+    Returns two k x m arrays. The edge itself is excluded from its own
+    count, as networkx does for the node in closeness.
+    """
+    d_tail = dist[:, edge_src].astype(float)
+    reached = np.isfinite(d_tail)
+    mult = multiplicity[sources][:, None] - (edge_dst[None, :] == np.asarray(sources)[:, None])
+    mult = np.where(reached, mult, 0)
+    sums = np.where(reached, (d_tail + edge_weight[None, :]) * mult, 0.0)
+    return sums, mult.astype(float)
+
+
+def closeness_from_totals(sums, counts, n_edges, scale=1.0):
+    """Wasserman-Faust closeness (networkx wf_improved=True) from scaled totals."""
+    counts = counts * scale
+    sums = sums * scale
+    with np.errstate(divide="ignore", invalid="ignore"):
+        closeness = (counts / max(n_edges - 1, 1)) * (counts / sums)
+    return np.nan_to_num(closeness, nan=0.0, posinf=0.0)
+
+
+_worker_state = None
+
+
+def _init_worker(state):
+    global _worker_state
+    _worker_state = state
+
+
+def _totals_for_sources(sources):
+    csr, multiplicity, edge_src, edge_dst, edge_weight, unweighted = _worker_state
+    dist, _ = shortest_path_trees(csr, sources, unweighted)
+    sums, counts = source_contributions(dist, sources, multiplicity, edge_src, edge_dst, edge_weight)
+    return sums.sum(axis=0), counts.sum(axis=0)
+
+
+def edge_closeness(graph_arrays, weights, sources, unweighted=False, workers=None, progress=None):
+    """Edge closeness from the given source nodes (all in-degree > 0 nodes for exact).
+
+    Each pool worker receives the graph once and returns per-edge totals
+    for its chunk of sources, so distance matrices never cross processes.
+    """
+    multiplicity = np.bincount(graph_arrays.edge_dst, minlength=graph_arrays.n_nodes)
+    edge_weight = np.ones(graph_arrays.n_edges) if unweighted else np.asarray(weights, dtype=float)
+    csr = graph_arrays.to_csr(edge_weight)
+    state = (csr, multiplicity, graph_arrays.edge_src, graph_arrays.edge_dst, edge_weight, unweighted)
+
+    sources = np.asarray(sources, dtype=np.int64)
+    chunks = [sources[i:i + CHUNK_SIZE] for i in range(0, len(sources), CHUNK_SIZE)]
+    workers = workers or os.cpu_count() or 1
+
+    sums = np.zeros(graph_arrays.n_edges)
+    counts = np.zeros(graph_arrays.n_edges)
+
+    def accumulate(results):
+        nonlocal sums, counts
+        for done, (s, c) in enumerate(results, 1):
+            sums += s
+            counts += c
+            if progress:
+                progress(done, len(chunks))
+
+    if workers <= 1 or len(chunks) <= 1:
+        _init_worker(state)
+        accumulate(map(_totals_for_sources, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(state,)) as pool:
+            accumulate(pool.map(_totals_for_sources, chunks))
+
+    scale = multiplicity.sum() / max(multiplicity[sources].sum(), 1)
+    return closeness_from_totals(sums, counts, graph_arrays.n_edges, scale)
+
+
+class CentralityEngine:
+    """Sampled edge closeness on travel time, updated incrementally for floods.
+
+    The dry shortest-path trees from a fixed sample of sources are kept. A
+    flood only makes edges slower, so a source whose tree uses none of the
+    slowed node pairs keeps every distance. For those sources only the
+    flooded edges' own traversal time changes. Trees are recomputed, on a
+    process pool, only for sources that route through a flooded pair.
+    """
+
+    def __init__(self, graph_arrays, n_samples=DEFAULT_SAMPLES, seed=0, workers=None):
+        self.g = graph_arrays
+        self.workers = workers
+        self.multiplicity = np.bincount(graph_arrays.edge_dst, minlength=graph_arrays.n_nodes)
+
+        candidates = np.flatnonzero(self.multiplicity)
+        rng = np.random.default_rng(seed)
+        self.sources = np.sort(rng.choice(candidates, size=min(n_samples, len(candidates)), replace=False))
+        self.scale = self.multiplicity.sum() / max(self.multiplicity[self.sources].sum(), 1)
+
+        self.dry_weights = graph_arrays.travel_time()
+        self.dry_csr = graph_arrays.to_csr(self.dry_weights)
+        self.dry_dist, self.dry_pred = run_trees(self.dry_csr, self.sources, workers=workers)
+        sums, counts = self._contributions(self.dry_dist, self.sources, self.dry_weights)
+        self.dry_sums = sums.sum(axis=0)
+        self.dry_counts = counts.sum(axis=0)
+        self.dry_closeness = closeness_from_totals(self.dry_sums, self.dry_counts, graph_arrays.n_edges, self.scale)
+
+    def _contributions(self, dist, sources, weights):
+        return source_contributions(dist, sources, self.multiplicity, self.g.edge_src, self.g.edge_dst, weights)
+
+    def _changed_pairs(self, flooded_csr):
+        dry = self.dry_csr.tocoo()
+        flooded = flooded_csr.tocoo()
+        changed = flooded.data != dry.data
+        return dry.row[changed], dry.col[changed]
+
+    def flooded(self, flooded_edges, speed_kph):
+        """Closeness with flooded_edges slowed to speed_kph, plus reuse statistics."""
+        overrides = self.g.flood_speed_overrides(flooded_edges, speed_kph)
+        weights = self.g.travel_time(overrides)
+        flooded_csr = self.g.to_csr(weights)
+        rows, cols = self._changed_pairs(flooded_csr)
+
+        if len(rows):
+            affected = np.any(self.dry_pred[:, cols] == rows[None, :], axis=1)
+        else:
+            affected = np.zeros(len(self.sources), dtype=bool)
+        unaffected = ~affected
+
+        sums = self.dry_sums.copy()
+        counts = self.dry_counts.copy()
+
+        # Unaffected trees: distances are unchanged, only w(e) moves for flooded edges.
+        edge_idx = np.array(sorted(overrides), dtype=np.int64)
+        if len(edge_idx) and unaffected.any():
+            src = self.sources[unaffected]
+            reached = np.isfinite(self.dry_dist[unaffected][:, self.g.edge_src[edge_idx]])
+            mult = self.multiplicity[src][:, None] - (self.g.edge_dst[edge_idx][None, :] == src[:, None])
+            sums[edge_idx] += (np.where(reached, mult, 0).sum(axis=0)
+                               * (weights[edge_idx] - self.dry_weights[edge_idx]))
+
+        # Affected trees: recompute and swap their contributions.
+        if affected.any():
+            src = self.sources[affected]
+            new_dist, _ = run_trees(flooded_csr, src, workers=self.workers)
+            old_sums, old_counts = self._contributions(self.dry_dist[affected], src, self.dry_weights)
+            new_sums, new_counts = self._contributions(new_dist, src, weights)
+            sums += new_sums.sum(axis=0) - old_sums.sum(axis=0)
+            counts += new_counts.sum(axis=0) - old_counts.sum(axis=0)
+
+        closeness = closeness_from_totals(sums, counts, self.g.n_edges, self.scale)
+        return closeness, {
+            "samples": int(len(self.sources)),
+            "recomputed_sources": int(affected.sum()),
+            "reused_sources": int(unaffected.sum()),
+        }
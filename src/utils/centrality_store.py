@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+import numpy as np
+
+EDGE_DTYPE = np.dtype([("u", np.int64), ("v", np.int64), ("k", np.int64)])
+# Generated arrays live outside the repository; every worker on a host shares them.
+CENTRALITY_CACHE_DIR = Path(os.getenv("CENTRALITY_CACHE_DIR", Path.home() / ".cache" / "flood-api"))
+CENTRALITY_BASE = CENTRALITY_CACHE_DIR / "Gcar_edge_closeness_centrality"
+
+
+def _paths(base_path):
+    base_path = Path(base_path)
+    return (base_path.with_name(base_path.name + ".npy"),
+            base_path.with_name(base_path.name + "_edges.npy"))
+
+
+def write_centrality(base_path, values, edge_ids, meta=None):
+    """Write <base>.npy, <base>_edges.npy and optionally <base>.json.
+
+    edge_ids must be sorted by (u, v, key). Files are written under a
+    temporary name and renamed, so a reader never maps a half-written file.
+    """
+    values_path, edges_path = _paths(base_path)
+    values_path.parent.mkdir(parents=True, exist_ok=True)
+    for path, array in ((values_path, np.asarray(values, dtype=np.float64)),
+                        (edges_path, np.asarray(edge_ids, dtype=np.int64))):
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+    if meta is not None:
+        base_path = Path(base_path)
+        with open(base_path.with_name(base_path.name + ".json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+
+def read_meta(base_path):
+    base_path = Path(base_path)
+    try:
+        with open(base_path.with_name(base_path.name + ".json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _pickle_arrays(pickle_path):
+    with open(pickle_path, "rb") as f:
+        centrality_data = pickle.load(f)
+    edge_ids = np.array(list(centrality_data.keys()), dtype=np.int64).reshape(-1, 3)
+    values = np.fromiter(centrality_data.values(), dtype=np.float64, count=len(centrality_data))
+    order = np.lexsort((edge_ids[:, 2], edge_ids[:, 1], edge_ids[:, 0]))
+    return values[order], edge_ids[order]
+
+
+def convert_pickle(pickle_path, base_path):
+    """Turn a {(u, v, key): value} pickle into the .npy layout, recording which pickle it came from."""
+    values, edge_ids = _pickle_arrays(pickle_path)
+    write_centrality(base_path, values, edge_ids,
+                     {"source": Path(pickle_path).name, "source_sha256": file_sha256(pickle_path)})
+    print(f"Converted {Path(pickle_path).name} to {Path(base_path).name}.npy ({len(values)} edges)")
+
+
+def _stale_conversion(base_path, pickle_path):
+    """True if base_path was converted from a pickle whose contents have since changed."""
+    source_sha256 = read_meta(base_path).get("source_sha256")
+    if source_sha256 is None or pickle_path is None or not Path(pickle_path).exists():
+        return False
+    return source_sha256 != file_sha256(pickle_path)
+
+
+def source_files(base_path, pickle_path):
+    """The files the centrality values come from: the pickle for a conversion, else the arrays.
+
+    Stable whether or not the pickle has been converted yet, so it can be
+    hashed to version anything derived from the centrality.
+    """
+    values_path, edges_path = _paths(base_path)
+    built = values_path.exists() and "source_sha256" not in read_meta(base_path)
+    if built or pickle_path is None:
+        return [values_path, edges_path]
+    return [Path(pickle_path)]
+
+
+class CentralityStore:
+    """Read-only edge centrality backed by memory-mapped .npy files.
+
+    Opening only maps the files, so it is effectively instant, and every
+    process that opens the same files shares their pages through the OS
+    page cache instead of holding its own dict of boxed floats. Values are
+    looked up by (u, v, key) with a binary search over the sorted edge ids.
+    """
+
+    def __init__(self, values, edge_ids):
+        self.values = values
+        self.edge_ids = edge_ids
+        self._keys = np.ascontiguousarray(edge_ids).view(EDGE_DTYPE).ravel()
+
+    @classmethod
+    def open(cls, base_path, pickle_path=None):
+        """Map <base>.npy and <base>_edges.npy, (re)converting pickle_path if they are missing or out of date."""
+        values_path, edges_path = _paths(base_path)
+        if not (values_path.exists() and edges_path.exists()) or _stale_conversion(base_path, pickle_path):
+            if pickle_path is None or not Path(pickle_path).exists():
+                raise FileNotFoundError(f"{values_path.name} not found")
+            try:
+                convert_pickle(pickle_path, base_path)
+            except OSError as e:
+                # Read-only deployment: keep a private in-memory copy instead.
+                print(f"Warning: could not write {values_path.name} ({e}), loading {Path(pickle_path).name}")
+                return cls(*_pickle_arrays(pickle_path))
+        values = np.load(values_path, mmap_mode="r")
+        edge_ids = np.load(edges_path, mmap_mode="r")
+        if len(values) != len(edge_ids):
+            raise ValueError(f"{values_path.name} and {edges_path.name} have different lengths")
+        return cls(values, edge_ids)
+
+    def __len__(self):
+        return len(self.values)
+
+    def index_of(self, uvk):
+        """Positions of (u, v, key) rows in the store; -1 where an edge is missing."""
+        queries = np.ascontiguousarray(np.asarray(uvk, dtype=np.int64).reshape(-1, 3)).view(EDGE_DTYPE).ravel()
+        if not len(self._keys):
+            return np.full(len(queries), -1, dtype=np.int64)
+        idx = np.clip(np.searchsorted(self._keys, queries), 0, len(self._keys) - 1)
+        return np.where(self._keys[idx] == queries, idx, -1)
+
+    def lookup(self, uvk, default=0.0):
+        """Centrality for each (u, v, key) row, default where an edge is missing."""
+        idx = self.index_of(uvk)
+        return np.where(idx >= 0, self.values[np.maximum(idx, 0)], default)
+
+    def get(self, u, v, key, default=0.0):
+        return float(self.lookup([(u, v, key)], default)[0])
+
+    def aligned_to(self, graph_arrays):
+        """Values in GraphArrays edge order; the mapped array itself when the orders match."""
+        if len(self.edge_ids) == graph_arrays.n_edges and np.array_equal(self.edge_ids, graph_arrays.edge_ids):
+            return self.values
+        return self.lookup(graph_arrays.edge_ids)
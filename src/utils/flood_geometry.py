@@ -0,0 +1,24 @@
+import numpy as np
+import osmnx as ox
+import pandas as pd
+from shapely import wkb
+
+
+def flood_points_frame(flood_events_df):
+    """flood_id, lon, lat for every flood row whose WKB geom parses."""
+    records = []
+    for flood_id, geom_hex in zip(flood_events_df["flood_id"], flood_events_df["geom"]):
+        try:
+            geom = wkb.loads(bytes.fromhex(geom_hex))
+            records.append((int(flood_id), geom.x, geom.y))
+        except Exception as e:
+            print(f"Warning: could not parse geom for flood_id {flood_id}: {e}")
+    return pd.DataFrame(records, columns=["flood_id", "lon", "lat"])
+
+
+def flood_edge_indices(G, graph_arrays, points):
+    """GraphArrays edge index of the edge nearest to each flood point."""
+    if points.empty:
+        return np.empty(0, dtype=np.int64)
+    nearest = ox.distance.nearest_edges(G, X=points["lon"].tolist(), Y=points["lat"].tolist())
+    return graph_arrays.edge_index([tuple(edge) for edge in nearest])
@@ -0,0 +1,118 @@
+import math
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.spatial import cKDTree
+
+DRY_SPEED_KPH = 50
+EARTH_RADIUS_M = 6371008.8
+
+
+def _edge_speed_kph(data):
+    speed = data.get("speed_kph")
+    if isinstance(speed, list):
+        speed = speed[0]
+    try:
+        speed = float(speed)
+    except (TypeError, ValueError):
+        return DRY_SPEED_KPH
+    return speed if speed > 0 else DRY_SPEED_KPH
+
+
+class GraphArrays:
+    """Flat NumPy copy of an osmnx MultiDiGraph.
+
+    Nodes are numbered 0..n-1 in ascending OSM id order and edges 0..m-1 in
+    ascending (u, v, key) order, so the numbering is stable across reloads of
+    the same graphml. Adjacency is stored CSR-style: the out-edges of node i
+    are edge_order[indptr[i]:indptr[i + 1]].
+    """
+
+    def __init__(self, node_ids, node_x, node_y, edge_u, edge_v, edge_key, edge_length, edge_speed_kph):
+        self.node_ids = node_ids
+        self.node_x = node_x
+        self.node_y = node_y
+        self.edge_ids = np.stack([edge_u, edge_v, edge_key], axis=1)
+        self.edge_length = edge_length
+        self.edge_speed_kph = edge_speed_kph
+        self.edge_src = np.searchsorted(node_ids, edge_u).astype(np.int32)
+        self.edge_dst = np.searchsorted(node_ids, edge_v).astype(np.int32)
+
+        self.edge_order = np.argsort(self.edge_src, kind="stable").astype(np.int32)
+        counts = np.bincount(self.edge_src, minlength=self.n_nodes)
+        self.indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        lat0 = math.radians(float(np.mean(node_y))) if len(node_y) else 0.0
+        self._xy_scale = math.cos(lat0)
+        self._node_tree = None
+
+    @classmethod
+    def from_graph(cls, G):
+        node_ids = np.array(sorted(G.nodes), dtype=np.int64)
+        node_x = np.array([G.nodes[n]["x"] for n in node_ids], dtype=float)
+        node_y = np.array([G.nodes[n]["y"] for n in node_ids], dtype=float)
+
+        edges = sorted(G.edges(keys=True, data=True), key=lambda e: (e[0], e[1], e[2]))
+        edge_u = np.array([e[0] for e in edges], dtype=np.int64)
+        edge_v = np.array([e[1] for e in edges], dtype=np.int64)
+        edge_key = np.array([e[2] for e in edges], dtype=np.int64)
+        edge_length = np.array([float(e[3].get("length", 0) or 0) for e in edges], dtype=float)
+        edge_speed = np.array([_edge_speed_kph(e[3]) for e in edges], dtype=float)
+        return cls(node_ids, node_x, node_y, edge_u, edge_v, edge_key, edge_length, edge_speed)
+
+    @property
+    def n_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def n_edges(self):
+        return len(self.edge_length)
+
+    def node_index(self, osm_ids):
+        """Positions of OSM node ids; -1 where an id is not in the graph."""
+        osm_ids = np.asarray(osm_ids, dtype=np.int64)
+        idx = np.searchsorted(self.node_ids, osm_ids)
+        idx = np.clip(idx, 0, max(self.n_nodes - 1, 0))
+        return np.where(self.node_ids[idx] == osm_ids, idx, -1)
+
+    def edge_index(self, uvk):
+        """Positions of (u, v, key) tuples; -1 where an edge is not in the graph."""
+        uvk = np.asarray(uvk, dtype=np.int64).reshape(-1, 3)
+        structured = self.edge_ids.view([("u", np.int64), ("v", np.int64), ("k", np.int64)]).ravel()
+        queries = np.ascontiguousarray(uvk).view(structured.dtype).ravel()
+        idx = np.clip(np.searchsorted(structured, queries), 0, max(self.n_edges - 1, 0))
+        return np.where(structured[idx] == queries, idx, -1)
+
+    def nearest_nodes(self, lons, lats):
+        """Snap WGS84 points to node positions in one vectorized KD-tree query."""
+        if self._node_tree is None:
+            self._node_tree = cKDTree(np.column_stack([self.node_x * self._xy_scale, self.node_y]))
+        points = np.column_stack([np.asarray(lons, dtype=float) * self._xy_scale, np.asarray(lats, dtype=float)])
+        dist_deg, idx = self._node_tree.query(points)
+        return idx.astype(np.int64), np.radians(dist_deg) * EARTH_RADIUS_M
+
+    def travel_time(self, speed_overrides=None):
+        """Seconds to traverse each edge, optionally with {edge_index: kph} overrides.
+
+        Overrides never make an edge faster than its dry speed, so travel
+        times under a flood are always >= the dry ones.
+        """
+        speeds = self.edge_speed_kph.copy()
+        if speed_overrides:
+            idx = np.fromiter(speed_overrides.keys(), dtype=np.int64)
+            kph = np.fromiter(speed_overrides.values(), dtype=float)
+            speeds[idx] = np.minimum(speeds[idx], kph)
+        return self.edge_length / (speeds / 3.6)
+
+    def flood_speed_overrides(self, edge_indices, speed_kph):
+        return {int(e): float(speed_kph) for e in np.asarray(edge_indices).ravel() if e >= 0}
+
+    def to_csr(self, weights, reverse=False):
+        """Node x node sparse matrix keeping the cheapest of any parallel edges."""
+        src, dst = (self.edge_dst, self.edge_src) if reverse else (self.edge_src, self.edge_dst)
+        order = np.lexsort((weights, dst, src))
+        src, dst, w = src[order], dst[order], weights[order]
+        first = np.ones(len(src), dtype=bool)
+        first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        # csgraph treats explicit zeros as missing edges, so nudge them.
+        w = np.maximum(w[first], 1e-9)
+        return csr_matrix((w, (src[first], dst[first])), shape=(self.n_nodes, self.n_nodes))
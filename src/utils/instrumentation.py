@@ -0,0 +1,174 @@
+"""Per-request phase timing, Server-Timing headers and a Prometheus /metrics page.
+
+Wrap slow steps in span():
+
+    with span("onemap_route"):
+        response = requests.get(...)
+
+Inside a request, each span is added to the response's Server-Timing header
+and to the per-endpoint, per-phase latency histogram served on /metrics.
+Repeated spans with the same name (one Supabase query per itinerary leg,
+say) are summed into one phase, with the count in the header's desc.
+Outside a request (scheduler, background jobs) span() records nothing;
+for thread pools inside a request, pass request_spans() from the request
+thread into span() in the worker.
+
+Metrics are kept per process; with several gunicorn workers each worker
+serves its own numbers, so scrape them per worker or aggregate downstream.
+"""
+import re
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response, g, has_request_context, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_PATH = "/metrics"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus text format."""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labels, seconds):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += seconds
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: dict(series, buckets=list(series["buckets"])) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            for bound, count in zip(self.buckets, series["buckets"]):
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {series["count"]}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series['sum']:.6f}")
+            lines.append(f"{self.name}_count{{{label_text}}} {series['count']}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter per label set in the Prometheus text format."""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for labels, value in sorted(snapshot.items()):
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            lines.append(f"{self.name}{{{label_text}}} {value}")
+        return lines
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency by endpoint, method and status.",
+    ("endpoint", "method", "status"),
+)
+phase_duration = Histogram(
+    "http_request_phase_duration_seconds", "Time spent in a named phase of a request, summed per request.",
+    ("endpoint", "phase"),
+)
+upstream_events = Counter(
+    "upstream_events_total", "Upstream calls, hedges, failures and circuit breaker activity.",
+    ("upstream", "event"),
+)
+single_flight_events = Counter(
+    "single_flight_events_total", "Requests that ran a coalesced computation (computed) or waited on one (shared).",
+    ("flight", "event"),
+)
+METRICS = [request_duration, phase_duration, upstream_events, single_flight_events]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _endpoint():
+    # The URL rule, not the raw path, so /simulations/<id> stays one series.
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def request_spans():
+    """The current request's span list, to hand to span() in worker threads."""
+    if has_request_context() and "timing_spans" in g:
+        return g.timing_spans
+    return None
+
+
+@contextmanager
+def span(name, spans=None):
+    """Time a block into the current request, or into spans from request_spans()."""
+    target = spans if spans is not None else request_spans()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if target is not None:
+            target.append((name, time.perf_counter() - started))
+
+
+def _before_request():
+    g.timing_started = time.perf_counter()
+    g.timing_spans = []
+
+
+def _after_request(response):
+    if "timing_started" not in g or request.path == METRICS_PATH:
+        return response
+    total = time.perf_counter() - g.timing_started
+    endpoint = _endpoint()
+
+    phases = {}
+    for name, seconds in g.timing_spans:
+        elapsed, count = phases.get(name, (0.0, 0))
+        phases[name] = (elapsed + seconds, count + 1)
+
+    entries = []
+    for name, (seconds, count) in phases.items():
+        phase_duration.observe((endpoint, name), seconds)
+        token = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        entries.append(f'{token};dur={seconds * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else ""))
+    entries.append(f"total;dur={total * 1000:.1f}")
+    request_duration.observe((endpoint, request.method, str(response.status_code)), total)
+
+    response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+
+def metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+def init_instrumentation(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule(METRICS_PATH, "metrics", metrics, methods=["GET"])
@@ -0,0 +1,91 @@
+import time
+from functools import lru_cache
+import numpy as np
+import geopandas as gpd
+import shapely
+from shapely.geometry import mapping
+from scipy.sparse.csgraph import dijkstra
+
+DEFAULT_HULL_RATIO = 0.3
+MIN_POLYGON_BUFFER_M = 25
+
+
+class IsochroneEngine:
+    """Reachable-area polygons over a GraphArrays network, dry and flooded.
+
+    Dry trees are Dijkstra runs cut off at max_seconds and kept per source
+    node, so any isochrone up to that limit from a recently used node is a
+    threshold on a cached array. Flooded trees are only recomputed when a
+    flooded edge starts inside the dry reachable set: floods only slow
+    edges, so otherwise the flooded tree equals the dry one.
+    """
+
+    def __init__(self, graph_arrays, max_seconds, cache_size=256, hull_ratio=DEFAULT_HULL_RATIO):
+        self.g = graph_arrays
+        self.max_seconds = max_seconds
+        self.hull_ratio = hull_ratio
+        self.dry_weights = graph_arrays.travel_time()
+        self.dry_csr = graph_arrays.to_csr(self.dry_weights)
+        nodes_3414 = gpd.GeoSeries(gpd.points_from_xy(graph_arrays.node_x, graph_arrays.node_y),
+                                   crs="EPSG:4326").to_crs(epsg=3414)
+        self.node_xy = np.column_stack([nodes_3414.x.to_numpy(), nodes_3414.y.to_numpy()])
+        self.dry_tree = lru_cache(maxsize=cache_size)(self._dry_tree)
+
+    def _dry_tree(self, source):
+        dist = dijkstra(self.dry_csr, indices=source, limit=self.max_seconds)
+        dist.setflags(write=False)
+        return dist
+
+    def flooded_tree(self, source, dry_dist, flooded_edges, speed_kph):
+        """(distances, recomputed) with flooded_edges slowed to speed_kph."""
+        flooded_edges = np.asarray(flooded_edges, dtype=np.int64)
+        if not len(flooded_edges) or not np.isfinite(dry_dist[self.g.edge_src[flooded_edges]]).any():
+            return dry_dist, False
+        weights = self.g.travel_time(self.g.flood_speed_overrides(flooded_edges, speed_kph))
+        return dijkstra(self.g.to_csr(weights), indices=source, limit=self.max_seconds), True
+
+    def polygon(self, dist, seconds):
+        """Concave hull (EPSG:3414) of the nodes reachable within seconds."""
+        reachable = np.flatnonzero(dist <= seconds)
+        points = shapely.multipoints(self.node_xy[reachable])
+        if len(reachable) < 3:
+            return points.buffer(MIN_POLYGON_BUFFER_M), len(reachable)
+        hull = shapely.concave_hull(points, ratio=self.hull_ratio)
+        if hull.geom_type != "Polygon":
+            hull = hull.buffer(MIN_POLYGON_BUFFER_M)
+        return hull, len(reachable)
+
+    def isochrone(self, lon, lat, minutes, flooded_edges=(), speed_kph=10):
+        started = time.perf_counter()
+        seconds = minutes * 60
+        nodes, snap_m = self.g.nearest_nodes([lon], [lat])
+        source = int(nodes[0])
+
+        cache_hits = self.dry_tree.cache_info().hits
+        dry_dist = self.dry_tree(source)
+        flooded_dist, recomputed = self.flooded_tree(source, dry_dist, flooded_edges, speed_kph)
+
+        dry_polygon, dry_nodes = self.polygon(dry_dist, seconds)
+        if recomputed:
+            flooded_polygon, flooded_nodes = self.polygon(flooded_dist, seconds)
+        else:
+            flooded_polygon, flooded_nodes = dry_polygon, dry_nodes
+        lost = dry_polygon.difference(flooded_polygon)
+
+        wgs84 = gpd.GeoSeries([dry_polygon, flooded_polygon, lost], crs="EPSG:3414").to_crs(epsg=4326)
+        dry_km2 = dry_polygon.area / 1e6
+        flooded_km2 = flooded_polygon.area / 1e6
+        return {
+            "source_node_id": int(self.g.node_ids[source]),
+            "snap_distance_m": round(float(snap_m[0]), 1),
+            "minutes": minutes,
+            "speed_kph": speed_kph,
+            "dry": {"reachable_nodes": dry_nodes, "area_km2": round(dry_km2, 3), "polygon": mapping(wgs84[0])},
+            "flooded": {"reachable_nodes": flooded_nodes, "area_km2": round(flooded_km2, 3), "polygon": mapping(wgs84[1])},
+            "area_lost_km2": round(dry_km2 - flooded_km2, 3),
+            "area_lost_pct": round((dry_km2 - flooded_km2) / dry_km2 * 100, 1) if dry_km2 else 0.0,
+            "lost_polygon": mapping(wgs84[2]) if not lost.is_empty else None,
+            "dry_tree_cached": self.dry_tree.cache_info().hits > cache_hits,
+            "flooded_tree_recomputed": recomputed,
+            "query_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
@@ -0,0 +1,78 @@
+"""Process memory from /proc/<pid>/smaps_rollup (Linux).
+
+USS (Private_Clean + Private_Dirty) is what a forked worker really costs:
+pages still shared with the gunicorn master are not counted. To see the
+workers of a running server:
+
+    python -m src.utils.memory <gunicorn master pid>
+"""
+import os
+import sys
+from pathlib import Path
+
+ROLLUP_FIELDS = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared_clean",
+                 "Shared_Dirty": "shared_dirty", "Private_Clean": "private_clean",
+                 "Private_Dirty": "private_dirty"}
+
+
+def memory_usage(pid="self"):
+    """{rss, pss, uss, shared} in MiB, or None where smaps_rollup is unavailable."""
+    try:
+        lines = Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()
+    except OSError:
+        return None
+    kb = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].rstrip(":") in ROLLUP_FIELDS:
+            kb[ROLLUP_FIELDS[parts[0].rstrip(":")]] = int(parts[1])
+    mib = lambda value: round(value / 1024, 1)
+    return {
+        "rss_mib": mib(kb.get("rss", 0)),
+        "pss_mib": mib(kb.get("pss", 0)),
+        "uss_mib": mib(kb.get("private_clean", 0) + kb.get("private_dirty", 0)),
+        "shared_mib": mib(kb.get("shared_clean", 0) + kb.get("shared_dirty", 0)),
+    }
+
+
+def rss_mib():
+    """Resident set size of this process from /proc/self/statm; cheap enough to call per phase."""
+    try:
+        resident_pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return round(resident_pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+
+
+def format_memory(usage):
+    if not usage:
+        return "memory n/a"
+    return "rss={rss_mib}MiB pss={pss_mib}MiB uss={uss_mib}MiB shared={shared_mib}MiB".format(**usage)
+
+
+def child_pids(pid):
+    children = []
+    for task in Path(f"/proc/{pid}/task").glob("*"):
+        try:
+            children.extend(int(p) for p in (task / "children").read_text().split())
+        except OSError:
+            continue
+    return sorted(set(children))
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("usage: python -m src.utils.memory <master pid>")
+        sys.exit(1)
+    master = int(sys.argv[1])
+    print(f"master {master}: {format_memory(memory_usage(master))}")
+    workers = child_pids(master)
+    for pid in workers:
+        print(f"worker {pid}: {format_memory(memory_usage(pid))}")
+    uss = [u["uss_mib"] for u in map(memory_usage, workers) if u]
+    if uss:
+        print(f"{len(uss)} workers, mean uss {sum(uss) / len(uss):.1f}MiB")
+
+
+if __name__ == "__main__":
+    main()
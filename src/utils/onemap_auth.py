@@ -1,21 +1,45 @@
+import asyncio
 import os
+import tempfile
+import threading
+import time
 import requests
 import datetime as dt
 from typing import Optional
 from supabase import create_client, Client
+from src.utils.instrumentation import span
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: every process acts as its own leader
+    fcntl = None
 
 # ---- Config (Render ENV) ----
 SUPABASE_URL = os.environ["SUPABASE_URL"]
 SUPABASE_SERVICE_ROLE_KEY = os.environ["SUPABASE_KEY"]  # server-side only
 ONEMAP_EMAIL = os.environ["ONEMAP_EMAIL"]
 ONEMAP_PASSWORD = os.environ["ONEMAP_PASSWORD"]
+ONEMAP_API_BASE = os.getenv("ONEMAP_API_BASE", "https://www.onemap.gov.sg")
 
 
 REFRESH_EARLY_SEC = 6 * 3600  # refresh if <6 h left
+TOKEN_RECHECK_SEC = int(os.getenv("ONEMAP_TOKEN_RECHECK_SEC", 300))  # re-read the row to pick up rotations
+REJECTED_REREAD_SEC = 10  # after a 401/403, re-read the row at most this often
+REJECTED_STATUSES = (401, 403)
+LOCK_PATH = os.getenv("ONEMAP_TOKEN_LOCK", os.path.join(tempfile.gettempdir(), "onemap-token.lock"))
 
 # ---- Init Supabase client ----
 sb: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
+# ---- In-process token cache ----
+_token_lock = threading.Lock()
+_cached_token: Optional[str] = None
+_cached_expiry: Optional[dt.datetime] = None
+_cached_at: float = 0.0
+_last_error: Optional[str] = None
+_rejected_reread_at: float = float("-inf")
+_leader_file = None
+
 def _utcnow():
     return dt.datetime.now(dt.timezone.utc)
 
@@ -59,7 +83,7 @@ def _parse_expiry(exp_raw: Optional[object]) -> Optional[dt.datetime]:
 # ----------------------------------------------------------------------
 def _fetch_new_token() -> tuple[str, dt.datetime]:
     """Fetch a new OneMap token and parse expiry."""
-    url = "https://www.onemap.gov.sg/api/auth/post/getToken"
+    url = f"{ONEMAP_API_BASE}/api/auth/post/getToken"
     payload = {"email": ONEMAP_EMAIL, "password": ONEMAP_PASSWORD}
     r = requests.post(url, json=payload, timeout=20)
     r.raise_for_status()
@@ -83,29 +107,188 @@ def _fetch_new_token() -> tuple[str, dt.datetime]:
     return token, exp
 
 # ----------------------------------------------------------------------
-def get_valid_token(force=False) -> str:
-    """Return a valid OneMap token, refreshing if expiring soon."""
-    rows = sb.table("onemap_token").select("*").eq("id", 1).limit(1).execute().data
+def _cached_token_fresh() -> bool:
+    return (_cached_token is not None and _cached_expiry is not None
+            and (_cached_expiry - _utcnow()).total_seconds() >= REFRESH_EARLY_SEC)
+
+
+def _refresh_due(token, exp) -> bool:
+    return not token or exp is None or (exp - _utcnow()).total_seconds() < REFRESH_EARLY_SEC
+
+
+class _FileLock:
+    """Exclusive flock on path, shared by every worker on this host."""
+
+    def __init__(self, path, blocking=True):
+        self.path = path
+        self.blocking = blocking
+        self.file = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return True
+        self.file = open(self.path, "a")
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | (0 if self.blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            self.file.close()
+            self.file = None
+            return False
+        return True
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+
+def is_refresh_leader() -> bool:
+    """True in the one process per host that runs scheduled rotations.
+
+    The first worker to take the leader lock keeps it for its lifetime;
+    when it exits the lock is released and the next worker to ask takes over.
+    """
+    global _leader_file
+    if _leader_file is not None or fcntl is None:
+        return True
+    f = open(LOCK_PATH + ".leader", "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return False
+    _leader_file = f
+    return True
+
+
+def _read_token_row() -> tuple[Optional[str], Optional[dt.datetime]]:
+    with span("supabase_token_read"):
+        rows = sb.table("onemap_token").select("*").eq("id", 1).limit(1).execute().data
     row = rows[0] if rows else None
+    if not row:
+        return None, None
+    return row.get("access_token"), _parse_expiry(row.get("expiry_timestamp"))
+
 
-    token, exp = None, None
-    if row:
-        token = row.get("access_token")
-        exp_raw = row.get("expiry_timestamp")
-        exp = _parse_expiry(exp_raw)
+def _rotate_token(current: Optional[str]) -> tuple[str, dt.datetime]:
+    """Fetch a new token and store it only if the row still holds `current`.
 
-    now = _utcnow()
-    if force or not token or (exp - now).total_seconds() < REFRESH_EARLY_SEC:
+    Callers hold the host lock; the conditional update covers instances on
+    other hosts. If another instance rotated first, its token is kept.
+    """
+    with span("onemap_token_refresh"):
         new_token, new_exp = _fetch_new_token()
-        sb.table("onemap_token").update({
+        query = sb.table("onemap_token").update({
             "access_token": new_token,
             "expiry_timestamp": new_exp.isoformat()
-        }).eq("id", 1).execute()
-        token = new_token
+        }).eq("id", 1)
+        if current:
+            query = query.eq("access_token", current)
+        updated = query.execute().data
+    if current and not updated:
+        print("OneMap token was rotated by another instance, using the stored token")
+        return _read_token_row()
+    return new_token, new_exp
+
 
-    return token
+def _set_cache(token, exp):
+    global _cached_token, _cached_expiry, _cached_at, _last_error
+    _cached_token, _cached_expiry, _cached_at, _last_error = token, exp, time.monotonic(), None
+
+
+def get_valid_token(force=False) -> str:
+    """Return a valid OneMap token, refreshing if expiring soon.
+
+    The token is cached in-process and the Supabase row is re-read every
+    TOKEN_RECHECK_SEC, which is how workers pick up a token rotated by the
+    leader. Rotation happens here only when the stored token is due (or
+    force=True), under a host-wide lock so concurrent workers rotate once.
+    """
+    global _last_error
+    if not force and _cached_token_fresh() and time.monotonic() - _cached_at < TOKEN_RECHECK_SEC:
+        return _cached_token
+    with _token_lock:
+        if not force and _cached_token_fresh() and time.monotonic() - _cached_at < TOKEN_RECHECK_SEC:
+            return _cached_token
+        try:
+            token, exp = _read_token_row()
+            if force or _refresh_due(token, exp):
+                with _FileLock(LOCK_PATH):
+                    # Another worker may have rotated while this one waited for the lock.
+                    token, exp = _read_token_row()
+                    if force or _refresh_due(token, exp):
+                        token, exp = _rotate_token(token)
+        except Exception as e:
+            _last_error = f"{type(e).__name__}: {e}"
+            raise
+
+        _set_cache(token, exp)
+        return token
 
 # ----------------------------------------------------------------------
-def refresh_onemap_token() -> str:
-    """Force-refresh the OneMap token (for cron/manual use)."""
-    return get_valid_token(force=True)
\ No newline at end of file
+def refresh_onemap_token() -> Optional[str]:
+    """Scheduled check. Runs in the refresh leader only and rotates only when
+    the stored token is due, so however many hosts run it the token is
+    rotated once (the conditional update settles races between hosts).
+    Other workers see the new token on their next recheck of the row."""
+    if not is_refresh_leader():
+        return None
+    return get_valid_token()
+
+
+def reread_token(rejected: str) -> str:
+    """The token to use after OneMap rejected `rejected` with 401/403.
+
+    Re-reads the row now rather than after TOKEN_RECHECK_SEC, so a worker
+    holding a token another instance rotated out switches at once.
+    """
+    global _cached_at, _rejected_reread_at
+    with _token_lock:
+        if _cached_token == rejected and time.monotonic() - _rejected_reread_at >= REJECTED_REREAD_SEC:
+            _cached_at = float("-inf")
+            _rejected_reread_at = time.monotonic()
+    return get_valid_token()
+
+
+async def onemap_get(upstream, client, url, token, **kwargs):
+    """upstream.get() with the token; on 401/403 retries once if the stored token has changed."""
+    response = await upstream.get(client, url, headers={"Authorization": token}, **kwargs)
+    if response.status_code in REJECTED_STATUSES:
+        current = await asyncio.to_thread(reread_token, token)
+        if current and current != token:
+            response = await upstream.get(client, url, headers={"Authorization": current}, **kwargs)
+    return response
+
+# ----------------------------------------------------------------------
+def warm_onemap_token() -> None:
+    """Fill the token cache off the request path; failures are retried on first use."""
+    try:
+        get_valid_token()
+        print(f"OneMap token ready, expires {_cached_expiry.isoformat()}")
+    except Exception as e:
+        print(f"Warning: could not warm OneMap token ({type(e).__name__}: {e}), will retry on first use")
+
+
+def start_token_warmup() -> threading.Thread:
+    thread = threading.Thread(target=warm_onemap_token, name="onemap-token-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def token_status() -> dict:
+    """Cache state for the readiness check; never calls Supabase or OneMap."""
+    if _cached_token_fresh():
+        state = "ready"
+    elif _last_error:
+        state = "error"
+    elif _cached_token is not None:
+        state = "expiring"
+    else:
+        state = "pending"
+    return {
+        "state": state,
+        "expires_at": _cached_expiry.isoformat() if _cached_expiry else None,
+        "last_error": _last_error,
+        "refresh_leader": _leader_file is not None,
+    }
@@ -0,0 +1,109 @@
+"""Flood analytics computed offline, served instead of being recomputed per request.
+
+src.utils.build_precomputed writes one Parquet file per analysis to
+PRECOMPUTED_DIR (precomputed/ by default), one row per (flood_id, buffer_m)
+holding the HTTP status and the response payload as JSON text. Each file
+carries the input version it was built from in its schema metadata: a hash
+of FORMAT_VERSION and the contents of every input file (flood events, road
+graph, stops, centrality, bus route index). At startup the files whose
+version matches the current inputs are loaded; stale or missing files are
+skipped with a warning and those requests are computed live, as are
+arguments that were not precomputed (non-default buffers, unknown floods).
+
+Bump FORMAT_VERSION whenever a payload shape changes so older files are
+ignored rather than served.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from src.utils.centrality_store import file_sha256
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+PRECOMPUTED_DIR = Path(os.getenv("PRECOMPUTED_DIR", ROOT_DIR / "precomputed"))
+FORMAT_VERSION = 1
+ANALYSES = ("critical_segments", "flood_impact", "buses_affected")
+VERSION_KEY = b"input_version"
+
+
+def input_version(paths):
+    """Hash of FORMAT_VERSION and the contents of paths; a missing file hashes as 'missing'."""
+    digest = hashlib.sha256(f"format={FORMAT_VERSION}".encode())
+    for path in paths:
+        path = Path(path)
+        digest.update(f"\n{path.name}=".encode())
+        digest.update((file_sha256(path) if path.exists() else "missing").encode())
+    return digest.hexdigest()[:16]
+
+
+def write_results(directory, analysis, rows, version):
+    """rows: (flood_id, buffer_m, status, payload) tuples; payload must be JSON serializable."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    flood_ids, buffers, statuses, payloads = zip(*rows) if rows else ((), (), (), ())
+    table = pa.table({
+        "flood_id": pa.array(flood_ids, pa.int64()),
+        "buffer_m": pa.array(buffers, pa.float64()),
+        "status": pa.array(statuses, pa.int16()),
+        "payload": pa.array([json.dumps(p) for p in payloads], pa.string()),
+    }).replace_schema_metadata({VERSION_KEY: version.encode()})
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    path = Path(directory) / f"{analysis}.parquet"
+    pq.write_table(table, path, compression="zstd")
+    return path
+
+
+class PrecomputedResults:
+    def __init__(self, version, tables=None):
+        self.version = version
+        self.tables = tables or {}
+
+    @classmethod
+    def load(cls, directory, inputs):
+        """Every <analysis>.parquet in directory built from the current contents of inputs.
+
+        The inputs (the road graph among them) are hashed only when there is
+        a file to check them against.
+        """
+        directory = Path(directory)
+        paths = [directory / f"{analysis}.parquet" for analysis in ANALYSES]
+        if not any(path.exists() for path in paths):
+            print(f"No precomputed results in {directory}, flood analytics are computed live")
+            return cls(None)
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("Warning: pyarrow not installed, precomputed flood analytics are not loaded")
+            return cls(None)
+
+        version = input_version(inputs)
+        results = cls(version)
+        for analysis, path in zip(ANALYSES, paths):
+            if not path.exists():
+                continue
+            stored = (pq.read_schema(path).metadata or {}).get(VERSION_KEY, b"").decode()
+            if stored != version:
+                print(f"Warning: {path.name} was built from input version {stored or 'unknown'}, "
+                      f"current is {version}; computing {analysis} live")
+                continue
+            columns = pq.read_table(path).to_pydict()
+            results.tables[analysis] = {
+                (flood_id, buffer_m): (status, payload)
+                for flood_id, buffer_m, status, payload in zip(
+                    columns["flood_id"], columns["buffer_m"], columns["status"], columns["payload"])
+            }
+            print(f"Loaded {len(results.tables[analysis])} precomputed {analysis} results")
+        return results
+
+    def get(self, analysis, flood_id, buffer_m=0.0):
+        """(payload, status) or None. The payload is parsed per call, so callers may modify it."""
+        hit = self.tables.get(analysis, {}).get((int(flood_id), float(buffer_m)))
+        if hit is None:
+            return None
+        status, payload = hit
+        return json.loads(payload), status
+
+    def __len__(self):
+        return sum(len(table) for table in self.tables.values())
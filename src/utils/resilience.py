@@ -0,0 +1,219 @@
+"""Circuit breakers, hedged requests and last-good fallbacks for slow upstreams.
+
+Each upstream gets one ResilientUpstream per process, shared by every
+request and worker thread:
+
+    response = await onemap_routing.get(client, url, headers=..., params=...)
+
+- After UPSTREAM_BREAKER_FAILURES consecutive failures (transport errors,
+  timeouts, 5xx or 429) the breaker opens and calls stop reaching the
+  upstream for UPSTREAM_BREAKER_RESET_SEC. After that one trial call is let
+  through; it either closes the breaker or opens it again.
+- While the breaker is open, or when a call fails, the last good response
+  for the same URL and params is served if one is cached. Otherwise
+  CircuitOpenError (or the call's own error) is raised, so callers fail
+  fast instead of waiting out the timeout.
+- If a call has not answered within the UPSTREAM_HEDGE_PERCENTILE latency
+  of recent successful calls, one duplicate is sent and the first good
+  answer wins. Hedges are capped at HEDGE_BUDGET of calls so a uniformly
+  slow upstream is not sent twice the traffic.
+
+Only idempotent GETs go through here. Counts of each event are exported on
+/metrics as upstream_events_total.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from src.utils.instrumentation import upstream_events
+
+BREAKER_FAILURES = int(os.getenv("UPSTREAM_BREAKER_FAILURES", 5))
+BREAKER_RESET_SEC = float(os.getenv("UPSTREAM_BREAKER_RESET_SEC", 30))
+HEDGE_PERCENTILE = float(os.getenv("UPSTREAM_HEDGE_PERCENTILE", 95))
+HEDGE_BUDGET = 0.1
+MIN_HEDGE_AFTER_SEC = 0.05
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def _is_failure(response):
+    return response.status_code >= 500 or response.status_code == 429
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failures=BREAKER_FAILURES, reset_sec=BREAKER_RESET_SEC):
+        self.name = name
+        self.failures = failures
+        self.reset_sec = reset_sec
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_sec:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive = 0
+            self._trial_in_flight = False
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._consecutive >= self.failures:
+                if self.state != self.OPEN:
+                    upstream_events.inc((self.name, "breaker_opened"))
+                    print(f"Circuit breaker for {self.name} opened after {self._consecutive} failure(s)")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """A trial call was cancelled before it could tell us anything."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class ResilientUpstream:
+    def __init__(self, name, default_hedge_after_sec, cache_size=256, cache_ttl_sec=3600):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.default_hedge_after_sec = default_hedge_after_sec
+        self.cache_size = cache_size
+        self.cache_ttl_sec = cache_ttl_sec
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._calls = 0
+        self._hedges = 0
+        self._cache = OrderedDict()
+
+    def hedge_after(self):
+        with self._lock:
+            samples = list(self._latencies)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return self.default_hedge_after_sec
+        return max(float(np.percentile(samples, HEDGE_PERCENTILE)), MIN_HEDGE_AFTER_SEC)
+
+    def _take_hedge(self):
+        with self._lock:
+            if self._hedges >= HEDGE_BUDGET * self._calls:
+                return False
+            self._hedges += 1
+            return True
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            stored_at, response = entry
+            if time.monotonic() - stored_at > self.cache_ttl_sec:
+                del self._cache[key]
+                return None
+            return response
+
+    def _store(self, key, response):
+        with self._lock:
+            self._cache[key] = (time.monotonic(), response)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _fallback(self, key, error):
+        cached = self._cached(key)
+        if cached is None:
+            raise error
+        upstream_events.inc((self.name, "stale_served"))
+        return cached
+
+    async def _hedged(self, send):
+        first = asyncio.ensure_future(send())
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after())
+        if done or not self._take_hedge():
+            return await first
+
+        upstream_events.inc((self.name, "hedge"))
+        second = asyncio.ensure_future(send())
+        pending = {first, second}
+        last_error, last_response = None, None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    response = task.result()
+                    if not _is_failure(response):
+                        if task is second:
+                            upstream_events.inc((self.name, "hedge_won"))
+                        return response
+                    last_response = response
+        finally:
+            for task in pending:
+                task.cancel()
+        if last_response is not None:
+            return last_response
+        raise last_error
+
+    async def get(self, client, url, **kwargs):
+        key = (url, tuple(sorted((kwargs.get("params") or {}).items())))
+        if not self.breaker.allow():
+            upstream_events.inc((self.name, "short_circuit"))
+            return self._fallback(key, CircuitOpenError(f"{self.name} is unavailable (circuit open)"))
+
+        with self._lock:
+            self._calls += 1
+        upstream_events.inc((self.name, "request"))
+        started = time.perf_counter()
+        try:
+            response = await self._hedged(lambda: client.get(url, **kwargs))
+        except asyncio.CancelledError:
+            self.breaker.release_trial()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            upstream_events.inc((self.name, "failure"))
+            return self._fallback(key, e)
+
+        if _is_failure(response):
+            self.breaker.record_failure()
+            upstream_events.inc((self.name, "failure"))
+            cached = self._cached(key)
+            if cached is None:
+                return response
+            upstream_events.inc((self.name, "stale_served"))
+            return cached
+
+        self.breaker.record_success()
+        with self._lock:
+            self._latencies.append(time.perf_counter() - started)
+        if response.status_code == 200:
+            self._store(key, response)
+        return response
+
+
+onemap_routing = ResilientUpstream("onemap_route", default_hedge_after_sec=2.0, cache_size=128)
+lta_bus_arrival = ResilientUpstream("lta_bus_arrival", default_hedge_after_sec=0.5, cache_ttl_sec=900)
@@ -0,0 +1,186 @@
+import heapq
+import time
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+DEFAULT_LANDMARKS = 16
+
+
+class RoutingEngine:
+    """Shortest travel time over a GraphArrays network with A* + landmarks (ALT).
+
+    Landmark distances are computed once on dry travel times. Flood scenarios
+    only ever slow edges down (see GraphArrays.travel_time), so the dry
+    landmark bounds stay admissible for every flooded query.
+    """
+
+    def __init__(self, graph_arrays, n_landmarks=DEFAULT_LANDMARKS, seed=0):
+        self.g = graph_arrays
+        self.dry_weights = graph_arrays.travel_time()
+
+        order = graph_arrays.edge_order
+        self._indptr = graph_arrays.indptr.tolist()
+        self._heads = graph_arrays.edge_dst[order].tolist()
+        self._edges = order.tolist()
+        self._dry_weight_list = self.dry_weights.tolist()
+        self.dry_csr = graph_arrays.to_csr(self.dry_weights)
+
+        started = time.perf_counter()
+        self.landmarks, self.dist_from_landmark, self.dist_to_landmark = self._select_landmarks(n_landmarks, seed)
+        print(f"Routing engine ready: {graph_arrays.n_nodes} nodes, {graph_arrays.n_edges} edges, "
+              f"{len(self.landmarks)} landmarks in {time.perf_counter() - started:.1f}s")
+
+    def _select_landmarks(self, n_landmarks, seed):
+        """Farthest-point landmark selection on dry travel times."""
+        forward = self.dry_csr
+        backward = self.g.to_csr(self.dry_weights, reverse=True)
+        n_landmarks = min(n_landmarks, self.g.n_nodes)
+        if n_landmarks == 0:
+            return [], np.empty((0, 0)), np.empty((0, 0))
+
+        rng = np.random.default_rng(seed)
+        current = int(rng.integers(self.g.n_nodes))
+        landmarks, dist_from, dist_to = [], [], []
+        closest = np.full(self.g.n_nodes, np.inf)
+        for _ in range(n_landmarks):
+            d_from = dijkstra(forward, indices=current)
+            d_to = dijkstra(backward, indices=current)
+            landmarks.append(current)
+            dist_from.append(d_from)
+            dist_to.append(d_to)
+
+            reach = np.where(np.isfinite(d_from), d_from, np.nan)
+            closest = np.fmin(closest, reach)
+            candidates = np.where(np.isfinite(closest), closest, -1)
+            candidates[landmarks] = -1
+            current = int(np.argmax(candidates))
+            if candidates[current] <= 0:
+                break
+
+        return landmarks, np.array(dist_from), np.array(dist_to)
+
+    def heuristic_to(self, target):
+        """Lower bound on travel time from every node to target (triangle inequality)."""
+        if not self.landmarks:
+            return np.zeros(self.g.n_nodes)
+        with np.errstate(invalid="ignore"):
+            # d(v, t) >= d(v, L) - d(t, L)   and   d(v, t) >= d(L, t) - d(L, v)
+            to_bound = self.dist_to_landmark - self.dist_to_landmark[:, target:target + 1]
+            from_bound = self.dist_from_landmark[:, target:target + 1] - self.dist_from_landmark
+        bounds = np.nan_to_num(np.maximum(to_bound, from_bound), nan=0.0, posinf=np.inf, neginf=0.0)
+        return np.maximum(bounds.max(axis=0), 0.0)
+
+    def weights_for(self, speed_overrides=None):
+        if not speed_overrides:
+            return self._dry_weight_list
+        weights = list(self._dry_weight_list)
+        for edge, kph in speed_overrides.items():
+            dry_kph = self.g.edge_speed_kph[edge]
+            weights[edge] = self.g.edge_length[edge] / (min(dry_kph, kph) / 3.6)
+        return weights
+
+    def shortest_path(self, source, target, speed_overrides=None):
+        """(seconds, edge index list) from source to target node, or (None, []) if unreachable."""
+        if source == target:
+            return 0.0, []
+
+        weights = self.weights_for(speed_overrides)
+        h = self.heuristic_to(target).tolist()
+        if h[source] == float("inf"):
+            return None, []
+
+        indptr, heads, edges = self._indptr, self._heads, self._edges
+        best = {source: 0.0}
+        via_edge = {}
+        settled = set()
+        heap = [(h[source], 0.0, source)]
+        while heap:
+            _, dist, node = heapq.heappop(heap)
+            if node == target:
+                break
+            if node in settled:
+                continue
+            settled.add(node)
+            for i in range(indptr[node], indptr[node + 1]):
+                head = heads[i]
+                if head in settled:
+                    continue
+                edge = edges[i]
+                candidate = dist + weights[edge]
+                if candidate < best.get(head, float("inf")):
+                    best[head] = candidate
+                    via_edge[head] = edge
+                    heapq.heappush(heap, (candidate + h[head], candidate, head))
+        else:
+            return None, []
+
+        path = []
+        node = target
+        while node != source:
+            edge = via_edge[node]
+            path.append(edge)
+            node = int(self.g.edge_src[edge])
+        path.reverse()
+        return best[target], path
+
+    def route(self, start_lon, start_lat, end_lon, end_lat, flooded_edges=(), speeds_kph=(5, 10, 20, 45)):
+        """Dry and per-flood-speed travel time between two WGS84 points."""
+        started = time.perf_counter()
+        nodes, snap_m = self.g.nearest_nodes([start_lon, end_lon], [start_lat, end_lat])
+        source, target = int(nodes[0]), int(nodes[1])
+
+        dry_sec, dry_path = self.shortest_path(source, target)
+        if dry_sec is None:
+            return None
+
+        flooded_set = set(int(e) for e in flooded_edges)
+        result = {
+            "start_node_id": int(self.g.node_ids[source]),
+            "end_node_id": int(self.g.node_ids[target]),
+            "snap_distance_m": [round(float(d), 1) for d in snap_m],
+            "dry_total_duration": round(dry_sec, 1),
+            "dry_distance_m": round(float(self.g.edge_length[dry_path].sum()), 1) if dry_path else 0.0,
+            "flooded_edges_on_dry_path": sum(1 for e in dry_path if e in flooded_set),
+            "scenarios": {},
+        }
+        for kph in speeds_kph:
+            if result["flooded_edges_on_dry_path"] == 0:
+                # Floods only slow edges, so an untouched dry path stays optimal.
+                flooded_sec, flooded_path = dry_sec, dry_path
+            else:
+                overrides = self.g.flood_speed_overrides(list(flooded_set), kph)
+                flooded_sec, flooded_path = self.shortest_path(source, target, overrides)
+            result["scenarios"][f"{kph}kph"] = {
+                "total_duration": None if flooded_sec is None else round(flooded_sec, 1),
+                "delay": None if flooded_sec is None else round(flooded_sec - dry_sec, 1),
+                "rerouted": flooded_path != dry_path,
+            }
+        result["query_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def travel_time_matrix(self, origin_nodes, dest_nodes, flooded_edges=(), speeds_kph=(5, 10, 20, 45)):
+        """Dense origin x destination travel times (seconds, inf if unreachable), dry and per flood speed.
+
+        One multi-source Dijkstra over the sparse graph per scenario. Only
+        origins whose dry shortest-path tree uses a flooded node pair are
+        re-run for the flooded scenarios; the others keep their dry rows.
+        """
+        sources, inverse = np.unique(np.asarray(origin_nodes, dtype=np.int64), return_inverse=True)
+        dest_nodes = np.asarray(dest_nodes, dtype=np.int64)
+        dry_dist, dry_pred = dijkstra(self.dry_csr, indices=sources, return_predecessors=True)
+        dry = dry_dist[:, dest_nodes]
+
+        flooded = np.array(sorted(set(int(e) for e in flooded_edges)), dtype=np.int64)
+        if len(flooded):
+            affected = np.any(dry_pred[:, self.g.edge_dst[flooded]] == self.g.edge_src[flooded][None, :], axis=1)
+        else:
+            affected = np.zeros(len(sources), dtype=bool)
+
+        scenarios = {}
+        for kph in speeds_kph:
+            matrix = dry.copy()
+            if affected.any():
+                weights = self.g.travel_time(self.g.flood_speed_overrides(flooded, kph))
+                matrix[affected] = dijkstra(self.g.to_csr(weights), indices=sources[affected])[:, dest_nodes]
+            scenarios[f"{kph}kph"] = matrix[inverse]
+        return dry[inverse], scenarios, int(affected.sum())
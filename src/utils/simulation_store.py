@@ -0,0 +1,138 @@
+"""Simulation jobs and results in a SQLite file shared by every worker process.
+
+Any gunicorn worker can take POST /simulations and any other can answer
+GET /simulations/<id>, and finished results survive worker restarts. The
+job runs in the process that queued it, which touches each of its queued
+and running jobs every HEARTBEAT_SEC, however long they wait for a free
+simulation thread. A job whose owner has not touched it for
+SIMULATION_JOB_TIMEOUT_SEC (the process died or was restarted) is
+reported as failed, and posting the same input again requeues it.
+
+SIMULATION_STORE must be on a filesystem every worker can reach; for
+several hosts point it at shared storage or move the table to Supabase.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import closing
+
+STORE_PATH = os.getenv("SIMULATION_STORE", os.path.join(tempfile.gettempdir(), "flood-simulations.sqlite3"))
+JOB_TIMEOUT_SEC = int(os.getenv("SIMULATION_JOB_TIMEOUT_SEC", 120))
+HEARTBEAT_SEC = 30
+BUSY_TIMEOUT_SEC = 30
+
+_COLUMNS = ("id", "status", "input", "submitted_at", "started_at", "finished_at", "result", "error")
+_JSON_COLUMNS = ("input", "result")
+
+
+def _encode(column, value):
+    return json.dumps(value) if column in _JSON_COLUMNS and value is not None else value
+
+
+class SimulationStore:
+    def __init__(self, path=STORE_PATH, max_jobs=500, job_timeout_sec=JOB_TIMEOUT_SEC):
+        self.path = path
+        self.max_jobs = max_jobs
+        self.job_timeout_sec = job_timeout_sec
+        self._owned_lock = threading.Lock()
+        self._owned = set()
+        self._heartbeat_pid = None
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(f"""CREATE TABLE IF NOT EXISTS simulation_jobs (
+                {", ".join(f"{c} TEXT" for c in _COLUMNS)},
+                updated REAL NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (id))""")
+
+    def _connect(self):
+        # One connection per call: connections cannot cross threads or forks.
+        db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SEC, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return closing(db)
+
+    def _job(self, row, now):
+        job = {c: row[c] for c in _COLUMNS}
+        for c in _JSON_COLUMNS:
+            job[c] = json.loads(job[c]) if job[c] is not None else None
+        if job["status"] in ("queued", "running") and now - row["updated"] > self.job_timeout_sec:
+            job.update({"status": "failed", "error": "Simulation was interrupted; submit it again"})
+        return job
+
+    def get(self, job_id):
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM simulation_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE simulation_jobs SET accessed = ? WHERE id = ?", (now, job_id))
+        return self._job(row, now)
+
+    def submit(self, job_id, normalized, submitted_at):
+        """(job, queued): the existing job unless it failed, else a new queued one the caller must run."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT * FROM simulation_jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is not None:
+                    job = self._job(row, now)
+                    if job["status"] != "failed":
+                        db.execute("UPDATE simulation_jobs SET accessed = ? WHERE id = ?", (now, job_id))
+                        db.execute("COMMIT")
+                        return job, False
+
+                job = {"id": job_id, "status": "queued", "input": normalized, "submitted_at": submitted_at,
+                       "started_at": None, "finished_at": None, "result": None, "error": None}
+                db.execute(f"INSERT OR REPLACE INTO simulation_jobs ({', '.join(_COLUMNS)}, updated, accessed) "
+                           f"VALUES ({', '.join('?' * len(_COLUMNS))}, ?, ?)",
+                           (*(_encode(c, job[c]) for c in _COLUMNS), now, now))
+                self._evict(db)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        self._own(job_id)
+        return job, True
+
+    def update(self, job_id, **fields):
+        if fields.get("status") in ("done", "failed"):
+            with self._owned_lock:
+                self._owned.discard(job_id)
+        fields = {c: _encode(c, v) for c, v in fields.items()}
+        with self._connect() as db:
+            db.execute(f"UPDATE simulation_jobs SET {', '.join(f'{c} = ?' for c in fields)}, updated = ? WHERE id = ?",
+                       (*fields.values(), time.time(), job_id))
+
+    def _own(self, job_id):
+        with self._owned_lock:
+            self._owned.add(job_id)
+            if self._heartbeat_pid != os.getpid():
+                # Per process: a heartbeat thread does not survive a fork.
+                self._heartbeat_pid = os.getpid()
+                threading.Thread(target=self._heartbeat, name="simulation-heartbeat", daemon=True).start()
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(HEARTBEAT_SEC)
+            with self._owned_lock:
+                owned = list(self._owned)
+            if not owned:
+                continue
+            try:
+                with self._connect() as db:
+                    db.execute(f"UPDATE simulation_jobs SET updated = ? WHERE status IN ('queued', 'running') "
+                               f"AND id IN ({', '.join('?' * len(owned))})", (time.time(), *owned))
+            except sqlite3.Error as e:
+                print(f"Warning: simulation heartbeat failed: {e}")
+
+    def _evict(self, db):
+        """Drop the least recently used finished or interrupted jobs beyond max_jobs."""
+        (count,) = db.execute("SELECT COUNT(*) FROM simulation_jobs").fetchone()
+        if count > self.max_jobs:
+            db.execute("""DELETE FROM simulation_jobs WHERE id IN (
+                SELECT id FROM simulation_jobs WHERE status IN ('done', 'failed') OR updated < ?
+                ORDER BY accessed LIMIT ?)""", (time.time() - self.job_timeout_sec, count - self.max_jobs))
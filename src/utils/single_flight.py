@@ -0,0 +1,105 @@
+"""Coalesce identical concurrent computations into one.
+
+    payload, status = critical_segments_flight.do((flood_id, buffer_m), compute)
+
+The first caller for a key runs the computation; callers arriving with the
+same key while it is in flight wait for it and get the same result (or
+exception). Nothing is kept once the computation finishes, so this only
+merges simultaneous requests; caching is left to the callers.
+
+Keys must be normalized by the caller (parsed ids, sorted, defaults
+filled in) so that equivalent requests coalesce. Results are shared
+objects and must not be mutated.
+
+Coalescing is per worker process, across the requests that worker has in
+flight at once: the ASGI_THREADS request threads of a uvicorn worker
+(asgi:app, the default), or the GUNICORN_THREADS threads of a gthread
+worker. A worker serving one request at a time never shares anything.
+do() waits on the request thread. do_async() waits on a future of the
+caller's event loop, so waiters hold no thread and the leader's own
+asyncio.to_thread work cannot be starved by them.
+"""
+import asyncio
+import threading
+
+from src.utils.instrumentation import span, single_flight_events
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = []
+        self.result = None
+        self.error = None
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def _join(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                single_flight_events.inc((self.name, "shared"))
+                return call, False
+            call = self._calls[key] = _Call()
+        single_flight_events.inc((self.name, "computed"))
+        return call, True
+
+    def _finish(self, key, call):
+        with self._lock:
+            del self._calls[key]
+            call.done.set()
+            waiters, call.waiters = call.waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def _shared_result(self, call):
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key, fn):
+        call, leader = self._join(key)
+        if not leader:
+            with span("coalesced_wait"):
+                call.done.wait()
+            return self._shared_result(call)
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+        return call.result
+
+    async def do_async(self, key, coro_fn):
+        call, leader = self._join(key)
+        if not leader:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            with self._lock:
+                if not call.done.is_set():
+                    call.waiters.append((loop, future))
+                else:
+                    future.set_result(None)
+            with span("coalesced_wait"):
+                await future
+            return self._shared_result(call)
+        try:
+            call.result = await coro_fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+        return call.result
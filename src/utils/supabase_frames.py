@@ -0,0 +1,30 @@
+import pandas as pd
+from src.database import supabase
+from src.utils.instrumentation import span
+
+PAGE_SIZE = 1000
+
+
+def fetch_table_frame(table, columns, order_by=None, page_size=PAGE_SIZE):
+    """Read every row of a Supabase table into a DataFrame.
+
+    PostgREST caps a single response at 1000 rows, so the table is paged
+    with .range() until a short page comes back. Pass order_by (usually the
+    primary key) so pages do not overlap. Only the listed columns are
+    selected to keep the transfer small.
+    """
+    rows = []
+    offset = 0
+    while True:
+        query = supabase.table(table).select(",".join(columns))
+        if order_by:
+            query = query.order(order_by)
+        with span(f"supabase_{table}"):
+            response = query.range(offset, offset + page_size - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            break
+        offset += page_size
+
+    return pd.DataFrame(rows, columns=list(columns))
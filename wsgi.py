@@ -1,3 +1,4 @@
+import os
 from app import create_app
 
-app = create_app()
+app = create_app(preload=os.getenv("PRELOAD_NETWORK_DATA") == "1")